@@ -1,4 +1,10 @@
 from django.contrib import admin
-from .models import Expense
+from .models import Expense, Product
 
 admin.site.register(Expense)
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ("name", "category", "unit_price", "unit_volume_litres", "is_refill", "is_gas", "is_bottle", "active")
+    list_filter = ("category", "active")
@@ -0,0 +1,204 @@
+# myapp/api.py
+"""
+Building blocks of the JSON API under ``/api/`` (the views are in views.py).
+
+* Lists are keyset pages (``pagination.keyset_page``) in the dashboard
+  order; the response carries ``next_cursor`` for the following page.
+* ``?fields=id,item,price`` picks the columns: only those are loaded
+  (``QuerySet.only``) and returned.
+* ETags are derived from the dashboard cache data version of the area plus
+  the full request URL, so a conditional GET on unchanged data is answered
+  with a 304 before any query runs. Like the dashboard cache this needs a
+  shared cache backend when several processes serve the API.
+
+Authentication is the normal login session; writes need the CSRF token
+(``X-CSRFToken`` header) like any other POST to the site.
+"""
+import hashlib
+import json
+from functools import wraps
+from operator import attrgetter
+
+from django.forms.models import model_to_dict
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+
+from . import dashboard_cache
+from .pagination import EXPENSE_ORDER, SALE_ORDER
+from .reports import filter_sales_by_dates
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.errors = errors
+
+    def as_dict(self):
+        data = {"error": self.message}
+        if self.errors:
+            data["errors"] = self.errors
+        return data
+
+
+def api_view(superuser=False):
+    """JSON 401/403 instead of the login redirect, and ``ApiError`` as a JSON error."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({"error": "Authentication required"}, status=401)
+            if superuser and not request.user.is_superuser:
+                return JsonResponse({"error": "Unauthorized"}, status=403)
+            try:
+                return view(request, *args, **kwargs)
+            except ApiError as e:
+                return JsonResponse(e.as_dict(), status=e.status)
+        return wrapper
+    return decorator
+
+
+class Resource:
+    """
+    How one model is exposed: ``fields`` maps API name -> (model field,
+    getter); ``related`` names the fields that need a ``select_related``.
+    """
+
+    def __init__(self, area, fields, order, related=()):
+        self.area = area
+        self.fields = fields
+        self.order = order
+        self.related = related
+
+    def parse_fields(self, request):
+        raw = request.GET.get("fields")
+        if not raw:
+            return list(self.fields)
+        names = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(self.fields)}.")
+        return names
+
+    def load(self, queryset, names):
+        """Restrict ``queryset`` to the columns behind ``names`` (plus the sort keys)."""
+        columns = {self.fields[name][0] for name in names} | {field for field, _ in self.order}
+        related = [name for name in self.related if name in names]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name][1](obj) for name in names}
+
+
+SALES = Resource(
+    "sales",
+    {
+        "id": ("id", attrgetter("id")),
+        "user": ("user__username", attrgetter("user.username")),
+        "category": ("category", attrgetter("category")),
+        "item": ("item", attrgetter("item")),
+        "product": ("product", attrgetter("product_id")),
+        "quantity": ("quantity", attrgetter("quantity")),
+        "price": ("price", attrgetter("price")),
+        "date": ("date", attrgetter("date")),
+        "payment_method": ("payment_method", attrgetter("payment_method")),
+        "payment_status": ("payment_status", attrgetter("payment_status")),
+        "delivery_place": ("delivery_place", attrgetter("delivery_place")),
+    },
+    SALE_ORDER,
+    related=("user",),
+)
+
+EXPENSES = Resource(
+    "expenses",
+    {
+        "id": ("id", attrgetter("id")),
+        "receipt_no": ("receipt_no", attrgetter("receipt_no")),
+        "date": ("date", attrgetter("date")),
+        "paid_to": ("paid_to", attrgetter("paid_to")),
+        "charges_account": ("charges_account", attrgetter("charges_account")),
+        "description": ("description", attrgetter("description")),
+        "received_amount": ("received_amount", attrgetter("received_amount")),
+        "bank_charges": ("bank_charges", attrgetter("bank_charges")),
+        "amount_paid": ("amount_paid", attrgetter("amount_paid")),
+        "cumulative_balance": ("cumulative_balance", attrgetter("cumulative_balance")),
+    },
+    EXPENSE_ORDER,
+)
+
+
+# --------------------------
+# Filters
+# --------------------------
+def _date_param(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:  # well formed but not a real date
+        day = None
+    if day is None:
+        raise ApiError(f"Invalid {name} (expected YYYY-MM-DD): {value}")
+    return day
+
+
+def date_range(request):
+    return _date_param(request, "start_date"), _date_param(request, "end_date")
+
+
+def filter_sales(sales, request):
+    """``start_date``/``end_date`` (inclusive days), ``payment_method``, ``payment_status``."""
+    sales = filter_sales_by_dates(sales, *date_range(request))
+    for name in ("payment_method", "payment_status"):
+        if request.GET.get(name):
+            sales = sales.filter(**{name: request.GET[name]})
+    return sales
+
+
+def filter_expenses(expenses, request):
+    """``start_date``/``end_date`` (inclusive), ``charges_account``, ``paid_to``."""
+    start, end = _date_param(request, "start_date"), _date_param(request, "end_date")
+    if start:
+        expenses = expenses.filter(date__gte=start)
+    if end:
+        expenses = expenses.filter(date__lte=end)
+    for name in ("charges_account", "paid_to"):
+        if request.GET.get(name):
+            expenses = expenses.filter(**{name: request.GET[name]})
+    return expenses
+
+
+# --------------------------
+# Requests / conditional GET
+# --------------------------
+def read_json(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        raise ApiError("Request body is not valid JSON.")
+    if not isinstance(data, dict):
+        raise ApiError("Expected a JSON object.")
+    return data
+
+
+def form_errors(form):
+    return {field: [error["message"] for error in errors] for field, errors in form.errors.get_json_data().items()}
+
+
+def form_data(instance, form_class, changes):
+    """Data for ``form_class`` bound to ``instance``: its current values updated with ``changes``."""
+    data = model_to_dict(instance, fields=form_class._meta.fields)
+    data.update(changes)
+    return {key: "" if value is None else value for key, value in data.items()}
+
+
+def etag(resource):
+    """``etag_func`` for ``django.views.decorators.http.condition``."""
+    def etag_func(request, *args, **kwargs):
+        raw = f"{dashboard_cache.version(resource.area)}:{request.get_full_path()}"
+        return hashlib.md5(raw.encode()).hexdigest()
+    return etag_func
@@ -0,0 +1,192 @@
+# myapp/benchmarks.py
+"""
+View benchmarks: seed data, time the main pages through the test client.
+
+Each scenario is requested ``warmup`` times untimed, then ``repeat`` times
+timed. Query counts come from the timed runs; peak Python memory from one
+extra run under ``tracemalloc`` (kept out of the timings, it slows every
+allocation). Streaming responses are consumed fully, so exports are timed
+to the last byte. Results are plain dicts, ready for ``json.dump`` and for
+``compare`` against a stored baseline.
+"""
+import io
+import os
+import platform
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import dashboard_cache, ledger, summary
+from .perf import percentile
+from .seed import seed_expenses, seed_sales, seed_users
+
+SCENARIOS = [
+    "user_dashboard",
+    "admin_dashboard",
+    "sales_report",
+    "admin_sales_excel",
+    "admin_expenses_excel",
+    "upload_expense",
+]
+
+# A scenario regresses when its p50 grows by more than this fraction
+DEFAULT_TOLERANCE = 0.25
+
+
+def seed(sales=5000, expenses=2000, days=365):
+    """Seed synthetic rows and bring the rollup and balances up to date."""
+    users = seed_users()
+    seed_sales(sales, days=days, users=users)
+    seed_expenses(expenses, days=days)
+    summary.rebuild()
+    ledger.recalculate_from(None)
+    return users
+
+
+def upload_csv(rows, rng=None):
+    """An in-memory expense CSV in the upload column layout."""
+    rng = rng or random.Random(11)
+    today = timezone.localdate()
+    lines = ["R. No,Date,Paid To,Charges A/c,Description,Received Amnt,Bank charges,Amount Paid"]
+    for i in range(rows):
+        day = today - timedelta(days=rng.randint(0, 30))
+        lines.append(f"U{i},{day:%d/%m/%Y},Supplier {i % 50},General,Uploaded,,1.50,{rng.randint(50, 5000)}")
+    upload = io.BytesIO("\n".join(lines).encode())
+    upload.name = "benchmark.csv"
+    return upload
+
+
+def _request(client, name, upload_rows):
+    if name == "upload_expense":
+        return client.post(reverse(name), {"file": upload_csv(upload_rows)})
+    return client.get(reverse(name))
+
+
+def _consume(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, name, repeat=10, warmup=1, cached=False, upload_rows=500):
+    """Time one scenario; returns its stats dict."""
+    def run():
+        if not cached:
+            dashboard_cache.bump("sales")
+            dashboard_cache.bump("expenses")
+        response = _request(client, name, upload_rows)
+        size = _consume(response)
+        return response.status_code, size
+
+    for _ in range(warmup):
+        run()
+
+    timings, queries, statuses = [], [], set()
+    size = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            status, size = run()
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(ctx.captured_queries))
+        statuses.add(status)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": sorted(statuses),
+        "runs": repeat,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "min_ms": round(min(timings), 2),
+        "max_ms": round(max(timings), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "queries": max(queries),
+        "peak_kb": round(peak / 1024, 1),
+        "bytes": size,
+    }
+
+
+def run_benchmarks(scenarios=None, repeat=10, warmup=1, cached=False, upload_rows=500, user=None,
+                   media_dir=None):
+    """
+    Benchmark ``scenarios`` (default: all) against the rows already in the
+    database, logged in as ``user`` (a throwaway superuser if None). Uploaded
+    and rendered files go to ``media_dir``, or to a temporary directory that
+    is removed afterwards; never to the real ``MEDIA_ROOT``.
+    """
+    if user is None:
+        user, _ = User.objects.get_or_create(username="bench-admin", defaults={"is_superuser": True, "is_staff": True})
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    with nullcontext(media_dir) if media_dir else tempfile.TemporaryDirectory() as media:
+        with override_settings(
+            IMPORT_JOBS_EAGER=True,
+            ALLOWED_HOSTS=["testserver", *settings.ALLOWED_HOSTS],
+            MEDIA_ROOT=media,
+            PDF_REPORT_DIR=os.path.join(media, "reports"),
+        ):
+            for name in scenarios or SCENARIOS:
+                results[name] = measure(client, name, repeat, warmup, cached, upload_rows)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "machine": platform.machine(),
+        "recorded_at": timezone.now().isoformat(timespec="seconds"),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare ``results`` with ``baseline`` (both ``{scenario: stats}``).
+
+    Returns ``(rows, regressions)``: one row per shared scenario with the
+    p50 ratio, and the names whose p50 grew by more than ``tolerance`` or
+    whose query count went up.
+    """
+    rows, regressions = [], []
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        ratio = stats["p50_ms"] / before["p50_ms"] if before["p50_ms"] else None
+        more_queries = stats["queries"] > before["queries"]
+        slower = ratio is not None and ratio > 1 + tolerance
+        rows.append({
+            "scenario": name,
+            "baseline_p50_ms": before["p50_ms"],
+            "p50_ms": stats["p50_ms"],
+            "ratio": round(ratio, 3) if ratio is not None else None,
+            "baseline_queries": before["queries"],
+            "queries": stats["queries"],
+            "regressed": slower or more_queries,
+        })
+        if slower or more_queries:
+            regressions.append(name)
+    return rows, regressions
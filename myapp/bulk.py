@@ -0,0 +1,129 @@
+# myapp/bulk.py
+"""
+Bulk delete / archive of sales and expenses.
+
+A selection is either the checked ids of a dashboard table or a date range
+plus filters. It is worked through in batches of at most
+``BULK_BATCH_SIZE`` rows, each in its own transaction: checked ids are
+chunked, filter selections are walked by primary key (no OFFSET, no
+unbounded ``IN`` list), so locks are held for one batch at a time.
+
+Archiving is a soft delete: the row keeps its id but is flagged
+``archived``, which drops it from the default managers, the partial hot
+indexes, the sales rollup and the expense ledger. The ``move_archived``
+command later moves archived rows to the cold ``ArchivedSale`` /
+``ArchivedExpense`` tables.
+"""
+from django.conf import settings
+
+from . import ledger, summary
+from .models import Expense, Sale
+from .reports import filter_sales_by_dates
+
+DELETE = "delete"
+ARCHIVE = "archive"
+ACTIONS = (DELETE, ARCHIVE)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_batch_size():
+    return getattr(settings, "BULK_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def parse_ids(values):
+    """Distinct integer ids from a ``getlist()``, ignoring anything else."""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return sorted(ids)
+
+
+# --------------------------
+# Selections
+# --------------------------
+def select_sales(start=None, end=None, payment_method=None, payment_status=None, user=None):
+    """Live sales on ``start``..``end`` (inclusive days) matching the given filters."""
+    sales = filter_sales_by_dates(Sale.objects.all(), start, end)
+    if payment_method:
+        sales = sales.filter(payment_method=payment_method)
+    if payment_status:
+        sales = sales.filter(payment_status=payment_status)
+    if user:
+        sales = sales.filter(user=user)
+    return sales
+
+
+def select_expenses(start=None, end=None, charges_account=None, paid_to=None):
+    """Live expenses dated ``start``..``end`` (inclusive) matching the given filters."""
+    expenses = Expense.objects.all()
+    if start:
+        expenses = expenses.filter(date__gte=start)
+    if end:
+        expenses = expenses.filter(date__lte=end)
+    if charges_account:
+        expenses = expenses.filter(charges_account=charges_account)
+    if paid_to:
+        expenses = expenses.filter(paid_to=paid_to)
+    return expenses
+
+
+def batches(queryset, ids=None, batch_size=None):
+    """
+    Primary keys to process, ``batch_size`` at a time, ascending.
+
+    ``ids`` (checked rows) are chunked as given; otherwise ``queryset`` is
+    walked by primary key, one bounded query per batch.
+    """
+    size = batch_size or get_batch_size()
+    if ids is not None:
+        ids = sorted(ids)
+        for i in range(0, len(ids), size):
+            yield ids[i:i + size]
+        return
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(pk__gt=last)
+        chunk = list(page.order_by("pk").values_list("pk", flat=True)[:size])
+        if not chunk:
+            return
+        yield chunk
+        last = chunk[-1]
+
+
+# --------------------------
+# Operations
+# --------------------------
+def sales(action, ids=None, queryset=None, batch_size=None):
+    """Delete or archive the checked ``ids`` or the ``queryset`` selection; returns the row count."""
+    done = 0
+    for chunk in batches(queryset, ids, batch_size):
+        rows = Sale.objects.filter(pk__in=chunk)
+        if action == ARCHIVE:
+            done += summary.archive_with_rollup(rows)
+        else:
+            _, per_model = summary.delete_with_rollup(rows)
+            done += per_model.get(Sale._meta.label, 0)
+    return done
+
+
+def expenses(action, ids=None, queryset=None, batch_size=None):
+    """As ``sales``; the running balances are recalculated once, after the last batch."""
+    done, earliest = 0, None
+    for chunk in batches(queryset, ids, batch_size):
+        rows = Expense.objects.filter(pk__in=chunk)
+        first = rows.order_by("date").values_list("date", flat=True).first()
+        if first is None:
+            continue
+        earliest = first if earliest is None else min(earliest, first)
+        if action == ARCHIVE:
+            done += ledger.archive_expenses(rows, rebalance=False)
+        else:
+            _, per_model = ledger.delete_expenses(rows, rebalance=False)
+            done += per_model.get(Expense._meta.label, 0)
+    if earliest is not None:
+        ledger.recalculate_from(earliest)
+    return done
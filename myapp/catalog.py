@@ -0,0 +1,68 @@
+# myapp/catalog.py
+"""
+In-process cache of the product catalog.
+
+The catalog is tiny and read on every order, so it is loaded once per process
+and served from a dict. ``invalidate()`` is called from the Product
+save/delete signals; ``CATALOG_CACHE_TTL`` bounds how long another process
+can serve a stale copy.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Product
+
+DEFAULT_TTL = 300  # seconds
+
+_lock = threading.Lock()
+_products = None  # normalized name -> Product
+_loaded_at = 0.0
+
+
+def normalize_name(name):
+    """Product names match ignoring case and runs of whitespace ("20L  Bottle" == "20l bottle")."""
+    return " ".join(str(name).split()).casefold()
+
+
+def _load():
+    global _products, _loaded_at
+    ttl = getattr(settings, "CATALOG_CACHE_TTL", DEFAULT_TTL)
+    products = _products
+    if products is not None and time.monotonic() - _loaded_at < ttl:
+        return products
+    with _lock:
+        if _products is None or time.monotonic() - _loaded_at >= ttl:
+            _products = {normalize_name(p.name): p for p in Product.objects.filter(active=True)}
+            _loaded_at = time.monotonic()
+        return _products
+
+
+def invalidate():
+    global _products
+    with _lock:
+        _products = None
+
+
+def get_product(name):
+    """Cached lookup of an active product by name (``Sale.item``); None if unknown."""
+    if not name:
+        return None
+    return _load().get(normalize_name(name))
+
+
+def unit_price(name):
+    product = get_product(name)
+    return product.unit_price if product else None
+
+
+def price_list():
+    """``{category: {name: price}}``, the shape the order forms expect."""
+    prices = {}
+    for product in _load().values():
+        price = product.unit_price
+        prices.setdefault(product.category, {})[product.name] = (
+            int(price) if price == price.to_integral_value() else float(price)
+        )
+    return prices
@@ -0,0 +1,187 @@
+# myapp/dashboard_cache.py
+"""
+Cached dashboard totals and rendered table fragments.
+
+Entries live in the Django cache and are keyed by a per-area data version
+("sales" or "expenses"), a counter raised with ``cache.incr``. Writes never
+delete entries; they bump the version (``bump``) so every key built
+afterwards is new and old entries simply age out. Sale/Expense signals bump
+on single saves and deletes, the bulk paths (``summary``, ``ledger``) bump
+once per batch. Sale writes also bump the area of the clerk who made the
+sale (``user_area``), so a clerk's own cached rows and totals survive
+everybody else's orders.
+
+Hits and misses are counted per fragment name in the cache itself, so with
+a shared backend the numbers cover all processes; ``stats()`` reads them.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from .pagination import KeysetPage
+
+DEFAULT_TIMEOUT = 300  # seconds
+DEFAULT_VERSION_TIMEOUT = 86400  # seconds
+PREFIX = "dashboard"
+
+# Fragment names cached by the views; stats() reports these from every process
+FRAGMENTS = (
+    "sales_totals", "admin_sales", "expenses_total", "admin_expenses", "user_orders", "user_daily_totals",
+)
+
+_names = set()  # any other fragment names this process has counted
+
+
+def _timeout():
+    return getattr(settings, "DASHBOARD_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+
+def _version_timeout():
+    return getattr(settings, "DASHBOARD_CACHE_VERSION_TIMEOUT", DEFAULT_VERSION_TIMEOUT)
+
+
+def _version_key(area):
+    return f"{PREFIX}:version:{area}"
+
+
+def _first_version():
+    # A version key that expired starts again above anything it counted to before
+    return time.time_ns() // 1000
+
+
+def version(area):
+    """Current data version of ``area``, created on first use."""
+    key = _version_key(area)
+    current = cache.get(key)
+    if current is None:
+        cache.add(key, _first_version(), _version_timeout())
+        current = cache.get(key)
+    return current
+
+
+def _set_version(area):
+    key = _version_key(area)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _first_version(), _version_timeout())
+
+
+def user_area(user_id):
+    """Area of one clerk's own sales (their scoped dashboard rows and daily totals)."""
+    return f"sales-user-{user_id}"
+
+
+def bump_users(user_ids):
+    for user_id in set(user_ids):
+        bump(user_area(user_id))
+
+
+def bump(area):
+    """
+    Invalidate everything cached for ``area``.
+
+    Bumped now, so the writing request sees its own change, and again on
+    commit, so a reader that cached the old rows mid-transaction is dropped.
+    """
+    _set_version(area)
+    transaction.on_commit(lambda: _set_version(area))
+
+
+# --------------------------
+# Hit / miss counters
+# --------------------------
+STATS_AREA = "stats"  # its version prefixes the counters; reset_stats bumps it
+
+
+def _stats_key(name, outcome):
+    return f"{PREFIX}:stats:{version(STATS_AREA)}:{name}:{outcome}"
+
+
+def _count(name, outcome):
+    if name not in FRAGMENTS:
+        _names.add(name)
+    key = _stats_key(name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, _version_timeout()):
+            cache.incr(key)  # another process created it first
+
+
+def stats():
+    """``{name: {"hits", "misses", "hit_rate"}}`` for every fragment seen."""
+    result = {}
+    for name in sorted(set(FRAGMENTS) | _names):
+        hits = cache.get(_stats_key(name, "hit"), 0)
+        misses = cache.get(_stats_key(name, "miss"), 0)
+        total = hits + misses
+        if not total and name not in _names:
+            continue
+        result[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 3) if total else None,
+        }
+    return result
+
+
+def reset_stats():
+    _set_version(STATS_AREA)
+
+
+# --------------------------
+# Cached values
+# --------------------------
+def _key(area, name, params):
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f"{PREFIX}:{area}:{version(area)}:{name}:{digest}"
+
+
+def cached(area, name, build, *params):
+    """Return the cached value of ``build()`` for ``name``/``params`` at the current ``area`` version."""
+    key = _key(area, name, params)
+    value = cache.get(key)
+    if value is not None:
+        _count(name, "hit")
+        return value
+    _count(name, "miss")
+    value = build()
+    cache.set(key, value, _timeout())
+    return value
+
+
+def cached_rows(area, name, rows, template, *params):
+    """Table rows rendered through ``template`` (with ``rows`` in context), cached as HTML."""
+    return cached(area, name, lambda: render_to_string(template, {"rows": rows()}), *params)
+
+
+def cached_page(area, name, page, template, *params):
+    """
+    A ``KeysetPage`` whose ``rows`` are the rendered HTML of the page.
+
+    ``page`` is a callable returning the live ``KeysetPage``; it only runs
+    on a miss.
+    """
+    def build():
+        live = page()
+        html = render_to_string(template, {"rows": live.rows})
+        return KeysetPage(html, live.next_cursor, live.cursor)
+    return cached(area, name, build, *params)
+
+
+async def acached(area, name, build, *params):
+    """``cached`` for async views; ``build`` is a coroutine function."""
+    key = _key(area, name, params)
+    value = await cache.aget(key)
+    if value is not None:
+        _count(name, "hit")
+        return value
+    _count(name, "miss")
+    value = await build()
+    await cache.aset(key, value, _timeout())
+    return value
@@ -0,0 +1,89 @@
+# myapp/feed.py
+"""Sale change events (``SaleEvent``) read by the live user dashboard after the last event it has seen."""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Sale, SaleEvent
+
+DEFAULT_WINDOW = 100  # sales rendered with the page
+DEFAULT_BATCH = 200  # events sent per poll
+DEFAULT_RETENTION_HOURS = 24
+DEFAULT_POLL_SECONDS = 1.0  # how often an open stream / long poll checks for events
+DEFAULT_LONG_POLL_SECONDS = 25
+DEFAULT_STREAM_SECONDS = 300  # an event stream is closed (and reconnected) after this
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 2000  # EventSource reconnect delay
+PRUNE_EVERY_SECONDS = 600
+
+_last_prune = 0.0
+
+
+def get_window():
+    return getattr(settings, "USER_DASHBOARD_WINDOW", DEFAULT_WINDOW)
+
+
+def record(action, sales):
+    """Log ``action`` for ``(sale_id, user_id)`` pairs, once the surrounding transaction commits."""
+    sales = list(sales)
+    if sales:
+        transaction.on_commit(lambda: _write(action, sales))
+
+
+def _write(action, sales):
+    SaleEvent.objects.bulk_create([
+        SaleEvent(sale_id=sale_id, user_id=user_id, action=action) for sale_id, user_id in sales
+    ])
+    prune()
+
+
+def prune(force=False):
+    global _last_prune
+    now = time.monotonic()
+    if not force and now - _last_prune < PRUNE_EVERY_SECONDS:
+        return 0
+    _last_prune = now
+    hours = getattr(settings, "SALE_FEED_RETENTION_HOURS", DEFAULT_RETENTION_HOURS)
+    deleted, _ = SaleEvent.objects.filter(created_at__lt=timezone.now() - timedelta(hours=hours)).delete()
+    return deleted
+
+
+def last_event_id():
+    return SaleEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def deltas(after, user_ids=None, limit=DEFAULT_BATCH):
+    """
+    Changes after event ``after`` (of ``user_ids``' sales if given): ``{"last_id", "deltas", "reset"}``,
+    one ``{"id", "action", "row"}`` delta per sale; ``reset`` if unseen events were pruned.
+    """
+    events = SaleEvent.objects.filter(id__gt=after)
+    if user_ids is not None:
+        events = events.filter(user_id__in=user_ids)
+    events = list(events.order_by("id").values_list("id", "sale_id", "action")[:limit])
+    if not events:
+        return {"last_id": after, "deltas": [], "reset": False}
+    if after and events[0][0] > after + 1 and not SaleEvent.objects.filter(id__lte=after).exists():
+        # Events this client has not seen were pruned
+        return {"last_id": events[-1][0], "deltas": [], "reset": True}
+
+    latest = {}
+    for _, sale_id, action in events:
+        latest.pop(sale_id, None)
+        latest[sale_id] = action
+    live = [pk for pk, action in latest.items() if action != SaleEvent.DELETED]
+    sales = Sale.objects.for_listing().in_bulk(live)
+
+    result = []
+    for sale_id, action in latest.items():
+        sale = sales.get(sale_id)
+        if sale is None:
+            result.append({"id": sale_id, "action": SaleEvent.DELETED, "row": None})
+        else:
+            row = render_to_string("user_orders_rows.html", {"rows": [sale]}).strip()
+            result.append({"id": sale_id, "action": action, "row": row})
+    return {"last_id": events[-1][0], "deltas": result, "reset": False}
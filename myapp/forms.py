@@ -12,8 +12,7 @@ class ExpenseForm(forms.ModelForm):
             "received_amount",
             "bank_charges",
             "amount_paid",
-            "cumulative_balance",
-        ]
+        ]  # cumulative_balance is computed by the ledger
         widgets = {
             "date": forms.DateInput(attrs={"type": "date"}),
         }
@@ -0,0 +1,20 @@
+# myapp/hooks.py
+"""Switch for pausing the signal-driven bookkeeping (sales rollup, ledger)."""
+import threading
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+@contextmanager
+def suspended():
+    """Skip the per-row signal handlers; the caller updates the derived data itself."""
+    _state.depth = getattr(_state, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+
+
+def is_suspended():
+    return getattr(_state, "depth", 0) > 0
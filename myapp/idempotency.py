@@ -0,0 +1,75 @@
+# myapp/idempotency.py
+"""Idempotent order submission: a retried form or ``Idempotency-Key`` request gets the original sales back."""
+import hashlib
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey, Sale
+
+HEADER = "Idempotency-Key"
+FIELD = "idempotency_key"
+DEFAULT_TTL_HOURS = 24
+PRUNE_EVERY_SECONDS = 600
+
+_last_prune = 0.0
+
+
+def new_key():
+    """A fresh token for a form's hidden ``idempotency_key`` field."""
+    return uuid.uuid4().hex
+
+
+def get_key(request):
+    """The request's key (header first, then the form field) as a fixed-size digest, or None."""
+    raw = request.headers.get(HEADER) or request.POST.get(FIELD)
+    if not raw or not raw.strip():
+        return None
+    return hashlib.sha256(raw.strip().encode()).hexdigest()
+
+
+def _cutoff():
+    hours = getattr(settings, "IDEMPOTENCY_KEY_TTL_HOURS", DEFAULT_TTL_HOURS)
+    return timezone.now() - timedelta(hours=hours)
+
+
+def prune(force=False):
+    global _last_prune
+    now = time.monotonic()
+    if not force and now - _last_prune < PRUNE_EVERY_SECONDS:
+        return 0
+    _last_prune = now
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=_cutoff()).delete()
+    return deleted
+
+
+def _original(claim):
+    sales = Sale.objects.for_listing().in_bulk(claim.sale_ids)
+    return [sales[pk] for pk in claim.sale_ids if pk in sales]
+
+
+def run(user, key, place):
+    """``place()`` once per ``key``: ``(sales, replayed)``, where a repeated key returns the first call's sales."""
+    if key is None:
+        return place(), False
+
+    with transaction.atomic():
+        # An expired claim of the same key no longer counts
+        IdempotencyKey.objects.filter(user=user, key=key, created_at__lt=_cutoff()).delete()
+        try:
+            with transaction.atomic():
+                claim = IdempotencyKey.objects.create(user=user, key=key)
+        except IntegrityError:
+            # Claimed before; a concurrent first request has committed by now (the unique index waits for it)
+            claim = IdempotencyKey.objects.get(user=user, key=key)
+            return _original(claim), True
+
+        sales = place()
+        claim.sale_ids = [sale.pk for sale in sales]
+        claim.save(update_fields=["sale_ids"])
+    prune()
+    return sales, False
@@ -0,0 +1,291 @@
+# myapp/ingest.py
+"""Bulk import of bank-statement / ledger files into ``Expense`` rows."""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from openpyxl import load_workbook
+
+from . import ledger
+from .models import Expense
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# File columns -> model fields
+# --------------------------
+COLUMN_MAP = {
+    'R. No': 'receipt_no',
+    'Date': 'date',
+    'Paid To': 'paid_to',
+    'Charges A/c': 'charges_account',
+    'Description': 'description',
+    'Received Amnt': 'received_amount',
+    'Bank charges': 'bank_charges',
+    'Amount Paid': 'amount_paid',
+    'C. Balance': 'cumulative_balance',
+}
+
+DECIMAL_FIELDS = ('received_amount', 'bank_charges', 'amount_paid', 'cumulative_balance')
+TEXT_FIELDS = ('receipt_no', 'paid_to', 'charges_account', 'description')
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def get_batch_size():
+    return getattr(settings, "EXPENSE_IMPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def get_chunk_size():
+    return getattr(settings, "EXPENSE_IMPORT_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+@dataclass
+class IngestResult:
+    created: int = 0
+    skipped: int = 0
+    rows: int = 0
+    chunks: int = 0
+    earliest_date: date = None
+    timings: dict = field(default_factory=dict)
+
+    def add_timing(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def saw_date(self, day):
+        if day is not None and (self.earliest_date is None or day < self.earliest_date):
+            self.earliest_date = day
+
+
+# --------------------------
+# Reading
+# --------------------------
+def read_expense_file(uploaded_file):
+    """Read an uploaded CSV or Excel file into a single DataFrame."""
+    if uploaded_file.name.endswith('.csv'):
+        df = pd.read_csv(uploaded_file)
+    else:
+        df = pd.read_excel(uploaded_file)
+    return clean_columns(df)
+
+
+def clean_columns(df):
+    df.columns = df.columns.astype(str).str.replace('\xa0', ' ').str.strip()
+    return df
+
+
+def iter_expense_chunks(uploaded_file, chunk_size=None):
+    """Yield the uploaded file as DataFrames of at most ``chunk_size`` rows (legacy ``.xls`` is read whole)."""
+    chunk_size = chunk_size or get_chunk_size()
+    name = uploaded_file.name.lower()
+    if name.endswith('.csv'):
+        for chunk in pd.read_csv(uploaded_file, chunksize=chunk_size):
+            yield clean_columns(chunk)
+    elif name.endswith('.xls'):
+        df = read_expense_file(uploaded_file)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        yield from _iter_excel_chunks(uploaded_file, chunk_size)
+
+
+def _iter_excel_chunks(uploaded_file, chunk_size):
+    wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = ["" if c is None else str(c) for c in header]
+        width = len(columns)
+
+        batch = []
+        for row in rows:
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            if all(v is None for v in row):
+                continue
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield clean_columns(pd.DataFrame(batch, columns=columns))
+                batch = []
+        if batch:
+            yield clean_columns(pd.DataFrame(batch, columns=columns))
+    finally:
+        wb.close()
+
+
+# --------------------------
+# Normalisation (vectorized)
+# --------------------------
+def _text_column(series):
+    text = series.astype(object)
+    return text.where(series.notna(), None).map(lambda v: v if v is None else str(v))
+
+
+def _date_column(series):
+    # dd/mm/yyyy is read day first; ISO dates (and Excel date cells) already are year-month-day
+    text = series.astype(str).str.strip()
+    iso = text.str.match(r'\d{4}-\d{1,2}-\d{1,2}')
+    day_first = pd.to_datetime(series.where(~iso), dayfirst=True, format='mixed', errors='coerce')
+    year_first = pd.to_datetime(text.where(iso), format='ISO8601', errors='coerce')
+    return day_first.where(~iso, year_first)
+
+
+def _blank(series):
+    return series.isna() | series.astype(str).str.strip().eq('')
+
+
+def normalize_expense_frame(df):
+    """``(frame, skipped)``: the valid rows of ``df`` as model-field columns, and how many were dropped."""
+    missing = pd.Series([None] * len(df), index=df.index, dtype=object)
+    out = pd.DataFrame(index=df.index)
+
+    for csv_col, model_field in COLUMN_MAP.items():
+        column = df[csv_col] if csv_col in df.columns else missing
+        if model_field in DECIMAL_FIELDS:
+            out[model_field] = pd.to_numeric(column, errors='coerce').round(2)
+        elif model_field == 'date':
+            out[model_field] = _date_column(column)
+        else:
+            out[model_field] = column
+
+    # Skip rows with missing required fields
+    valid = (
+        out['amount_paid'].notna() & out['amount_paid'].ne(0)
+        & out['date'].notna()
+        & ~_blank(out['paid_to'])
+    )
+    out = out[valid]
+
+    for model_field in TEXT_FIELDS:
+        out[model_field] = _text_column(out[model_field])
+    out['description'] = out['description'].where(out['description'].notna(), '')  # NOT NULL
+    out['date'] = out['date'].dt.date
+    for model_field in DECIMAL_FIELDS:
+        column = out[model_field].astype(object)
+        out[model_field] = column.where(out[model_field].notna(), None)
+
+    return out, int((~valid).sum())
+
+
+# --------------------------
+# Writing
+# --------------------------
+def write_expenses(frame, batch_size=None):
+    """Insert a normalised frame with ``bulk_create`` in ``batch_size`` chunks."""
+    batch_size = batch_size or get_batch_size()
+    fields = list(COLUMN_MAP.values())
+    created = 0
+    for start in range(0, len(frame), batch_size):
+        chunk = frame.iloc[start:start + batch_size]
+        objs = [
+            Expense(**dict(zip(fields, values)))
+            for values in chunk[fields].itertuples(index=False, name=None)
+        ]
+        Expense.objects.bulk_create(objs, batch_size=batch_size)
+        created += len(objs)
+    return created
+
+
+def _ingest_chunk(result, df, batch_size):
+    started = time.perf_counter()
+    frame, skipped = normalize_expense_frame(df)
+    result.add_timing('normalize', time.perf_counter() - started)
+
+    started = time.perf_counter()
+    created = write_expenses(frame, batch_size)
+    result.add_timing('write', time.perf_counter() - started)
+
+    result.created += created
+    result.skipped += skipped
+    result.rows += len(df)
+    result.chunks += 1
+    if created:
+        result.saw_date(frame['date'].min())
+
+
+def _recalculate_balances(result):
+    # bulk_create skips the Expense signals, so rebalance once from the earliest new row
+    if result.earliest_date is not None:
+        started = time.perf_counter()
+        ledger.recalculate_from(result.earliest_date)
+        result.add_timing('balances', time.perf_counter() - started)
+
+
+def ingest_expenses(df, batch_size=None):
+    """Normalise ``df`` and write it inside a single transaction."""
+    result = IngestResult()
+    with transaction.atomic():
+        _ingest_chunk(result, df, batch_size)
+        _recalculate_balances(result)
+    return result
+
+
+def ingest_expense_chunks(chunks, batch_size=None, on_progress=None, atomic=True, skip_rows=0):
+    """
+    Normalise and write every DataFrame from ``chunks``, after skipping ``skip_rows`` rows; one
+    transaction in all with ``atomic=True``, else one per chunk (``on_progress(result)`` runs in it).
+    """
+    result = IngestResult()
+    chunks = _skip(chunks, skip_rows)
+    if atomic:
+        with transaction.atomic():
+            _ingest_all(result, chunks, batch_size, on_progress)
+            _recalculate_balances(result)
+        return result
+    try:
+        _ingest_all(result, chunks, batch_size, on_progress)
+    finally:
+        # The chunks written before a failing one stay committed: rebalance them too
+        _recalculate_balances(result)
+    return result
+
+
+def _skip(chunks, rows):
+    for df in chunks:
+        if rows >= len(df):
+            rows -= len(df)
+            continue
+        yield df.iloc[rows:]
+        rows = 0
+
+
+def _ingest_all(result, chunks, batch_size, on_progress):
+    chunks = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        df = next(chunks, None)
+        result.add_timing('read', time.perf_counter() - started)
+        if df is None:
+            return
+
+        with transaction.atomic():
+            _ingest_chunk(result, df, batch_size)
+            if on_progress is not None:
+                on_progress(result)
+        logger.debug(
+            "Expense import chunk %s: rows=%s created=%s skipped=%s",
+            result.chunks, result.rows, result.created, result.skipped,
+        )
+
+
+def import_expense_file(uploaded_file, batch_size=None, chunk_size=None,
+                        on_progress=None, atomic=True, skip_rows=0):
+    """Stream, normalise and write an uploaded file, timing every stage."""
+    result = ingest_expense_chunks(
+        iter_expense_chunks(uploaded_file, chunk_size),
+        batch_size=batch_size,
+        on_progress=on_progress,
+        atomic=atomic,
+        skip_rows=skip_rows,
+    )
+    logger.info(
+        "Expense import: created=%s skipped=%s timings=%s",
+        result.created, result.skipped, result.timings,
+    )
+    return result
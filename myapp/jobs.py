@@ -0,0 +1,145 @@
+# myapp/jobs.py
+"""
+Background expense imports.
+
+Uploads are stored on an ``ImportJob`` row and processed by a small in-process
+thread pool, so the upload request returns straight away. The table is the
+queue: ``python manage.py process_import_jobs`` drains anything still pending
+(e.g. after a restart) from a separate worker process, first re-queueing
+running jobs whose worker stopped reporting progress.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ledger
+from .ingest import import_expense_file
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_STALE_SECONDS = 900
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, "IMPORT_JOB_WORKERS", DEFAULT_WORKERS)
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import-job")
+    return _executor
+
+
+def enqueue_import(uploaded_file, user=None):
+    """Store ``uploaded_file`` on a new pending job and schedule it."""
+    job = ImportJob(
+        user=user if user is not None and user.is_authenticated else None,
+        original_name=uploaded_file.name,
+    )
+    job.file.save(uploaded_file.name, uploaded_file, save=False)
+    job.save()
+
+    if getattr(settings, "IMPORT_JOBS_EAGER", False):
+        run_import_job(job.pk)
+        job.refresh_from_db()
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def claim_job(pk):
+    """Atomically move a pending job to running; False if someone else has it."""
+    now = timezone.now()
+    return ImportJob.objects.filter(pk=pk, status=ImportJob.PENDING).update(
+        status=ImportJob.RUNNING, started_at=now, heartbeat_at=now
+    ) == 1
+
+
+def requeue_stale_jobs():
+    """Put running jobs back to pending once their worker has been silent too long; returns how many."""
+    seconds = getattr(settings, "IMPORT_JOB_STALE_SECONDS", DEFAULT_STALE_SECONDS)
+    cutoff = timezone.now() - timedelta(seconds=seconds)
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    count = ImportJob.objects.filter(stale, status=ImportJob.RUNNING).update(status=ImportJob.PENDING)
+    if count:
+        logger.warning("Re-queued %s import job(s) left running by a stopped worker", count)
+    return count
+
+
+def run_import_job(pk):
+    if not claim_job(pk):
+        return
+    job = ImportJob.objects.get(pk=pk)
+    # Re-claimed from a stopped worker: its committed chunks are counted, carry on after them
+    done_rows, done_created, done_skipped = job.rows_processed, job.created_rows, job.skipped_rows
+
+    def on_progress(result):
+        # Runs inside the chunk's transaction, so the counts match what is committed
+        ImportJob.objects.filter(pk=pk).update(
+            rows_processed=done_rows + result.rows,
+            created_rows=done_created + result.created,
+            skipped_rows=done_skipped + result.skipped,
+            heartbeat_at=timezone.now(),
+        )
+
+    try:
+        with job.file.open("rb") as fh:
+            # Commit per chunk so progress is visible and the lock is short-lived
+            result = import_expense_file(fh, on_progress=on_progress, atomic=False, skip_rows=done_rows)
+    except Exception as e:
+        logger.exception("Import job %s failed", pk)
+        ImportJob.objects.filter(pk=pk).update(
+            status=ImportJob.FAILED, error=str(e), finished_at=timezone.now()
+        )
+        return
+    finally:
+        if done_rows:
+            ledger.recalculate_from(None)  # the stopped worker never rebalanced its chunks
+
+    ImportJob.objects.filter(pk=pk).update(
+        status=ImportJob.DONE,
+        rows_processed=done_rows + result.rows,
+        created_rows=done_created + result.created,
+        skipped_rows=done_skipped + result.skipped,
+        finished_at=timezone.now(),
+    )
+    job.file.delete(save=False)
+
+
+def _run_in_thread(pk):
+    close_old_connections()
+    try:
+        run_import_job(pk)
+    finally:
+        connections.close_all()
+
+
+def process_pending_jobs():
+    """Run every pending job (and stale running one) in the calling thread; returns how many ran."""
+    requeue_stale_jobs()
+    count = 0
+    pending = ImportJob.objects.filter(status=ImportJob.PENDING).order_by("id")
+    for pk in list(pending.values_list("pk", flat=True)):
+        run_import_job(pk)
+        count += 1
+    return count
+
+
+def job_status(job):
+    return {
+        "id": job.pk,
+        "status": job.status,
+        "file": job.original_name,
+        "rows_processed": job.rows_processed,
+        "created": job.created_rows,
+        "skipped": job.skipped_rows,
+        "error": job.error,
+        "finished": job.status in (ImportJob.DONE, ImportJob.FAILED),
+    }
@@ -0,0 +1,108 @@
+# myapp/ledger.py
+"""
+Running balance for ``Expense.cumulative_balance``.
+
+The balance of a row is the running sum of
+``received_amount - bank_charges - amount_paid`` in ``(date, receipt_no, id)``
+order. A change only affects rows from its date onwards, so recalculation
+starts from the earliest changed date: the opening balance is the stored
+balance of the last earlier row and a SQL window function produces the rest.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Sum, Value, Window
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import dashboard_cache
+from .hooks import suspended
+from .models import Expense
+
+BATCH_SIZE = 1000
+
+MONEY = DecimalField(max_digits=14, decimal_places=2)
+ZERO = Value(Decimal("0"), output_field=MONEY)
+
+# Ledger order; NULL receipt numbers first on every backend
+ORDER = [F("date").asc(), F("receipt_no").asc(nulls_first=True), F("id").asc()]
+REVERSE_ORDER = [F("date").desc(), F("receipt_no").desc(nulls_last=True), F("id").desc()]
+
+DELTA = (
+    Coalesce("received_amount", ZERO)
+    - Coalesce("bank_charges", ZERO)
+    - Coalesce("amount_paid", ZERO)
+)
+
+
+def opening_balance(start):
+    """Stored balance of the last row dated before ``start`` (0 if none)."""
+    balance = (
+        Expense.objects.filter(date__lt=start)
+        .order_by(*REVERSE_ORDER)
+        .values_list("cumulative_balance", flat=True)
+        .first()
+    )
+    return balance or Decimal("0")
+
+
+def recalculate_from(start=None):
+    """
+    Recompute balances for every row dated ``start`` or later (all rows if None).
+
+    Returns the number of rows whose stored balance changed.
+    """
+    rows = Expense.objects.all()
+    opening = Decimal("0")
+    if start is not None:
+        rows = rows.filter(date__gte=start)
+        opening = opening_balance(start)
+
+    running = rows.annotate(
+        running=Window(Sum(DELTA, output_field=MONEY), order_by=ORDER)
+    ).order_by(*ORDER).values_list("id", "cumulative_balance", "running")
+
+    with transaction.atomic():
+        # Read first, then write: SQLite gives no isolation between a cursor
+        # and updates to the same table on one connection.
+        changed = []
+        now = timezone.now()  # bulk_update skips auto_now
+        for pk, stored, total in running.iterator(chunk_size=BATCH_SIZE):
+            balance = (opening + Decimal(total or 0)).quantize(Decimal("0.01"))
+            if stored != balance:
+                changed.append(Expense(pk=pk, cumulative_balance=balance, updated_at=now))
+        Expense.objects.bulk_update(changed, ["cumulative_balance", "updated_at"], batch_size=BATCH_SIZE)
+    # Also covers the bulk import/delete paths, which always end here
+    dashboard_cache.bump("expenses")
+    return len(changed)
+
+
+def as_date(value):
+    """Expense.date as a ``date`` (views may assign the raw POST string)."""
+    return Expense._meta.get_field("date").to_python(value)
+
+
+def delete_expenses(expenses, rebalance=True):
+    """
+    Delete an Expense queryset and recalculate once from its earliest date.
+
+    With ``rebalance=False`` the caller recalculates (``myapp/bulk.py`` does
+    it once after all its batches).
+    """
+    with transaction.atomic():
+        earliest = expenses.order_by("date").values_list("date", flat=True).first()
+        with suspended():
+            deleted = expenses.delete()
+        if rebalance and earliest is not None:
+            recalculate_from(earliest)
+    return deleted
+
+
+def archive_expenses(expenses, rebalance=True):
+    """``delete_expenses``, but the rows are flagged ``archived`` instead (they leave the ledger)."""
+    with transaction.atomic():
+        earliest = expenses.order_by("date").values_list("date", flat=True).first()
+        archived = expenses.update(archived=True)
+        if rebalance and earliest is not None:
+            recalculate_from(earliest)
+    return archived
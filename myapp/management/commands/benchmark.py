@@ -0,0 +1,106 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from myapp.benchmarks import DEFAULT_TOLERANCE, SCENARIOS, compare, environment, run_benchmarks, seed
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic sales/expenses and time the dashboards, the report, the Excel "
+        "exports and the expense upload. Prints latency percentiles, query counts and "
+        "peak memory; --output stores them as JSON and --baseline compares against an "
+        "earlier file (exit status 1 on a regression). Everything runs in one "
+        "transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sales", type=int, default=5000)
+        parser.add_argument("--expenses", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=365, help="Spread of the synthetic dates.")
+        parser.add_argument("--repeat", type=int, default=10, help="Timed runs per scenario.")
+        parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per scenario.")
+        parser.add_argument("--upload-rows", type=int, default=500, help="Rows in each uploaded file.")
+        parser.add_argument("--scenario", action="append", dest="scenarios", choices=SCENARIOS,
+                            help="Only run this scenario; repeatable.")
+        parser.add_argument("--cached", action="store_true",
+                            help="Let the dashboard cache serve repeat runs (default: measure uncached renders).")
+        parser.add_argument("--output", help="Write the results to this JSON file.")
+        parser.add_argument("--media-dir",
+                            help="Keep uploaded and rendered files here (default: a temporary directory, removed).")
+        parser.add_argument("--baseline", help="JSON file from an earlier --output run to compare against.")
+        parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                            help="Allowed p50 growth before a scenario counts as a regression (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        report = {}
+        try:
+            with transaction.atomic():
+                report = self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        self._print(report["results"])
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline is not None:
+            rows, regressions = compare(report["results"], baseline["results"], options["tolerance"])
+            self._print_comparison(rows)
+            if regressions:
+                raise CommandError(f"Slower than the baseline: {', '.join(regressions)}")
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def _run(self, options):
+        volumes = {key: options[key] for key in ("sales", "expenses", "days", "upload_rows")}
+        self.stdout.write(f"Seeding {options['sales']} sales and {options['expenses']} expenses...")
+        seed(options["sales"], options["expenses"], options["days"])
+        results = run_benchmarks(
+            options["scenarios"],
+            repeat=options["repeat"],
+            warmup=options["warmup"],
+            cached=options["cached"],
+            upload_rows=options["upload_rows"],
+            media_dir=options["media_dir"],
+        )
+        return {
+            "environment": environment(),
+            "volumes": volumes,
+            "cached": options["cached"],
+            "results": results,
+        }
+
+    def _print(self, results):
+        self.stdout.write("")
+        self.stdout.write(
+            f"{'scenario':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}"
+            f"{'queries':>9}{'peak KB':>10}{'status':>8}"
+        )
+        for name, r in results.items():
+            self.stdout.write(
+                f"{name:<22}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}"
+                f"{r['queries']:>9}{r['peak_kb']:>10.0f}{','.join(map(str, r['status'])):>8}"
+            )
+
+    def _print_comparison(self, rows):
+        self.stdout.write("")
+        self.stdout.write(f"{'scenario':<22}{'base p50':>10}{'p50':>10}{'ratio':>8}{'queries':>12}")
+        for row in rows:
+            line = (
+                f"{row['scenario']:<22}{row['baseline_p50_ms']:>10.1f}{row['p50_ms']:>10.1f}"
+                f"{row['ratio'] or 0:>8.2f}{row['baseline_queries']:>6} -> {row['queries']:<3}"
+            )
+            self.stdout.write(self.style.ERROR(line) if row["regressed"] else line)
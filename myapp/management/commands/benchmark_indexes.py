@@ -0,0 +1,103 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from myapp.models import Expense, Sale
+from myapp.seed import seed_expenses, seed_sales, seed_users
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic sales/expenses and compare query plans and timings of the "
+        "hot report queries with and without the hot-path indexes. Everything runs "
+        "in one transaction that is rolled back, so the database is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sales", type=int, default=200000)
+        parser.add_argument("--expenses", type=int, default=50000)
+        parser.add_argument("--days", type=int, default=730, help="Spread of the synthetic dates.")
+        parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the best is reported.")
+        parser.add_argument("--no-plans", action="store_true", help="Only print timings.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        self.stdout.write(f"Seeding {options['sales']} sales and {options['expenses']} expenses...")
+        users = seed_users()
+        seed_sales(options["sales"], days=options["days"], users=users)
+        seed_expenses(options["expenses"], days=options["days"])
+        if connection.vendor == "sqlite":
+            connection.cursor().execute("ANALYZE")
+
+        queries = self._queries(users[0])
+        with_idx = self._measure(queries, options)
+
+        # Plain DROP INDEX keeps this inside the rolled-back transaction
+        with connection.cursor() as cursor:
+            for model in (Sale, Expense):
+                for index in model._meta.indexes:
+                    cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+        without_idx = self._measure(queries, options)
+
+        self.stdout.write("")
+        self.stdout.write(f"{'query':<28}{'no index (ms)':>16}{'indexed (ms)':>16}{'speed-up':>10}")
+        for name in queries:
+            before, after = without_idx[name], with_idx[name]
+            self.stdout.write(
+                f"{name:<28}{before * 1000:>16.2f}{after * 1000:>16.2f}{before / after if after else 0:>9.1f}x"
+            )
+
+    def _queries(self, user):
+        now = timezone.now()
+        month_ago = now - timedelta(days=30)
+        return {
+            "sales_report (30 days)": lambda: Sale.objects.filter(date__gte=month_ago, date__lte=now).order_by("date"),
+            "cash sales (30 days)": lambda: Sale.objects.filter(
+                date__gte=month_ago, date__lte=now, payment_method="Cash"
+            ),
+            "deliveries (30 days)": lambda: Sale.objects.filter(payment_status="Delivery", date__gte=month_ago),
+            "user sales (30 days)": lambda: Sale.objects.filter(user=user, date__gte=month_ago).order_by("date"),
+            "expenses by receipt": lambda: Expense.objects.order_by("-receipt_no")[:100],
+            "expenses by date": lambda: Expense.objects.order_by("date")[:100],
+        }
+
+    def _measure(self, queries, options):
+        label = "with" if Sale._meta.indexes[0].name in self._index_names() else "without"
+        results = {}
+        for name, make in queries.items():
+            if not options["no_plans"]:
+                self.stdout.write(f"\n[{label} indexes] {name}\n{self._explain(make(), label)}")
+            best = None
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                list(make().values_list("pk", flat=True))
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results[name] = best
+        return results
+
+    def _explain(self, queryset, tag):
+        # The tag keeps SQLite from reusing the plan cached before the DROP INDEX
+        sql, params = queryset.query.get_compiler(connection=connection).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql} /* {tag} */", params)
+            return "\n".join(" ".join(str(col) for col in row) for row in cursor.fetchall())
+
+    def _index_names(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Sale._meta.db_table)
+        return set(constraints)
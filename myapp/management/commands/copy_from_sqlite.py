@@ -0,0 +1,171 @@
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Max
+from django.db.utils import ConnectionDoesNotExist, load_backend
+
+from myapp import ledger, partitions, summary
+from myapp.hooks import suspended
+from myapp.models import ArchivedExpense, ArchivedSale, DailySalesSummary, Expense, Product, Sale, SalePartition
+
+SOURCE_ALIAS = "sqlite_source"
+
+
+def open_source(path):
+    """
+    Connect to the SQLite file ``path`` as ``SOURCE_ALIAS``. The connection
+    is added next to ``DATABASES``, not to it, so nothing else (migrations,
+    the test runner) treats it as one of the project's databases.
+    """
+    settings_dict = connections.configure_settings({
+        "default": connections.settings["default"],
+        SOURCE_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path)},
+    })[SOURCE_ALIAS]
+    connections[SOURCE_ALIAS] = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, SOURCE_ALIAS)
+    return connections[SOURCE_ALIAS]
+
+
+def close_source():
+    try:
+        source = connections[SOURCE_ALIAS]
+    except ConnectionDoesNotExist:
+        return
+    source.close()
+    del connections[SOURCE_ALIAS]
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy users, sales and expenses from a SQLite database file into the configured "
+        "database (e.g. PostgreSQL with DJANGO_DB_ENGINE=postgres), in bulk and keeping "
+        "primary keys. Run `migrate` on both databases first. Products are matched by name; "
+        "the daily sales rollup and expense balances are rebuilt afterwards. Archived rows, "
+        "the cold archive tables and the monthly sale partitions come along; group and "
+        "permission assignments do not."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Path to the SQLite database file to copy from.")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows read and inserted at a time.")
+        parser.add_argument("--replace", action="store_true",
+                            help="Delete the users, sales and expenses already in the target first.")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"]).resolve()
+        if not source.is_file():
+            raise CommandError(f"No SQLite database at {source}")
+        target = connections["default"]
+        if target.vendor == "sqlite" and Path(str(target.settings_dict["NAME"])).resolve() == source:
+            raise CommandError("The source is the configured database itself.")
+
+        self.batch_size = options["batch_size"]
+        open_source(source)
+        try:
+            # Partition tables first: DDL cannot run inside the copy's transaction on SQLite
+            self.months = list(SalePartition.objects.using(SOURCE_ALIAS).values_list("month", flat=True))
+            for month in self.months:
+                partitions.create_table(month)
+            with transaction.atomic():
+                counts = self._copy_all(options["replace"])
+        except DatabaseError as exc:
+            raise CommandError(f"Copy failed, nothing was written: {exc}") from exc
+        finally:
+            close_source()
+
+        self.stdout.write(self.style.SUCCESS(
+            "Copied " + ", ".join(f"{count} {name}" for name, count in counts.items())
+            + f" from {source} to {target.vendor}."
+        ))
+
+    def _copy_all(self, replace):
+        if replace:
+            with suspended():
+                DailySalesSummary.objects.all().delete()
+                for month in SalePartition.objects.values_list("month", flat=True):
+                    partitions.create_table(month)._base_manager.all().delete()
+                for model in (Sale, Expense, ArchivedSale, ArchivedExpense, SalePartition):
+                    model._base_manager.all().delete()  # archived rows too
+                User.objects.all().delete()
+        elif (User.objects.exists() or Sale.all_objects.exists() or Expense.all_objects.exists()
+              or SalePartition.objects.exists()):
+            raise CommandError("The target database already has users, sales or expenses; use --replace.")
+
+        products = self._product_ids()
+        with_product = lambda row: {**row, "product_id": products.get(row["product_id"])}
+        counts = {
+            "users": self._copy(User),
+            "sales": self._copy(Sale, with_product),
+            "expenses": self._copy(Expense),
+            "archived sales": self._copy(ArchivedSale, with_product),
+            "archived expenses": self._copy(ArchivedExpense),
+        }
+        # Rolled-over months: the summary rebuild below reads them through partitions.route
+        self._copy(SalePartition)
+        counts["partitioned sales"] = sum(
+            self._copy(partitions.partition_model(month), with_product) for month in self.months
+        )
+
+        # Inserted with explicit ids: move the sequences past them (no-op on SQLite)
+        target = connections["default"]
+        with target.cursor() as cursor:
+            for sql in target.ops.sequence_reset_sql(no_style(), [User, Sale, Expense, SalePartition]):
+                cursor.execute(sql)
+        self._reserve_partition_ids(target)
+
+        summary.rebuild()
+        ledger.recalculate_from(None)
+        return counts
+
+    def _reserve_partition_ids(self, target):
+        """New sales must not reuse the ids of rolled-over ones (``partitions.find``)."""
+        top = SalePartition.objects.aggregate(top=Max("max_id"))["top"]
+        if top is None:
+            return
+        table = Sale._meta.db_table
+        with target.cursor() as cursor:
+            if target.vendor == "postgresql":
+                cursor.execute(
+                    f"SELECT setval(pg_get_serial_sequence(%s, 'id'), "
+                    f"GREATEST(%s, (SELECT COALESCE(MAX(id), 1) FROM {target.ops.quote_name(table)})))",
+                    [table, top],
+                )
+            elif target.vendor == "sqlite":
+                cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, %s) WHERE name = %s", [top, table])
+                if not cursor.rowcount:
+                    cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, top])
+
+    def _product_ids(self):
+        """``{source product id: target product id}``, creating products missing in the target."""
+        by_name = dict(Product.objects.values_list("name", "id"))
+        mapping = {}
+        fields = [f.attname for f in Product._meta.concrete_fields if f.attname != "id"]
+        for source_id, *values in Product.objects.using(SOURCE_ALIAS).values_list("id", *fields):
+            row = dict(zip(fields, values))
+            if row["name"] not in by_name:
+                by_name[row["name"]] = Product.objects.create(**row).id
+            mapping[source_id] = by_name[row["name"]]
+        return mapping
+
+    def _copy(self, model, transform=None):
+        """Stream ``model`` rows from the source in pk order and bulk insert them."""
+        fields = [f.attname for f in model._meta.concrete_fields]
+        rows = (
+            model._base_manager.using(SOURCE_ALIAS)
+            .order_by("pk")
+            .values_list(*fields)
+            .iterator(chunk_size=self.batch_size)
+        )
+        batch, copied = [], 0
+        for values in rows:
+            row = dict(zip(fields, values))
+            batch.append(model(**(transform(row) if transform else row)))
+            if len(batch) >= self.batch_size:
+                copied += len(model._base_manager.bulk_create(batch))
+                batch = []
+        if batch:
+            copied += len(model._base_manager.bulk_create(batch))
+        self.stdout.write(f"  {model._meta.verbose_name_plural}: {copied}")
+        return copied
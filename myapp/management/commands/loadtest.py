@@ -0,0 +1,117 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp.perf import percentile
+
+DEFAULT_PATHS = [
+    "/sales-report/",
+    "/admin-dashboard/totals/",
+    "/admin-sales-excel/",
+    "/admin-dashboard/expenses-excel/",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire concurrent requests at running deployments of this project and compare "
+        "throughput and latency per path, e.g. the WSGI and the ASGI server:\n"
+        "  gunicorn sales_system.wsgi -b :8000 -w 1 --threads 8\n"
+        "  uvicorn sales_system.asgi:application --port 8001\n"
+        "  manage.py loadtest --target wsgi=http://127.0.0.1:8000 "
+        "--target asgi=http://127.0.0.1:8001 --username admin --password ..."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, metavar="NAME=URL",
+                            help="Deployment to test; repeat to compare several.")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help=f"Path to request; repeatable (default: {', '.join(DEFAULT_PATHS)}).")
+        parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per path and target.")
+        parser.add_argument("--username", help="Superuser to log in as (the report views need a login).")
+        parser.add_argument("--password", default="")
+        parser.add_argument("--timeout", type=float, default=60)
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, sep, url = target.partition("=")
+            if not sep or not url:
+                raise CommandError(f"--target must look like NAME=URL, got {target!r}")
+            targets.append((name, url.rstrip("/") + "/"))
+
+        results = []
+        for name, base in targets:
+            cookies = self._login(base, options) if options["username"] else {}
+            for path in options["paths"] or DEFAULT_PATHS:
+                result = self._run(urljoin(base, path.lstrip("/")), cookies, options)
+                results.append({"target": name, "path": path, **result})
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(
+            f"{'target':<8}{'path':<34}{'ok':>6}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"
+        )
+        for r in results:
+            self.stdout.write(
+                f"{r['target']:<8}{r['path']:<34}{r['ok']:>6}{r['errors']:>8}{r['rps']:>9.1f}"
+                f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['max_ms']:>9.1f}"
+            )
+
+    def _login(self, base, options):
+        session = requests.Session()
+        login_url = urljoin(base, "login/")
+        session.get(login_url, timeout=options["timeout"])
+        response = session.post(login_url, timeout=options["timeout"], allow_redirects=False, data={
+            "username": options["username"],
+            "password": options["password"],
+            "csrfmiddlewaretoken": session.cookies.get("csrftoken", ""),
+        }, headers={"Referer": login_url})
+        if "sessionid" not in session.cookies:
+            raise CommandError(f"Login to {base} failed (HTTP {response.status_code})")
+        return session.cookies.get_dict()
+
+    def _run(self, url, cookies, options):
+        local = threading.local()
+
+        def fetch(_):
+            if not hasattr(local, "session"):
+                local.session = requests.Session()
+                local.session.cookies.update(cookies)
+            started = time.perf_counter()
+            try:
+                with local.session.get(url, timeout=options["timeout"], stream=True, allow_redirects=False) as response:
+                    size = sum(len(chunk) for chunk in response.iter_content(65536))
+                    ok = response.status_code == 200
+            except requests.RequestException:
+                ok, size = False, 0
+            return ok, time.perf_counter() - started, size
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            outcomes = list(pool.map(fetch, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(seconds * 1000 for ok, seconds, _ in outcomes if ok)
+        ok = len(latencies)
+
+        return {
+            "ok": ok,
+            "errors": len(outcomes) - ok,
+            "seconds": round(elapsed, 3),
+            "rps": ok / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "max_ms": latencies[-1] if latencies else 0.0,
+            "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+            "bytes": sum(size for _, _, size in outcomes),
+        }
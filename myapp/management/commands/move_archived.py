@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from myapp.bulk import batches, get_batch_size
+from myapp.hooks import suspended
+from myapp.models import LIVE, ArchivedExpense, ArchivedSale, Expense, Sale
+
+
+class Command(BaseCommand):
+    help = (
+        "Move archived sales and expenses out of the hot tables into ArchivedSale / "
+        "ArchivedExpense, in batches (one transaction each), keeping their ids. "
+        "Archived rows are already out of the rollup and the ledger, so nothing is recalculated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help=f"Rows moved per transaction (default BULK_BATCH_SIZE, {get_batch_size()}).")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"] or get_batch_size()
+        moved = {
+            "sales": self._move(Sale, ArchivedSale, batch_size),
+            "expenses": self._move(Expense, ArchivedExpense, batch_size),
+        }
+        self.stdout.write(self.style.SUCCESS(
+            "Moved " + ", ".join(f"{count} archived {name}" for name, count in moved.items()) + " to cold storage."
+        ))
+
+    def _move(self, model, cold_model, batch_size):
+        """Copy then delete ``model``'s archived rows, walking ``*_archived_idx`` by id."""
+        fields = [f.attname for f in cold_model._meta.concrete_fields if f.attname != "moved_at"]
+        archived = model.all_objects.filter(~LIVE)
+        moved = 0
+        for chunk in batches(archived, batch_size=batch_size):
+            with transaction.atomic():
+                rows = archived.filter(pk__in=chunk).values(*fields)
+                cold_model.objects.bulk_create([cold_model(**row) for row in rows])
+                with suspended():
+                    archived.filter(pk__in=chunk).delete()
+            moved += len(chunk)
+        return moved
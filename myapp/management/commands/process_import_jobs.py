@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from myapp.jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Process pending expense import jobs, re-queueing running ones whose worker stopped "
+        "reporting progress (use --loop to keep polling)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls.")
+
+    def handle(self, *args, **options):
+        while True:
+            count = process_pending_jobs()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f"Processed {count} import job(s)."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from myapp.summary import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the DailySalesSummary rollup from the Sale table (optionally for a date range)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Last day to rebuild (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        dates = {}
+        for name in ("start", "end"):
+            value = options[name]
+            dates[name] = parse_date(value) if value else None
+            if value and dates[name] is None:
+                raise CommandError(f"Invalid --{name} date: {value}")
+
+        deleted, created = rebuild(dates["start"], dates["end"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt daily sales summary: removed {deleted} row(s), wrote {created} row(s)."
+        ))
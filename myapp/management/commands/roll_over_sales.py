@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from myapp.bulk import get_batch_size
+from myapp.partitions import cutoff, get_keep_months, roll_over, table_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Move live sales older than the kept months out of myapp_sale into monthly partition "
+        "tables (myapp_sale_YYYY_MM), in batches. Run it once a month, e.g. on the 1st. "
+        "Totals are unaffected: the daily rollup keeps the moved sales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-months", type=int, default=None,
+                            help=f"Months kept in the hot table, current one included "
+                                 f"(default SALE_PARTITION_KEEP_MONTHS, {get_keep_months()}).")
+        parser.add_argument("--today", help="Roll over as of this day (YYYY-MM-DD) instead of today.")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help=f"Rows moved per transaction (default BULK_BATCH_SIZE, {get_batch_size()}).")
+
+    def handle(self, *args, **options):
+        today = None
+        if options["today"]:
+            today = parse_date(options["today"])
+            if today is None:
+                raise CommandError(f"Invalid --today date: {options['today']}")
+        if options["keep_months"] is not None and options["keep_months"] < 1:
+            raise CommandError("--keep-months must be at least 1.")
+
+        moved = roll_over(today, options["keep_months"], options["batch_size"])
+        for month, count in moved.items():
+            self.stdout.write(f"  {table_name(month)}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled over {sum(moved.values())} sale(s) in {len(moved)} month(s); "
+            f"myapp_sale now starts at {cutoff(today, options['keep_months'])}."
+        ))
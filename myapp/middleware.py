@@ -0,0 +1,108 @@
+# myapp/middleware.py
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from . import perf
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_MS = 1000
+
+
+class PerformanceMiddleware:
+    """
+    Time every request: wall time, DB time, query count and response size.
+
+    Adds a ``Server-Timing`` header (``app`` and ``db``), logs requests slower
+    than ``PERF_SLOW_REQUEST_MS`` with their slowest queries, and records the
+    numbers per URL name in ``perf.STATS``. Streaming responses are recorded
+    when the last chunk has been sent; their header only covers the view.
+    Server-sent event streams are long-lived by design and not recorded.
+    Put it first in ``MIDDLEWARE`` so it measures the other middleware too.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        sample, token = perf.start_sample()
+        try:
+            response = self.get_response(request)
+        finally:
+            perf.stop_sample(token)
+        return self.finish(request, response, sample)
+
+    async def __acall__(self, request):
+        sample, token = perf.start_sample()
+        try:
+            response = await self.get_response(request)
+        finally:
+            perf.stop_sample(token)
+        return self.finish(request, response, sample)
+
+    # --------------------------
+    # Recording
+    # --------------------------
+    def finish(self, request, response, sample):
+        response["Server-Timing"] = (
+            f'app;dur={sample.elapsed_ms():.1f}, '
+            f'db;dur={sample.db_ms:.1f};desc="{sample.queries} queries"'
+        )
+        if response.get("Content-Type", "").startswith("text/event-stream"):
+            # Open for minutes by design (the dashboard feed): not a latency sample
+            return response
+        if response.streaming:
+            content = response.streaming_content
+            if response.is_async:
+                response.streaming_content = self._acount(request, response, sample, content)
+            else:
+                response.streaming_content = self._count(request, response, sample, content)
+        else:
+            self.record(request, response, sample, len(response.content))
+        return response
+
+    def _count(self, request, response, sample, content):
+        size = 0
+        token = perf.collecting(sample)
+        try:
+            for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            perf.stop_sample(token)
+            self.record(request, response, sample, size)
+
+    async def _acount(self, request, response, sample, content):
+        size = 0
+        token = perf.collecting(sample)
+        try:
+            async for chunk in content:
+                size += len(chunk)
+                yield chunk
+        finally:
+            perf.stop_sample(token)
+            self.record(request, response, sample, size)
+
+    def record(self, request, response, sample, size):
+        match = getattr(request, "resolver_match", None)
+        url_name = (match.view_name if match else None) or "<unresolved>"
+        total_ms = sample.elapsed_ms()
+        perf.STATS.record(url_name, total_ms, sample.db_ms, sample.queries, size, response.status_code)
+
+        if total_ms >= getattr(settings, "PERF_SLOW_REQUEST_MS", DEFAULT_SLOW_MS):
+            slowest = "\n".join(f"  {ms:8.1f} ms  {sql[:300]}" for ms, sql in sample.slowest)
+            logger.warning(
+                "Slow request %s %s (%s): %.0f ms, db %.0f ms in %d queries, %d bytes\n%s",
+                request.method, request.path, url_name, total_ms,
+                sample.db_ms, sample.queries, size, slowest,
+            )
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+
+# (name, category, unit price, litres) - the former views.PRICE_LIST
+PRODUCTS = [
+    ("1L (R)", "Water", 10, 1),
+    ("1L + B", "Water", 30, 1),
+    ("5L (R)", "Water", 70, 5),
+    ("5L Bottle", "Water", 150, 5),
+    ("10L (R)", "Water", 130, 10),
+    ("10L Bottle", "Water", 250, 10),
+    ("20L (R)", "Water", 250, 20),
+    ("20L  Bottle", "Water", 500, 20),
+    ("20L (Hard) + water", "Water", 1500, 20),
+    ("Insta Gas 6kg", "Gas", 1000, None),
+    ("Insta Gas 13kg", "Gas", 3500, None),
+    ("Pro Gas 6kg", "Gas", 1000, None),
+    ("Pro Gas 13kg", "Gas", 3500, None),
+    ("Wajiko 6kg", "Gas", 1000, None),
+    ("Wajiko 13kg", "Gas", 3500, None),
+]
+
+
+def normalize_name(name):
+    # Same as myapp.catalog.normalize_name
+    return " ".join(str(name).split()).casefold()
+
+
+def seed_products(apps, schema_editor):
+    Product = apps.get_model("myapp", "Product")
+    Sale = apps.get_model("myapp", "Sale")
+    db = schema_editor.connection.alias
+    products = {}
+    for name, category, price, litres in PRODUCTS:
+        lowered = name.lower()
+        product, _ = Product.objects.using(db).get_or_create(
+            name=name,
+            defaults={
+                "category": category,
+                "unit_price": Decimal(price),
+                "unit_volume_litres": Decimal(litres) if litres else None,
+                "is_refill": "(R)" in name,
+                "is_gas": "gas" in lowered or "wajiko" in lowered,
+                "is_bottle": "bottle" in lowered,
+            },
+        )
+        products[normalize_name(name)] = product
+
+    # Link existing sales by item name, ignoring case and spacing like the catalog
+    unlinked = Sale.objects.using(db).filter(product__isnull=True)
+    for item in unlinked.order_by().values_list("item", flat=True).distinct():
+        product = products.get(normalize_name(item or ""))
+        if product is not None:
+            unlinked.filter(item=item).update(product=product)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0002_importjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('category', models.CharField(choices=[('Water', 'Water'), ('Gas', 'Gas')], db_index=True, max_length=50)),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('unit_volume_litres', models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True)),
+                ('is_refill', models.BooleanField(db_index=True, default=False)),
+                ('is_gas', models.BooleanField(db_index=True, default=False)),
+                ('is_bottle', models.BooleanField(db_index=True, default=False)),
+                ('active', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['category', 'name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='myapp.product'),
+        ),
+        migrations.RunPython(seed_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+import django.db.models.deletion
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def build_summary(apps, schema_editor):
+    Sale = apps.get_model("myapp", "Sale")
+    DailySalesSummary = apps.get_model("myapp", "DailySalesSummary")
+    db = schema_editor.connection.alias
+    rows = (
+        Sale.objects.using(db).order_by()
+        .annotate(day=TruncDate("date"))
+        .values("day", "category", "product_id", "payment_method", "payment_status")
+        .annotate(
+            n=Count("id"),
+            qty=Coalesce(Sum("quantity"), Value(0)),
+            total=Coalesce(Sum("price"), Value(Decimal(0)), output_field=DecimalField()),
+            vol=Coalesce(
+                Sum(F("quantity") * F("product__unit_volume_litres")),
+                Value(Decimal(0)),
+                output_field=DecimalField(),
+            ),
+        )
+    )
+    DailySalesSummary.objects.using(db).bulk_create([
+        DailySalesSummary(
+            date=row["day"],
+            category=row["category"] or "",
+            product_id=row["product_id"],
+            payment_method=row["payment_method"] or "",
+            payment_status=row["payment_status"] or "",
+            sales_count=row["n"],
+            quantity=row["qty"],
+            amount=row["total"],
+            litres=row["vol"],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('category', models.CharField(max_length=50)),
+                ('payment_method', models.CharField(max_length=50)),
+                ('payment_status', models.CharField(max_length=20)),
+                ('sales_count', models.IntegerField(default=0)),
+                ('quantity', models.IntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('litres', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='myapp.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'category', 'product', 'payment_method', 'payment_status'], name='summary_key_idx')],
+            },
+        ),
+        migrations.RunPython(build_summary, migrations.RunPython.noop),
+    ]
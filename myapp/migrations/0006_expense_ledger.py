@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:42
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, F, Sum, Value, Window
+from django.db.models.functions import Coalesce
+
+
+def recalculate_balances(apps, schema_editor):
+    Expense = apps.get_model("myapp", "Expense")
+    db = schema_editor.connection.alias
+    money = DecimalField(max_digits=14, decimal_places=2)
+    zero = Value(Decimal("0"), output_field=money)
+    order = [F("date").asc(), F("receipt_no").asc(nulls_first=True), F("id").asc()]
+    delta = Coalesce("received_amount", zero) - Coalesce("bank_charges", zero) - Coalesce("amount_paid", zero)
+    rows = Expense.objects.using(db).annotate(
+        running=Window(Sum(delta, output_field=money), order_by=order)
+    ).values_list("id", "running")
+    changed = [
+        Expense(pk=pk, cumulative_balance=Decimal(total or 0).quantize(Decimal("0.01")))
+        for pk, total in rows
+    ]
+    Expense.objects.using(db).bulk_update(changed, ["cumulative_balance"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_daily_sales_summary'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expense_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['date', 'receipt_no', 'id'], name='expense_ledger_idx'),
+        ),
+        migrations.RunPython(recalculate_balances, migrations.RunPython.noop),
+    ]
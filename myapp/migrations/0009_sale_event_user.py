@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_sale_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='saleevent',
+            name='user_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='saleevent',
+            index=models.Index(fields=['user_id', 'id'], name='saleevent_user_idx'),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedExpense',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('receipt_no', models.CharField(blank=True, max_length=50, null=True)),
+                ('date', models.DateField()),
+                ('paid_to', models.CharField(max_length=255)),
+                ('charges_account', models.CharField(blank=True, max_length=255, null=True)),
+                ('description', models.TextField()),
+                ('received_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('bank_charges', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('amount_paid', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('cumulative_balance', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('moved_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedSale',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('category', models.CharField(max_length=50)),
+                ('item', models.CharField(max_length=255)),
+                ('quantity', models.PositiveIntegerField()),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('payment_method', models.CharField(max_length=50)),
+                ('date', models.DateTimeField()),
+                ('payment_status', models.CharField(max_length=20)),
+                ('delivery_place', models.CharField(blank=True, max_length=255, null=True)),
+                ('moved_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expense_receipt_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='expense',
+            name='expense_ledger_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_date_method_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_status_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sale',
+            name='sale_user_date_idx',
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='sale',
+            name='archived',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['date', 'receipt_no', 'id'], name='expense_ledger_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['receipt_no'], name='expense_receipt_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('archived', False), _negated=True), fields=['id'], name='expense_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['date', 'payment_method'], name='sale_date_method_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['payment_status', 'date'], name='sale_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['user', 'date'], name='sale_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('archived', False)), fields=['-id'], name='sale_live_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sale',
+            index=models.Index(condition=models.Q(('archived', False), _negated=True), fields=['id'], name='sale_archived_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedexpense',
+            index=models.Index(fields=['date'], name='archivedexpense_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedsale',
+            name='product',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='myapp.product'),
+        ),
+        migrations.AddField(
+            model_name='archivedsale',
+            name='user',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedsale',
+            index=models.Index(fields=['date'], name='archivedsale_date_idx'),
+        ),
+    ]
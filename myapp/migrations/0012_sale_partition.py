@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_archived_rows'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalePartition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(unique=True)),
+                ('table', models.CharField(max_length=63)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('min_id', models.BigIntegerField(blank=True, null=True)),
+                ('max_id', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['month'],
+            },
+        ),
+    ]
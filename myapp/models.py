@@ -7,6 +7,19 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+# ---------------------------
+# Archived (soft-deleted) rows: hidden by the default managers and left out
+# of the hot indexes, which are partial on LIVE (see myapp/bulk.py)
+LIVE = models.Q(archived=False)
+
+
+class LiveManager(models.Manager):
+    """Default manager: the rows that are not archived."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(LIVE)
+
+
 class Expense(models.Model):
     receipt_no = models.CharField(max_length=50, blank=True, null=True)  # R. No
     date = models.DateField()
@@ -17,6 +30,18 @@ class Expense(models.Model):
     bank_charges = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     amount_paid = models.DecimalField(max_digits=12, decimal_places=2)
     cumulative_balance = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)  # C. Balance
+    archived = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)  # change marker for the cached PDF reports
+
+    objects = LiveManager()
+    all_objects = models.Manager()  # archived rows included
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "receipt_no", "id"], name="expense_ledger_idx", condition=LIVE),  # running balance order
+            models.Index(fields=["receipt_no"], name="expense_receipt_idx", condition=LIVE),  # dashboard order by receipt
+            models.Index(fields=["id"], name="expense_archived_idx", condition=~LIVE),  # move_archived
+        ]
 
     def __str__(self):
         return f"{self.date} - {self.paid_to} - {self.amount_paid}"
@@ -26,8 +51,44 @@ class Expense(models.Model):
 
 
 
+# ---------------------------
+# Product catalog (prices + report classification)
+class Product(models.Model):
+    CATEGORY = [
+        ("Water", "Water"),
+        ("Gas", "Gas"),
+    ]
+
+    name = models.CharField(max_length=255, unique=True)  # matches Sale.item
+    category = models.CharField(max_length=50, choices=CATEGORY, db_index=True)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2)
+    unit_volume_litres = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
+    is_refill = models.BooleanField(default=False, db_index=True)  # "(R)" water refills
+    is_gas = models.BooleanField(default=False, db_index=True)
+    is_bottle = models.BooleanField(default=False, db_index=True)
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ["category", "name"]
+
+    def __str__(self):
+        return f"{self.name} ({self.unit_price})"
+
+
 # ---------------------------
 # Sale model for user orders
+class SaleQuerySet(models.QuerySet):
+    # Columns rendered by the sales tables (dashboards + report)
+    LIST_FIELDS = (
+        "id", "user__username", "category", "item", "quantity", "price",
+        "date", "payment_method", "payment_status", "delivery_place",
+    )
+
+    def for_listing(self):
+        """Join the user in the same query and load only the listed columns."""
+        return self.select_related("user").only(*self.LIST_FIELDS)
+
+
 class Sale(models.Model):
     PAYMENT_METHOD = [
         ("Cash", "Cash"),
@@ -41,6 +102,7 @@ class Sale(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, blank=True, null=True)  # None for local items
     category = models.CharField(max_length=50)
     item = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField()
@@ -49,7 +111,204 @@ class Sale(models.Model):
     date = models.DateTimeField(default=timezone.now) 
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS, default="Not Paid")
     delivery_place = models.CharField(max_length=255, blank=True, null=True)
+    archived = models.BooleanField(default=False)
+
+    objects = LiveManager.from_queryset(SaleQuerySet)()
+    all_objects = SaleQuerySet.as_manager()  # archived rows included
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "payment_method"], name="sale_date_method_idx", condition=LIVE),  # date ranges / totals
+            models.Index(fields=["payment_status", "date"], name="sale_status_date_idx", condition=LIVE),
+            models.Index(fields=["user", "date"], name="sale_user_date_idx", condition=LIVE),
+            models.Index(fields=["-id"], name="sale_live_id_idx", condition=LIVE),  # dashboard pages
+            models.Index(fields=["id"], name="sale_archived_idx", condition=~LIVE),  # move_archived
+        ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_item = instance.__dict__.get("item")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Keep the product link in step with the item name (cached lookup) when the name changes;
+        # a product that has since been deactivated stays linked while the name still matches it
+        from .catalog import get_product, normalize_name
+        if self._state.adding or getattr(self, "_stored_item", None) != self.item:
+            product = get_product(self.item)
+            if product is not None or self.product_id is None or (
+                normalize_name(self.product.name) != normalize_name(self.item or "")
+            ):
+                self.product = product
+        super().save(*args, **kwargs)
+        self._stored_item = self.item
 
     def __str__(self):
         return f"{self.user.username} - {self.item} - {self.price} ({self.payment_status})"
+
+
+# ---------------------------
+# Daily sales rollup (maintained from Sale signals, see myapp/summary.py)
+class DailySalesSummary(models.Model):
+    date = models.DateField()
+    category = models.CharField(max_length=50)
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, blank=True, null=True)
+    payment_method = models.CharField(max_length=50)
+    payment_status = models.CharField(max_length=20)
+    sales_count = models.IntegerField(default=0)
+    quantity = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    litres = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)  # change marker for the cached PDF reports
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["date", "category", "product", "payment_method", "payment_status"],
+                name="summary_key_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.category} - {self.payment_method} ({self.payment_status}): {self.amount}"
+
+# ---------------------------
+# Background expense import jobs
+class ImportJob(models.Model):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True)
+    file = models.FileField(upload_to="imports/")
+    original_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS, default=PENDING, db_index=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_rows = models.PositiveIntegerField(default=0)
+    skipped_rows = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)  # last progress report of a running job
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Import #{self.pk} - {self.original_name} ({self.status})"
+
+
+# ---------------------------
+# Sale change log for the live user dashboard (see myapp/feed.py)
+class SaleEvent(models.Model):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+    ACTIONS = [
+        (CREATED, "Created"),
+        (UPDATED, "Updated"),
+        (DELETED, "Deleted"),
+    ]
+
+    # Plain ids, not ForeignKeys: the event outlives a deleted sale
+    sale_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(blank=True, null=True)  # the sale's clerk, for scoped feeds
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)  # pruning
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user_id", "id"], name="saleevent_user_idx"),  # one clerk's events after an id
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} sale {self.sale_id} {self.action}"
+
+
+# ---------------------------
+# Idempotency keys of order submissions (see myapp/idempotency.py)
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    key = models.CharField(max_length=64)  # sha256 of the client's token
+    sale_ids = models.JSONField(default=list)  # what the first request created
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)  # expiry
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotency_user_key_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key[:12]} -> {self.sale_ids}"
+
+
+# ---------------------------
+# Cold storage of archived rows (filled by the move_archived command)
+class ArchivedSale(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # the original Sale id
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, db_constraint=False)
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, blank=True, null=True, db_constraint=False)
+    category = models.CharField(max_length=50)
+    item = models.CharField(max_length=255)
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    payment_method = models.CharField(max_length=50)
+    date = models.DateTimeField()
+    payment_status = models.CharField(max_length=20)
+    delivery_place = models.CharField(max_length=255, blank=True, null=True)
+    moved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date"], name="archivedsale_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"archived sale #{self.pk} - {self.item} - {self.price}"
+
+
+class ArchivedExpense(models.Model):
+    id = models.BigIntegerField(primary_key=True)  # the original Expense id
+    receipt_no = models.CharField(max_length=50, blank=True, null=True)
+    date = models.DateField()
+    paid_to = models.CharField(max_length=255)
+    charges_account = models.CharField(max_length=255, blank=True, null=True)
+    description = models.TextField()
+    received_amount = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    bank_charges = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    amount_paid = models.DecimalField(max_digits=12, decimal_places=2)
+    cumulative_balance = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    moved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["date"], name="archivedexpense_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"archived expense #{self.pk} - {self.paid_to} - {self.amount_paid}"
+
+
+# ---------------------------
+# Monthly sale partitions (tables myapp_sale_YYYY_MM, see myapp/partitions.py)
+class SalePartition(models.Model):
+    month = models.DateField(unique=True)  # first day of the month
+    table = models.CharField(max_length=63)
+    rows = models.PositiveIntegerField(default=0)
+    min_id = models.BigIntegerField(blank=True, null=True)  # id range, to find a sale / skip tables
+    max_id = models.BigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["month"]
+
+    def __str__(self):
+        return f"{self.table} ({self.rows} sales)"
@@ -0,0 +1,168 @@
+# myapp/orders.py
+"""
+Multi-line (cart) orders for ``user_dashboard``.
+
+A cart arrives either as repeated form fields, one ``category`` / ``item`` /
+``local_item`` / ``quantity`` / ``price`` per line, or as JSON::
+
+    {"payment_method": "Cash", "payment_status": "Delivery", "delivery_place": "Gate B",
+     "lines": [{"category": "Water", "item": "20L (R)", "quantity": 3}, ...]}
+
+Payment fields apply to every line unless a line sets its own. All lines are
+validated before anything is written, catalog items are priced from one
+catalog snapshot, and the cart goes in with one ``bulk_create`` plus one
+rollup delta per summary key, in one transaction: all lines or none.
+"""
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import catalog, feed, summary
+from .models import Sale, SaleEvent
+
+DEFAULT_MAX_LINES = 100
+
+LINE_FIELDS = ("category", "item", "local_item", "quantity", "price")
+ORDER_FIELDS = ("payment_method", "payment_status", "delivery_place")
+
+PAYMENT_METHODS = {value for value, _ in Sale.PAYMENT_METHOD}
+PAYMENT_STATUSES = {value for value, _ in Sale.PAYMENT_STATUS}
+
+
+class OrderError(ValueError):
+    """The cart was rejected; ``errors`` lists what is wrong with it."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def get_max_lines():
+    return getattr(settings, "ORDER_MAX_LINES", DEFAULT_MAX_LINES)
+
+
+# --------------------------
+# Reading the cart
+# --------------------------
+def lines_from_post(post):
+    """Cart lines from a form POST (parallel lists of the line fields)."""
+    columns = {name: post.getlist(name) for name in LINE_FIELDS}
+    count = max(len(values) for values in columns.values())
+    order = {name: post.get(name) for name in ORDER_FIELDS}
+    lines = []
+    for i in range(count):
+        line = {name: values[i] if i < len(values) else "" for name, values in columns.items()}
+        # Skip the empty entry row left on the form next to a filled cart
+        if count > 1 and not any((line["item"], line["local_item"], line["price"])):
+            continue
+        lines.append({**order, **line})
+    return lines
+
+
+def lines_from_json(body):
+    """Cart lines from a JSON request body."""
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise OrderError(["Request body is not valid JSON."])
+    if not isinstance(data, dict) or not isinstance(data.get("lines"), list):
+        raise OrderError(['Expected an object with a "lines" list.'])
+    order = {name: data.get(name) for name in ORDER_FIELDS}
+    lines = []
+    for line in data["lines"]:
+        if not isinstance(line, dict):
+            raise OrderError(["Every line must be an object."])
+        lines.append({**order, **{k: v for k, v in line.items() if v is not None}})
+    return lines
+
+
+# --------------------------
+# Validation + insert
+# --------------------------
+def _decimal(value):
+    try:
+        return Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def build_sale(user, line, now):
+    """An unsaved ``Sale`` for one cart line; raises ``OrderError`` if invalid."""
+    category = (line.get("category") or "").strip()
+    item = (line.get("item") or line.get("local_item") or "").strip()
+    payment_method = line.get("payment_method")
+    payment_status = line.get("payment_status")
+    if not category or not item or not line.get("quantity") or not payment_method or not payment_status:
+        raise OrderError(["Please fill all required fields."])
+
+    errors = []
+    quantity = _decimal(line["quantity"])
+    if quantity is None or quantity != quantity.to_integral_value() or quantity < 1:
+        errors.append(f"quantity must be a whole number of at least 1, got {line['quantity']!r}.")
+    if payment_method not in PAYMENT_METHODS:
+        errors.append(f"unknown payment method {payment_method!r}.")
+    if payment_status not in PAYMENT_STATUSES:
+        errors.append(f"unknown payment status {payment_status!r}.")
+
+    # Catalog items are priced by the catalog; the entered total must agree with it
+    product = catalog.get_product(item)
+    entered = line.get("price")
+    entered_total = _decimal(entered) if entered not in (None, "") else None
+    if entered not in (None, "") and (entered_total is None or entered_total < 0):
+        errors.append(f"invalid price {entered!r}.")
+    if errors:
+        raise OrderError(errors)
+
+    quantity = int(quantity)
+    if product:
+        total_price = product.unit_price * quantity
+        if entered_total is not None and entered_total != total_price:
+            raise OrderError([
+                f"{item} costs {product.unit_price} each, so {quantity} come to {total_price}, not {entered_total}."
+            ])
+    elif entered_total is None:
+        raise OrderError([f"enter the total price for local item {item!r}."])
+    else:
+        total_price = entered_total
+
+    return Sale(
+        user=user,
+        product=product,  # bulk_create skips Sale.save(), which sets this
+        category=category,
+        item=item,
+        quantity=quantity,
+        price=total_price,
+        date=now,
+        payment_method=payment_method,
+        payment_status=payment_status,
+        delivery_place=(line.get("delivery_place") or "") if payment_status == "Delivery" else "",
+    )
+
+
+def place_order(user, lines):
+    """Validate every line, then insert them all at once; returns the saved sales."""
+    if not lines:
+        raise OrderError(["Please fill all required fields."])
+    if len(lines) > get_max_lines():
+        raise OrderError([f"At most {get_max_lines()} lines per order, got {len(lines)}."])
+
+    now = timezone.now()
+    sales, errors = [], []
+    for number, line in enumerate(lines, start=1):
+        try:
+            sales.append(build_sale(user, line, now))
+        except OrderError as e:
+            prefix = f"Line {number}: " if len(lines) > 1 else ""
+            errors.extend(prefix + error for error in e.errors)
+    if errors:
+        raise OrderError(errors)
+
+    with transaction.atomic():
+        sales = Sale.objects.bulk_create(sales)
+        # bulk_create sends no signals: one rollup delta per key, then one cache bump
+        summary.add_sales(sales)
+        feed.record(SaleEvent.CREATED, [(sale.pk, sale.user_id) for sale in sales])
+    return sales
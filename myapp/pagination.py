@@ -0,0 +1,118 @@
+# myapp/pagination.py
+"""Keyset (seek) pagination: a page asks for the rows after the previous page's last sort key, never OFFSET."""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+
+PAGE_SIZES = [25, 50, 100, 200]
+DEFAULT_PAGE_SIZE = 50
+
+# (field, descending) - NULLs always sort last
+SALE_ORDER = [("id", True)]
+EXPENSE_ORDER = [("receipt_no", True), ("id", False)]
+
+
+class KeysetPage:
+    def __init__(self, rows, next_cursor, cursor):
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.cursor = cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return not self.cursor
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def get_page_size(request, param="page_size"):
+    try:
+        size = int(request.GET.get(param, DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return size if size in PAGE_SIZES else DEFAULT_PAGE_SIZE
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, order, model):
+    """Return the key values stored in ``cursor`` as ``model``'s field types, or None if it is missing/invalid."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != len(order):
+        return None
+    try:
+        # Cursors come back from the client: only scalars the key's field accepts
+        return [
+            _to_python(model._meta.get_field(field), value)
+            for (field, _), value in zip(order, values)
+        ]
+    except ValidationError:
+        return None
+
+
+def _to_python(field, value):
+    if isinstance(value, (dict, list)):
+        raise ValidationError("Not a key value")
+    return field.to_python(value)
+
+
+def order_by_keys(queryset, order):
+    return queryset.order_by(*[
+        F(field).desc(nulls_last=True) if desc else F(field).asc(nulls_last=True)
+        for field, desc in order
+    ])
+
+
+def after_keys(order, values):
+    """Q matching rows that sort strictly after ``values`` under ``order``."""
+    condition = Q(pk__in=[])
+    equal = Q()
+    for (field, desc), value in zip(order, values):
+        if value is not None:
+            later = Q(**{f"{field}__lt" if desc else f"{field}__gt": value}) | Q(**{f"{field}__isnull": True})
+            condition |= equal & later
+            equal &= Q(**{field: value})
+        else:
+            # Only other NULLs can tie; nothing non-null sorts after a NULL
+            equal &= Q(**{f"{field}__isnull": True})
+    return condition
+
+
+def keyset_page(queryset, order, cursor, page_size):
+    """Return the ``page_size`` rows after ``cursor`` as a ``KeysetPage``."""
+    values = decode_cursor(cursor, order, queryset.model)
+    queryset = order_by_keys(queryset, order)
+    if values is not None:
+        queryset = queryset.filter(after_keys(order, values))
+
+    return build_page(list(queryset[:page_size + 1]), order, page_size, cursor if values is not None else None)
+
+
+def build_page(rows, order, page_size, cursor):
+    """A ``KeysetPage`` from up to ``page_size + 1`` rows already in ``order``."""
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, field) for field, _ in order])
+    return KeysetPage(rows, next_cursor, cursor)
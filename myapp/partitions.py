@@ -0,0 +1,211 @@
+# myapp/partitions.py
+"""Monthly partitions of old sales (tables ``myapp_sale_YYYY_MM``) and the reads routed across them."""
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, connections, models, transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from . import dashboard_cache, feed
+from .bulk import batches, get_batch_size
+from .hooks import suspended
+from .models import Sale, SaleEvent, SalePartition, SaleQuerySet
+from .pagination import SALE_ORDER, build_page, decode_cursor
+from .reports import day_start, filter_sales_by_dates
+
+DEFAULT_KEEP_MONTHS = 2  # the current month and the one before stay hot
+
+_models = {}  # month -> partition model class
+
+
+def get_keep_months():
+    return max(1, getattr(settings, "SALE_PARTITION_KEEP_MONTHS", DEFAULT_KEEP_MONTHS))
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(month):
+    return (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def table_name(month):
+    return f"{Sale._meta.db_table}_{month:%Y_%m}"
+
+
+def partition_model(month):
+    """The model of ``month``'s partition table: Sale's columns, built once per process."""
+    month = month_start(month)
+    if month not in _models:
+        attrs = {
+            "__module__": __name__,
+            "id": models.BigIntegerField(primary_key=True),  # the original Sale id
+            "objects": SaleQuerySet.as_manager(),
+            "Meta": type("Meta", (), {
+                "app_label": Sale._meta.app_label,
+                "db_table": table_name(month),
+                "managed": False,  # created by create_table, not by migrations
+                "indexes": [models.Index(fields=["date"], name=f"sale_{month:%Y_%m}_date_idx")],
+            }),
+        }
+        for field in Sale._meta.concrete_fields:
+            if field.primary_key or field.name == "archived":
+                continue
+            if field.is_relation:
+                # Plain columns underneath: the user or product may go away, the history stays
+                attrs[field.name] = models.ForeignKey(
+                    field.related_model, on_delete=models.DO_NOTHING, blank=True, null=True,
+                    db_constraint=False, related_name="+",
+                )
+            else:
+                attrs[field.name] = field.clone()
+        _models[month] = type(f"Sale{month:%Y%m}", (models.Model,), attrs)
+    return _models[month]
+
+
+def create_table(month, using="default"):
+    """Create ``month``'s table on ``using`` unless it exists; returns the model."""
+    model = partition_model(month)
+    target = connections[using]
+    if model._meta.db_table not in target.introspection.table_names():
+        with target.schema_editor() as editor:
+            editor.create_model(model)
+    return model
+
+
+def ensure_partition(month):
+    model = create_table(month)
+    SalePartition.objects.get_or_create(month=month_start(month), defaults={"table": model._meta.db_table})
+    return model
+
+
+def drop_partitions():
+    """Drop every partition table this process knows of (tests) and forget the models."""
+    existing = connection.introspection.table_names()
+    with connection.schema_editor() as editor:
+        for model in _models.values():
+            if model._meta.db_table in existing:
+                editor.delete_model(model)
+    for model in _models.values():
+        apps.all_models[model._meta.app_label].pop(model._meta.model_name, None)
+    _models.clear()
+    apps.clear_cache()
+    SalePartition.objects.all().delete()
+
+
+# --------------------------
+# Routing reads
+# --------------------------
+def _overlapping(start, end):
+    partitions = SalePartition.objects.all()
+    if start:
+        partitions = partitions.filter(month__gte=month_start(start))
+    if end:
+        partitions = partitions.filter(month__lte=end)
+    return partitions.order_by("month")
+
+
+def _partitions(start, end):
+    return _overlapping(start, end).values_list("month", flat=True)
+
+
+def _querysets(months, start, end):
+    parts = [filter_sales_by_dates(partition_model(month).objects.all(), start, end) for month in months]
+    return parts + [filter_sales_by_dates(Sale.objects.all(), start, end)]
+
+
+def route(start=None, end=None):
+    """Sale querysets for ``start``..``end``: the overlapping partitions oldest first, then the hot table."""
+    return _querysets(list(_partitions(start, end)), start, end)
+
+
+async def aroute(start=None, end=None):
+    return _querysets([month async for month in _partitions(start, end)], start, end)
+
+
+def overlaps(start=None, end=None):
+    """Whether any closed (rolled-over) month overlaps ``start``..``end``."""
+    return _overlapping(start, end).exists()
+
+
+def find(pk):
+    """The rolled-over sale with id ``pk``, or None (one query per partition whose id range holds it)."""
+    months = SalePartition.objects.filter(min_id__lte=pk, max_id__gte=pk).values_list("month", flat=True)
+    for month in months:
+        sale = partition_model(month).objects.select_related("user").filter(pk=pk).first()
+        if sale is not None:
+            return sale
+    return None
+
+
+def keyset_page(cursor, page_size, prepare=None, start=None, end=None):
+    """A ``SALE_ORDER`` keyset page across the hot table and the partitions of ``start``..``end``."""
+    prepare = prepare or (lambda queryset: queryset)
+    values = decode_cursor(cursor, SALE_ORDER, Sale)
+    before = values[0] if values is not None else None
+
+    months = _overlapping(start, end).values_list("month", "min_id", "max_id")
+    parts = [(None, Sale.objects.all())] + [
+        (max_id, partition_model(month).objects.all())
+        for month, min_id, max_id in sorted(months, key=lambda p: p[2] or 0, reverse=True)
+        if before is None or (min_id is not None and min_id < before)
+    ]
+
+    rows = []
+    for max_id, queryset in parts:
+        if len(rows) > page_size and max_id is not None and max_id < rows[page_size].id:
+            break  # this and every later table only hold older ids
+        queryset = prepare(filter_sales_by_dates(queryset, start, end)).order_by("-id")
+        if before is not None:
+            queryset = queryset.filter(id__lt=before)
+        rows = sorted(rows + list(queryset[:page_size + 1]), key=lambda sale: sale.id, reverse=True)
+    return build_page(rows[:page_size + 1], SALE_ORDER, page_size, cursor if values is not None else None)
+
+
+# --------------------------
+# Monthly roll-over
+# --------------------------
+def cutoff(today=None, keep_months=None):
+    """First day kept in the hot table."""
+    month = month_start(today or timezone.localdate())
+    for _ in range((keep_months or get_keep_months()) - 1):
+        month = month_start(month - timedelta(days=1))
+    return month
+
+
+def roll_over(today=None, keep_months=None, batch_size=None):
+    """Move live sales dated before ``cutoff`` into their month partitions; returns ``{month: rows}``."""
+    first_hot = cutoff(today, keep_months)
+    old = Sale.objects.filter(date__lt=day_start(first_hot))
+    months = [moment.date() for moment in old.datetimes("date", "month")]
+    return {month: _roll_month(month, batch_size) for month in months}
+
+
+def refresh(month):
+    """Store the row count and id range of ``month``'s table in its ``SalePartition`` row."""
+    stats = partition_model(month).objects.aggregate(rows=Count("id"), min_id=Min("id"), max_id=Max("id"))
+    SalePartition.objects.filter(month=month).update(**stats)
+
+
+def _roll_month(month, batch_size):
+    model = ensure_partition(month)
+    fields = [f.attname for f in model._meta.concrete_fields]
+    selection = filter_sales_by_dates(Sale.objects.all(), month, next_month(month) - timedelta(days=1))
+    moved = 0
+    for chunk in batches(selection, batch_size=batch_size or get_batch_size()):
+        with transaction.atomic():
+            rows = Sale.objects.filter(pk__in=chunk)
+            sale_users = list(rows.values_list("id", "user_id"))
+            model.objects.bulk_create([model(**row) for row in rows.values(*fields)])
+            # Still in the daily rollup: only the rows move, the totals stay
+            with suspended():
+                rows.delete()
+            dashboard_cache.bump("sales")
+            dashboard_cache.bump_users(user_id for _, user_id in sale_users)
+            feed.record(SaleEvent.DELETED, sale_users)
+            moved += len(sale_users)
+    refresh(month)
+    return moved
@@ -0,0 +1,187 @@
+# myapp/pdf_reports.py
+"""
+Admin dashboard PDF report, rendered off the request path.
+
+The request renders the (cheap) HTML and hands it to a process pool running
+xhtml2pdf (``pdf_worker.write_pdf``), which is the CPU-heavy part. Finished
+files are kept on disk under ``PDF_REPORT_DIR`` and named after the date
+range and the row count and latest ``updated_at`` of the rows the report
+shows (``data_version``), read from the database so every process agrees on
+it: a repeat download with unchanged data is served straight from disk and
+any write makes the next request render a fresh file.
+"""
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.db.models import Count, Max, Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .ledger import ORDER as LEDGER_ORDER
+from .models import DailySalesSummary, Expense
+from .pdf_worker import write_pdf
+from .reports import summary_totals
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 2
+DEFAULT_STALE_GRACE_SECONDS = 600
+TEMPLATE = "admin_dashboard_pdf.html"
+
+_lock = threading.Lock()
+_executor = None
+_pending = {}  # path -> Future
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        workers = getattr(settings, "PDF_REPORT_WORKERS", DEFAULT_WORKERS)
+        # spawn: never fork a process that holds DB connections and threads
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def report_dir():
+    path = getattr(settings, "PDF_REPORT_DIR", None) or os.path.join(settings.MEDIA_ROOT, "reports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _label(start, end):
+    return f"admin-dashboard_{start or 'first'}_{end or 'last'}"
+
+
+def _expenses(start, end):
+    expenses = Expense.objects.all()
+    if start:
+        expenses = expenses.filter(date__gte=start)
+    if end:
+        expenses = expenses.filter(date__lte=end)
+    return expenses
+
+
+def _summaries(start, end):
+    summaries = DailySalesSummary.objects.all()
+    if start:
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        summaries = summaries.filter(date__lte=end)
+    return summaries
+
+
+def data_version(start=None, end=None):
+    """
+    Change marker of the expenses and sales rollup rows in ``start``..``end``:
+    every write sets ``updated_at``, every delete lowers the count.
+    """
+    marker = {"rows": Count("id"), "last": Max("id"), "changed": Max("updated_at")}
+    expenses = _expenses(start, end).order_by().aggregate(**marker)
+    sales = _summaries(start, end).order_by().aggregate(**marker)
+    return f"{sorted(expenses.items())}{sorted(sales.items())}"
+
+
+def report_path(start=None, end=None):
+    """File the report for ``start``..``end`` has (or will have) at the current data version."""
+    digest = hashlib.md5(data_version(start, end).encode()).hexdigest()[:12]
+    return os.path.join(report_dir(), f"{_label(start, end)}_{digest}.pdf")
+
+
+def render_html(start=None, end=None):
+    expenses = _expenses(start, end).order_by(*LEDGER_ORDER)
+
+    totals = expenses.order_by().aggregate(
+        received=Sum("received_amount"),
+        paid=Sum("amount_paid"),
+        charges=Sum("bank_charges"),
+    )
+    closing = expenses.reverse().values_list("cumulative_balance", flat=True).first()
+
+    return render_to_string(TEMPLATE, {
+        "expenses": expenses,
+        "total_received": totals["received"] or 0,
+        "total_paid": totals["paid"] or 0,
+        "total_charges": totals["charges"] or 0,
+        "closing_balance": closing or 0,
+        "sales_summary": summary_totals(start, end),
+        "start": start,
+        "end": end,
+        "generated_at": timezone.localtime(),
+    })
+
+
+def _remove_stale(path, start, end):
+    """
+    Delete older renders of the same date range once a newer one has been on
+    disk for ``PDF_REPORT_STALE_GRACE_SECONDS``, so a download another
+    process has just looked up is never pulled from under it.
+    """
+    grace = getattr(settings, "PDF_REPORT_STALE_GRACE_SECONDS", DEFAULT_STALE_GRACE_SECONDS)
+    renders = []
+    for name in glob.glob(os.path.join(report_dir(), f"{_label(start, end)}_*.pdf")):
+        try:
+            renders.append((os.path.getmtime(name), name))
+        except OSError:
+            pass
+    renders.sort()
+    for (_, old), (superseded_at, _) in zip(renders, renders[1:]):
+        if old != path and superseded_at < time.time() - grace:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+def _finished(path, start, end):
+    def callback(future):
+        global _executor
+        with _lock:
+            _pending.pop(path, None)
+        error = future.exception()
+        if error is None:
+            _remove_stale(path, start, end)
+            return
+        logger.error("PDF report %s failed: %s", os.path.basename(path), error)
+        if isinstance(error, BrokenProcessPool):
+            with _lock:
+                _executor = None
+    return callback
+
+
+def request_report(start=None, end=None):
+    """
+    Return ``(path, ready)`` for the report of ``start``..``end``.
+
+    If the file is not on disk yet a render is queued (once per path) and
+    ``ready`` is False; ask again later.
+    """
+    path = report_path(start, end)
+    if os.path.exists(path):
+        _remove_stale(path, start, end)
+        return path, True
+    with _lock:
+        if path in _pending:
+            return path, False
+
+    html = render_html(start, end)
+    if getattr(settings, "PDF_REPORTS_EAGER", False):
+        write_pdf(html, path)
+        _remove_stale(path, start, end)
+        return path, True
+
+    with _lock:
+        future = None
+        if path not in _pending:
+            future = _pending[path] = get_executor().submit(write_pdf, html, path)
+    if future is not None:
+        # Outside the lock: the callback runs at once if the render already finished
+        future.add_done_callback(_finished(path, start, end))
+    return path, False
@@ -0,0 +1,22 @@
+# myapp/pdf_worker.py
+"""
+Process-pool side of the PDF reports: HTML in, PDF file out.
+
+Deliberately free of Django imports so a freshly spawned worker process can
+import it without configuring settings.
+"""
+import os
+
+from xhtml2pdf import pisa
+
+
+def write_pdf(html, path):
+    """Render ``html`` to ``path`` atomically (temp file + rename); returns ``path``."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as out:
+        status = pisa.CreatePDF(html, dest=out, encoding="utf-8")
+    if status.err:
+        os.remove(tmp)
+        raise RuntimeError(f"xhtml2pdf reported {status.err} error(s)")
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,154 @@
+# myapp/perf.py
+"""
+Per-request performance numbers for ``PerformanceMiddleware``.
+
+SQL is timed by an execute wrapper installed on every new DB connection
+(``install_query_timer``, wired to ``connection_created``). The wrapper
+reports to the ``RequestSample`` of the current request through a context
+variable, so queries run by async views (``sync_to_async`` threads) and by
+streaming responses are counted too, and connections outside a request pay
+only a ``ContextVar.get``.
+
+Finished samples go into ``STATS``: a rolling window of the last
+``PERF_WINDOW`` requests per URL name, from which histograms and percentiles
+are computed on read.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+
+DEFAULT_WINDOW = 1000
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+_current = ContextVar("perf_sample", default=None)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of ``values`` (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class RequestSample:
+    __slots__ = ("started", "db_ms", "queries", "slowest", "keep")
+
+    def __init__(self, keep=5):
+        self.started = time.perf_counter()
+        self.db_ms = 0.0
+        self.queries = 0
+        self.slowest = []  # (ms, sql), longest first, at most ``keep``
+        self.keep = keep
+
+    def add_query(self, sql, ms):
+        self.db_ms += ms
+        self.queries += 1
+        if len(self.slowest) < self.keep or ms > self.slowest[-1][0]:
+            self.slowest.append((ms, sql))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[self.keep:]
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def start_sample():
+    """Begin collecting for the current context; returns ``(sample, token)``."""
+    sample = RequestSample()
+    return sample, _current.set(sample)
+
+
+def stop_sample(token):
+    try:
+        _current.reset(token)
+    except ValueError:
+        # A streaming response closed from another context (e.g. by the GC)
+        pass
+
+
+def collecting(sample):
+    """Make ``sample`` current again (e.g. while a streaming response is iterated)."""
+    return _current.set(sample)
+
+
+def _time_query(execute, sql, params, many, context):
+    sample = _current.get()
+    if sample is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        sample.add_query(sql, (time.perf_counter() - started) * 1000)
+
+
+def install_query_timer(connection):
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+# --------------------------
+# Rolling per-URL statistics
+# --------------------------
+class PerfStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(self._window)
+
+    @staticmethod
+    def _window():
+        return deque(maxlen=getattr(settings, "PERF_WINDOW", DEFAULT_WINDOW))
+
+    def record(self, url_name, total_ms, db_ms, queries, size, status):
+        with self._lock:
+            self._samples[url_name].append((total_ms, db_ms, queries, size, status))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def snapshot(self):
+        """``{url_name: summary}`` over each URL's current window."""
+        with self._lock:
+            windows = {name: list(samples) for name, samples in self._samples.items()}
+        return {name: summarize(samples) for name, samples in sorted(windows.items())}
+
+
+def histogram(values):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for value in values:
+        for i, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={bound}" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"]
+    return dict(zip(labels, counts))
+
+
+def summarize(samples):
+    totals = [s[0] for s in samples]
+    count = len(samples)
+    sizes = [s[3] for s in samples if s[3] is not None]
+    return {
+        "requests": count,
+        "errors": sum(1 for s in samples if s[4] >= 500),
+        "p50_ms": round(percentile(totals, 50), 2),
+        "p95_ms": round(percentile(totals, 95), 2),
+        "p99_ms": round(percentile(totals, 99), 2),
+        "max_ms": round(max(totals), 2) if totals else 0.0,
+        "avg_db_ms": round(sum(s[1] for s in samples) / count, 2) if count else 0.0,
+        "avg_queries": round(sum(s[2] for s in samples) / count, 2) if count else 0.0,
+        "max_queries": max((s[2] for s in samples), default=0),
+        "avg_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+        "histogram_ms": histogram(totals),
+    }
+
+
+STATS = PerfStats()
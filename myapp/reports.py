@@ -0,0 +1,123 @@
+# myapp/reports.py
+"""Sales report totals computed in the database (live rows or the daily rollup)."""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import DailySalesSummary
+
+# --------------------------
+# Item / payment classification (Product family flags, joined via Sale.product)
+# --------------------------
+R_ITEMS = Q(product__is_refill=True)
+GAS_ITEMS = Q(product__is_gas=True)
+BOTTLE_ITEMS = Q(product__is_bottle=True)
+DELIVERY = Q(payment_status__iexact="delivery")
+CASH = Q(payment_method__iexact="cash")
+MPESA = Q(payment_method__iexact="mpesa")
+
+
+def _decimal_sum(expression, condition=None):
+    return Coalesce(
+        Sum(expression, filter=condition),
+        Value(Decimal("0")),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def _int_sum(expression, condition=None):
+    return Coalesce(Sum(expression, filter=condition), Value(0), output_field=IntegerField())
+
+
+def _aggregates(count, amount, litres):
+    return dict(
+        count=count,
+        overall=_decimal_sum(amount),
+        cash=_decimal_sum(amount, CASH),
+        mpesa=_decimal_sum(amount, MPESA),
+        r_litres=_int_sum("quantity", R_ITEMS),
+        r_volume=_decimal_sum(litres, R_ITEMS),
+        r_amount=_decimal_sum(amount, R_ITEMS),
+        delivery_qty=_int_sum("quantity", DELIVERY),
+        delivery_amount=_decimal_sum(amount, DELIVERY),
+        gas_qty=_int_sum("quantity", GAS_ITEMS),
+        gas_amount=_decimal_sum(amount, GAS_ITEMS),
+        bottle_qty=_int_sum("quantity", BOTTLE_ITEMS),
+        bottle_amount=_decimal_sum(amount, BOTTLE_ITEMS),
+    )
+
+
+def _totals(queryset, count, amount, litres):
+    return queryset.order_by().aggregate(**_aggregates(count, amount, litres))
+
+
+def sales_totals(sales):
+    """
+    Return the report summary for the ``sales`` queryset in one query.
+
+    Keys: count, overall, cash, mpesa, r_litres, r_volume, r_amount,
+    delivery_qty, delivery_amount, gas_qty, gas_amount, bottle_qty,
+    bottle_amount. ``r_litres`` is the refill quantity shown on the Excel
+    sheet; ``r_volume`` is the actual litres from the product unit volume.
+    """
+    return _totals(
+        sales,
+        count=Count("id"),
+        amount="price",
+        litres=F("quantity") * F("product__unit_volume_litres"),
+    )
+
+
+def _summaries(start, end):
+    summaries = DailySalesSummary.objects.all()
+    if start:
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        summaries = summaries.filter(date__lte=end)
+    return summaries.order_by()
+
+
+SUMMARY_AGGREGATES = dict(count=_int_sum("sales_count"), amount="amount", litres="litres")
+
+
+def summary_totals(start=None, end=None):
+    """Same keys as ``sales_totals``, read from the ``DailySalesSummary`` rollup."""
+    return _totals(_summaries(start, end), **SUMMARY_AGGREGATES)
+
+
+async def asummary_totals(start=None, end=None):
+    """``summary_totals`` for async views (``aaggregate``)."""
+    return await _summaries(start, end).aaggregate(**_aggregates(**SUMMARY_AGGREGATES))
+
+
+# --------------------------
+# Date range filters
+# --------------------------
+def day_start(day):
+    """Aware datetime for local midnight at the start of ``day``."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_sales_by_dates(sales, start=None, end=None):
+    """Sales from ``start`` to ``end`` inclusive (whole local days, index friendly)."""
+    if start:
+        sales = sales.filter(date__gte=day_start(start))
+    if end:
+        sales = sales.filter(date__lt=day_start(end + timedelta(days=1)))
+    return sales
+
+
+def totals_rows(totals):
+    """The totals block of the sales Excel sheet, in display order."""
+    return [
+        ["TOTAL (R only)", "", totals["r_litres"], float(totals["r_amount"]), ""],
+        ["TOTAL Delivery", "", totals["delivery_qty"], float(totals["delivery_amount"]), ""],
+        ["TOTAL Gas", "", totals["gas_qty"], float(totals["gas_amount"]), ""],
+        ["TOTAL Bottle", "", totals["bottle_qty"], float(totals["bottle_amount"]), ""],
+        ["", "Cash Total", "", float(totals["cash"]), ""],
+        ["", "MPesa Total", "", float(totals["mpesa"]), ""],
+        ["", "Overall Total", "", float(totals["overall"]), ""],
+    ]
@@ -0,0 +1,91 @@
+# myapp/scopes.py
+"""User dashboard scopes: the clerk's own sales, today's, their auth-group team's, or everyone's."""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import dashboard_cache, partitions
+from .models import Sale
+from .reports import filter_sales_by_dates, sales_totals
+
+OWN = "own"
+TODAY = "today"
+TEAM = "team"
+ALL = "all"
+
+SCOPES = [
+    (OWN, "My orders"),
+    (TODAY, "My orders today"),
+    (TEAM, "My team"),
+    (ALL, "All orders"),
+]
+DEFAULT_SCOPE = OWN
+
+
+def get_scope(request):
+    """The requested scope, else the session's last one, else ``USER_DASHBOARD_DEFAULT_SCOPE``."""
+    valid = {name for name, _ in SCOPES}
+    scope = request.GET.get("scope") or request.session.get("dashboard_scope")
+    if scope not in valid:
+        scope = getattr(settings, "USER_DASHBOARD_DEFAULT_SCOPE", DEFAULT_SCOPE)
+    request.session["dashboard_scope"] = scope
+    return scope
+
+
+def team_ids(user):
+    """Ids of the clerks sharing a group with ``user`` (``user`` included), one query."""
+    ids = set(
+        User.objects.filter(groups__user=user).values_list("id", flat=True)
+    )
+    ids.add(user.id)
+    return sorted(ids)
+
+
+def user_ids(user, scope):
+    """Clerks whose sales ``scope`` shows; None for everyone."""
+    if scope == ALL:
+        return None
+    if scope == TEAM:
+        return team_ids(user)
+    return [user.id]
+
+
+def scoped_sales(user, scope, ids=None, sales=None):
+    """The sales ``scope`` shows to ``user`` (from ``sales``, default the hot table), newest first."""
+    ids = user_ids(user, scope) if ids is None else ids
+    sales = (Sale.objects.all() if sales is None else sales).for_listing()
+    if ids is not None:
+        sales = sales.filter(user_id__in=ids) if len(ids) > 1 else sales.filter(user_id=ids[0])
+    if scope == TODAY:
+        today = timezone.localdate()
+        sales = filter_sales_by_dates(sales, today, today)
+    if ids is not None:
+        return sales.order_by("-date", "-id")  # walks (user, date) backwards
+    return sales.order_by("-id")
+
+
+def recent_sales(user, scope, ids, window):
+    """The newest ``window`` sales of ``scope``: the hot table, then rolled-over months until the window fills."""
+    rows = list(scoped_sales(user, scope, ids)[:window])
+    if len(rows) >= window or scope == TODAY:
+        return rows
+    for part in reversed(partitions.route()[:-1]):
+        rows += scoped_sales(user, scope, ids, part)[:window - len(rows)]
+        if len(rows) >= window:
+            break
+    return rows
+
+
+def cache_area(user, scope):
+    """The cache area whose version covers ``scope``."""
+    return dashboard_cache.user_area(user.id) if scope in (OWN, TODAY) else "sales"
+
+
+def daily_totals(user, day=None):
+    """``reports.sales_totals`` of ``user``'s sales on ``day`` (default today), cached per clerk."""
+    day = day or timezone.localdate()
+    return dashboard_cache.cached(
+        dashboard_cache.user_area(user.id), "user_daily_totals",
+        lambda: sales_totals(filter_sales_by_dates(Sale.objects.filter(user=user), day, day)),
+        user.id, day,
+    )
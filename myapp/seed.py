@@ -0,0 +1,83 @@
+# myapp/seed.py
+"""Synthetic Sale / Expense data for benchmarks."""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .models import Expense, Product, Sale
+
+LOCAL_ITEMS = ["Soda 500ml", "Charcoal bag", "Tap"]
+
+
+def seed_users(count=5, prefix="bench"):
+    users = []
+    for i in range(count):
+        user, _ = User.objects.get_or_create(username=f"{prefix}{i}")
+        users.append(user)
+    return users
+
+
+def seed_sales(count, days=365, users=None, batch_size=5000, rng=None):
+    """Insert ``count`` sales spread over the last ``days`` days."""
+    rng = rng or random.Random(42)
+    users = users or seed_users()
+    products = list(Product.objects.all()) or [None]
+    now = timezone.now()
+    statuses = [s for s, _ in Sale.PAYMENT_STATUS]
+    methods = [m for m, _ in Sale.PAYMENT_METHOD]
+
+    batch = []
+    for _ in range(count):
+        product = rng.choice(products)
+        quantity = rng.randint(1, 5)
+        if product is None or rng.random() < 0.05:
+            item, category, unit = rng.choice(LOCAL_ITEMS), "Water", Decimal(rng.randint(20, 200))
+            product = None
+        else:
+            item, category, unit = product.name, product.category, product.unit_price
+        status = rng.choice(statuses)
+        batch.append(Sale(
+            user=rng.choice(users),
+            product=product,
+            category=category,
+            item=item,
+            quantity=quantity,
+            price=unit * quantity,
+            payment_method=rng.choice(methods),
+            payment_status=status,
+            delivery_place="Town" if status == "Delivery" else "",
+            date=now - timedelta(seconds=rng.randint(0, days * 86400)),
+        ))
+        if len(batch) >= batch_size:
+            Sale.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Sale.objects.bulk_create(batch)
+
+
+def seed_expenses(count, days=365, batch_size=5000, rng=None):
+    """Insert ``count`` expenses spread over the last ``days`` days."""
+    rng = rng or random.Random(7)
+    today = timezone.localdate()
+
+    batch = []
+    for i in range(count):
+        received = Decimal(rng.randint(0, 5000)) if rng.random() < 0.3 else None
+        batch.append(Expense(
+            receipt_no=str(rng.randint(1, count * 10)),
+            date=today - timedelta(days=rng.randint(0, days)),
+            paid_to=f"Supplier {rng.randint(1, 200)}",
+            charges_account="General",
+            description="Synthetic expense",
+            received_amount=received,
+            bank_charges=Decimal("1.50"),
+            amount_paid=Decimal(rng.randint(50, 20000)),
+        ))
+        if len(batch) >= batch_size:
+            Expense.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Expense.objects.bulk_create(batch)
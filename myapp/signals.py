@@ -0,0 +1,106 @@
+# myapp/signals.py
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import catalog, dashboard_cache, feed, ledger, perf, summary
+from .hooks import is_suspended
+from .models import Expense, Product, Sale, SaleEvent
+
+
+# --------------------------
+# Product catalog cache
+# --------------------------
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_catalog(sender, **kwargs):
+    catalog.invalidate()
+
+
+# --------------------------
+# Daily sales rollup
+# --------------------------
+@receiver(pre_save, sender=Sale)
+def remember_stored_sale(sender, instance, raw=False, **kwargs):
+    instance._summary_before = None
+    if instance.pk and not raw and not is_suspended():
+        instance._summary_before = summary.stored_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=Sale)
+def add_sale_to_summary(sender, instance, raw=False, **kwargs):
+    if raw or is_suspended():
+        return
+    before = getattr(instance, "_summary_before", None)
+    if before is not None:
+        summary.add_snapshot(before, sign=-1)
+    if not instance.archived:  # archived sales left the rollup when they were archived
+        summary.add_snapshot(summary.snapshot(instance))
+
+
+@receiver(post_delete, sender=Sale)
+def remove_sale_from_summary(sender, instance, **kwargs):
+    if not is_suspended() and not instance.archived:
+        summary.add_snapshot(summary.snapshot(instance), sign=-1)
+
+
+# --------------------------
+# Expense running balances
+# --------------------------
+@receiver(pre_save, sender=Expense)
+def remember_stored_expense_date(sender, instance, raw=False, **kwargs):
+    instance._ledger_date_before = None
+    if instance.pk and not raw and not is_suspended():
+        instance._ledger_date_before = (
+            Expense.objects.filter(pk=instance.pk).values_list("date", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Expense)
+def recalculate_balances_after_save(sender, instance, raw=False, **kwargs):
+    if raw or is_suspended():
+        return
+    dates = [ledger.as_date(instance.date), getattr(instance, "_ledger_date_before", None)]
+    ledger.recalculate_from(min(d for d in dates if d is not None))
+
+
+@receiver(post_delete, sender=Expense)
+def recalculate_balances_after_delete(sender, instance, **kwargs):
+    if not is_suspended():
+        ledger.recalculate_from(ledger.as_date(instance.date))
+
+
+# --------------------------
+# Dashboard cache versions
+# --------------------------
+@receiver(post_save, sender=Sale)
+@receiver(post_delete, sender=Sale)
+def bump_sales_cache(sender, instance, raw=False, **kwargs):
+    if not raw and not is_suspended():
+        dashboard_cache.bump("sales")
+        dashboard_cache.bump_users([instance.user_id])
+
+# Expense saves/deletes bump "expenses" through ledger.recalculate_from above
+
+
+# --------------------------
+# Live dashboard feed
+# --------------------------
+@receiver(post_save, sender=Sale)
+def log_sale_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not is_suspended():
+        feed.record(SaleEvent.CREATED if created else SaleEvent.UPDATED, [(instance.pk, instance.user_id)])
+
+
+@receiver(post_delete, sender=Sale)
+def log_sale_deleted(sender, instance, **kwargs):
+    if not is_suspended() and not instance.archived:
+        feed.record(SaleEvent.DELETED, [(instance.pk, instance.user_id)])
+
+
+# --------------------------
+# Per-request SQL timing (PerformanceMiddleware)
+# --------------------------
+@receiver(connection_created)
+def time_queries(sender, connection, **kwargs):
+    perf.install_query_timer(connection)
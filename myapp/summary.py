@@ -0,0 +1,203 @@
+# myapp/summary.py
+"""
+Incremental maintenance of ``DailySalesSummary``.
+
+Each summary row holds the counts and sums of the sales sharing a
+(day, category, product, payment method, payment status) key. Sale saves and
+deletes apply deltas through the signals in ``myapp/signals.py``; bulk paths
+(``bulk_create``, queryset deletes) go through ``add_sales`` /
+``delete_with_rollup``. Rows are always summed when read, so a duplicate key
+row created by a race only splits a total, never changes it.
+"""
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import dashboard_cache, feed
+from .hooks import suspended
+from .models import DailySalesSummary, Sale, SaleEvent
+
+KEY_FIELDS = ("category", "product_id", "payment_method", "payment_status")
+
+
+def _day(value):
+    if not isinstance(value, datetime):
+        return value
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date()
+
+
+def apply_delta(key, sales_count, quantity, amount, litres):
+    """Add the given deltas to the summary row for ``key``, creating it if needed."""
+    if not sales_count and not quantity and not amount:
+        return
+    rows = DailySalesSummary.objects.filter(**key)
+    updated = rows.update(
+        sales_count=F("sales_count") + sales_count,
+        quantity=F("quantity") + quantity,
+        amount=F("amount") + amount,
+        litres=F("litres") + litres,
+        updated_at=timezone.now(),  # update() skips auto_now
+    )
+    if not updated:
+        DailySalesSummary.objects.create(
+            **key, sales_count=sales_count, quantity=quantity, amount=amount, litres=litres
+        )
+    elif sales_count < 0:
+        rows.filter(sales_count__lte=0).delete()
+
+
+# --------------------------
+# Single rows (signals)
+# --------------------------
+def sale_key(date, category, product_id, payment_method, payment_status):
+    return {
+        "date": _day(date),
+        "category": category or "",
+        "product_id": product_id,
+        "payment_method": payment_method or "",
+        "payment_status": payment_status or "",
+    }
+
+
+def sale_measures(quantity, price, unit_volume):
+    quantity = int(quantity or 0)
+    return quantity, Decimal(price or 0), Decimal(unit_volume or 0) * quantity
+
+
+def snapshot(sale):
+    """The (key, measures) a sale instance contributes to the rollup."""
+    unit_volume = sale.product.unit_volume_litres if sale.product_id else None
+    key = sale_key(sale.date, sale.category, sale.product_id, sale.payment_method, sale.payment_status)
+    return key, sale_measures(sale.quantity, sale.price, unit_volume)
+
+
+def stored_snapshot(pk):
+    """The (key, measures) of the sale as currently stored, or None."""
+    row = Sale.objects.filter(pk=pk).values(
+        "date", "category", "product_id", "payment_method", "payment_status",
+        "quantity", "price", "product__unit_volume_litres",
+    ).first()
+    if row is None:
+        return None
+    key = sale_key(row["date"], row["category"], row["product_id"], row["payment_method"], row["payment_status"])
+    return key, sale_measures(row["quantity"], row["price"], row["product__unit_volume_litres"])
+
+
+def add_snapshot(snap, sign=1):
+    key, (quantity, amount, litres) = snap
+    apply_delta(key, sign, sign * quantity, sign * amount, sign * litres)
+
+
+# --------------------------
+# Bulk paths
+# --------------------------
+def add_sales(sales, sign=1):
+    """Apply a batch of sale instances (e.g. after ``bulk_create``) in one delta per key."""
+    totals = defaultdict(lambda: [0, 0, Decimal(0), Decimal(0)])
+    for sale in sales:
+        key, (quantity, amount, litres) = snapshot(sale)
+        bucket = totals[tuple(key.items())]
+        bucket[0] += sign
+        bucket[1] += sign * quantity
+        bucket[2] += sign * amount
+        bucket[3] += sign * litres
+    for key, (sales_count, quantity, amount, litres) in totals.items():
+        apply_delta(dict(key), sales_count, quantity, amount, litres)
+    dashboard_cache.bump("sales")
+    dashboard_cache.bump_users(sale.user_id for sale in sales)
+
+
+def grouped_rows(sales):
+    """Aggregate a Sale queryset into summary-shaped dicts in one query."""
+    return (
+        sales.order_by()
+        .annotate(day=TruncDate("date"))
+        .values("day", *KEY_FIELDS)
+        .annotate(
+            n=Count("id"),
+            qty=Coalesce(Sum("quantity"), Value(0)),
+            total=Coalesce(Sum("price"), Value(Decimal(0)), output_field=DecimalField()),
+            vol=Coalesce(
+                Sum(F("quantity") * F("product__unit_volume_litres")),
+                Value(Decimal(0)),
+                output_field=DecimalField(),
+            ),
+        )
+    )
+
+
+def subtract_sales(sales):
+    """Take a Sale queryset out of the rollup with one grouped query."""
+    for row in grouped_rows(sales):
+        key = sale_key(row["day"], row["category"], row["product_id"],
+                       row["payment_method"], row["payment_status"])
+        apply_delta(key, -row["n"], -row["qty"], -row["total"], -row["vol"])
+
+
+def _removed(sale_users):
+    dashboard_cache.bump("sales")
+    dashboard_cache.bump_users(user_id for _, user_id in sale_users)
+    feed.record(SaleEvent.DELETED, sale_users)
+
+
+def delete_with_rollup(sales):
+    """Delete a Sale queryset, subtracting it from the rollup with one grouped query."""
+    with transaction.atomic():
+        subtract_sales(sales)
+        sale_users = list(sales.values_list("id", "user_id"))
+        with suspended():
+            deleted = sales.delete()
+        _removed(sale_users)
+        return deleted
+
+
+def archive_with_rollup(sales):
+    """Archive (soft-delete) a live Sale queryset: out of the rollup, the listings and the feed."""
+    with transaction.atomic():
+        subtract_sales(sales)
+        sale_users = list(sales.values_list("id", "user_id"))
+        archived = sales.update(archived=True)
+        _removed(sale_users)
+        return archived
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute the summary rows for ``start``..``end`` (inclusive days, None = open),
+    from the hot table and the monthly partitions in that range.
+    """
+    from .partitions import route
+
+    summaries = DailySalesSummary.objects.all()
+    if start:
+        summaries = summaries.filter(date__gte=start)
+    if end:
+        summaries = summaries.filter(date__lte=end)
+
+    with transaction.atomic():
+        deleted, _ = summaries.delete()
+        rows = [
+            DailySalesSummary(
+                date=row["day"],
+                category=row["category"] or "",
+                product_id=row["product_id"],
+                payment_method=row["payment_method"] or "",
+                payment_status=row["payment_status"] or "",
+                sales_count=row["n"],
+                quantity=row["qty"],
+                amount=row["total"],
+                litres=row["vol"],
+            )
+            for part in route(start, end)
+            for row in grouped_rows(part)
+        ]
+        DailySalesSummary.objects.bulk_create(rows, batch_size=1000)
+    dashboard_cache.bump("sales")
+    return deleted, len(rows)
@@ -1,3 +1,1243 @@
-from django.test import TestCase
+import io
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from importlib import import_module
+from pathlib import Path
+from types import SimpleNamespace
 
-# Create your tests here.
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.db.models import Max, Sum
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook, load_workbook
+
+from . import (
+    benchmarks, bulk, catalog, dashboard_cache, feed, idempotency, ingest, jobs, ledger, orders, partitions,
+    pdf_reports, perf, scopes, summary,
+)
+from .management.commands.copy_from_sqlite import SOURCE_ALIAS, close_source, open_source
+from .models import (
+    ArchivedSale, DailySalesSummary, Expense, IdempotencyKey, ImportJob, Product, Sale, SalePartition,
+)
+from .pagination import EXPENSE_ORDER, SALE_ORDER, decode_cursor, encode_cursor, keyset_page
+from .reports import sales_totals, summary_totals
+from .summary import delete_with_rollup
+
+
+def make_sale(user, item="5L (R)", quantity=1, price="70.00", method="Cash", status="Paid", **fields):
+    """An unsaved Sale linked to its catalog product, for ``bulk_create`` or ``save``."""
+    fields.setdefault("category", "Gas" if "gas" in item.lower() else "Water")
+    return Sale(user=user, item=item, product=catalog.get_product(item), quantity=quantity, price=Decimal(price),
+                payment_method=method, payment_status=status, **fields)
+
+
+class SalesListQueryCountTests(TestCase):
+    """Listing N sales must not fire one extra query per row (N+1)."""
+
+    LIST_VIEWS = ["user_dashboard", "admin_dashboard", "sales_report"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        cls.clerks = [User.objects.create_user(f"clerk{i}", password="pw") for i in range(5)]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_sales(self, count):
+        Sale.objects.bulk_create([
+            Sale(
+                user=self.clerks[i % len(self.clerks)],
+                category="Water",
+                item="5L (R)",
+                quantity=1,
+                price=70,
+                payment_method="Cash",
+                payment_status="Paid",
+            )
+            for i in range(count)
+        ])
+        dashboard_cache.bump("sales")  # bulk_create skips the signals
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for name in self.LIST_VIEWS:
+            with self.subTest(view=name):
+                Sale.objects.all().delete()
+                url = reverse(name)
+                self.add_sales(2)
+                self.client.get(url)  # warm per-process caches (product catalog)
+                dashboard_cache.bump("sales")  # but measure an uncached render
+                baseline = self.count_queries(url)
+
+                self.add_sales(20)
+                with self.assertNumQueries(baseline):
+                    self.client.get(url)
+
+
+class SalesTotalsTests(TestCase):
+    """The report totals are one conditional-aggregation query, live or from the rollup."""
+
+    def setUp(self):
+        clerk = User.objects.create_user("clerk", password="pw")
+        for sale in (
+            make_sale(clerk, "5L (R)", 2, "140.00"),
+            make_sale(clerk, "20L  Bottle", 1, "500.00", method="MPesa"),
+            make_sale(clerk, "Pro Gas 6kg", 1, "1000.00", status="Delivery"),
+            make_sale(clerk, "Burner", 1, "350.00", method="mpesa"),  # local item, no product
+        ):
+            sale.save()
+
+    def test_totals_in_one_query(self):
+        expected = {
+            "count": 4, "overall": Decimal("1990.00"), "cash": Decimal("1140.00"), "mpesa": Decimal("850.00"),
+            "r_litres": 2, "r_volume": Decimal("10.00"), "r_amount": Decimal("140.00"),
+            "delivery_qty": 1, "delivery_amount": Decimal("1000.00"), "gas_qty": 1, "gas_amount": Decimal("1000.00"),
+            "bottle_qty": 1, "bottle_amount": Decimal("500.00"),
+        }
+        with self.assertNumQueries(1):
+            self.assertEqual(sales_totals(Sale.objects.all()), expected)
+        self.assertEqual(summary_totals(), expected)
+
+        self.client.force_login(User.objects.create_superuser("admin", password="pw"))
+        export = self.client.get(reverse("admin_sales_excel"))
+        sheet = load_workbook(io.BytesIO(b"".join(export.streaming_content))).active
+        rows = {row[0] or row[1]: row[2:4] for row in sheet.iter_rows(min_row=6, values_only=True) if any(row)}
+        self.assertEqual(rows["TOTAL (R only)"], (2, 140))
+        self.assertEqual(rows["TOTAL Gas"], (1, 1000))
+        self.assertEqual(rows["Overall Total"], (None, 1990))
+
+
+class SalesRollupTests(TestCase):
+    """Every write path moves the daily rollup exactly as a full rebuild would."""
+
+    FIELDS = ("date", "category", "product_id", "payment_method", "payment_status",
+              "sales_count", "quantity", "amount", "litres")
+
+    def setUp(self):
+        self.clerk = User.objects.create_user("clerk", password="pw")
+
+    def assertRollupMatchesRebuild(self):
+        rollup = list(DailySalesSummary.objects.values_list(*self.FIELDS))
+        summary.rebuild()
+        self.assertCountEqual(rollup, DailySalesSummary.objects.values_list(*self.FIELDS))
+
+    def test_create_edit_delete_and_archive(self):
+        sales = [make_sale(self.clerk, "5L (R)", 2, "140.00"), make_sale(self.clerk, "Pro Gas 6kg", 1, "1000.00")]
+        for sale in sales:
+            sale.save()
+        self.assertRollupMatchesRebuild()
+        self.assertEqual(summary_totals()["r_volume"], Decimal("10.00"))
+
+        refill, gas = sales
+        refill.quantity, refill.price, refill.payment_method = 3, Decimal("210.00"), "MPesa"
+        refill.save()
+        self.assertRollupMatchesRebuild()
+        gas.item, gas.date = "20L  Bottle", gas.date - timedelta(days=1)  # other product, other day
+        gas.save()
+        self.assertRollupMatchesRebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            orders.place_order(self.clerk, [SaleFeedTests.LINE] * 3)  # bulk_create, one delta
+        self.assertRollupMatchesRebuild()
+
+        summary.archive_with_rollup(Sale.objects.filter(pk=refill.pk))
+        self.assertRollupMatchesRebuild()
+        gas.delete()
+        self.assertRollupMatchesRebuild()
+        delete_with_rollup(Sale.objects.all())
+        self.assertEqual(DailySalesSummary.objects.count(), 0)
+        self.assertEqual(summary_totals()["overall"], Decimal("0"))
+
+
+class AsyncReportViewTests(TestCase):
+    """Under ASGI the report views read through the async ORM and stream async generators."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        for sale in (make_sale(self.admin, "5L (R)", 2, "140.00"), make_sale(self.admin, "Pro Gas 6kg", 1, "1000.00")):
+            sale.save()
+        Expense.objects.create(receipt_no="R1", date="2024-01-02", paid_to="Supplier", description="Stock",
+                               amount_paid=Decimal("10.00"))
+
+    async def read(self, response):
+        self.assertTrue(response.is_async)
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    async def test_totals_report_and_exports(self):
+        await self.async_client.aforce_login(self.admin)
+
+        totals = (await self.async_client.get(reverse("admin_dashboard_totals"))).json()
+        self.assertEqual(Decimal(totals["sales"]["overall"]), Decimal("1140.00"))
+        self.assertEqual(totals["sales"]["r_litres"], "2")
+        self.assertEqual(Decimal(totals["total_expenses"]), Decimal("10.00"))
+
+        today = timezone.localdate().isoformat()
+        report = await self.async_client.get(reverse("sales_report"), {"start_date": today, "end_date": today})
+        self.assertEqual(len(report.context["sales"]), 2)
+        self.assertEqual(report.context["total_amount"], Decimal("1140.00"))
+
+        sales = load_workbook(io.BytesIO(await self.read(await self.async_client.get(reverse("admin_sales_excel")))))
+        self.assertEqual([row[1] for row in sales.active.iter_rows(min_row=2, max_row=3, values_only=True)],
+                         ["5L (R)", "Pro Gas 6kg"])
+        expenses = await self.read(await self.async_client.get(reverse("admin_expenses_excel")))
+        rows = list(load_workbook(io.BytesIO(expenses)).active.iter_rows(min_row=2, values_only=True))
+        self.assertEqual(rows[0][0], "R1")
+
+
+class PerformanceMiddlewareTests(TestCase):
+    """Every response carries Server-Timing; the per-URL window is readable at perf_stats."""
+
+    def setUp(self):
+        perf.STATS.reset()
+        self.addCleanup(perf.STATS.reset)
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(self.admin)
+        make_sale(self.admin).save()
+
+    def test_headers_and_rolling_stats(self):
+        with CaptureQueriesContext(connection) as queries, override_settings(PERF_SLOW_REQUEST_MS=0):
+            with self.assertLogs("myapp.middleware", "WARNING") as logs:
+                response = self.client.get(reverse("admin_dashboard"))
+        count = len(queries)  # the next request resets connection.queries
+        timing = response["Server-Timing"]
+        self.assertRegex(timing, r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertIn(f'"{count} queries"', timing)
+        self.assertIn("Slow request GET /admin-dashboard/ (admin_dashboard)", logs.output[0])
+
+        export = self.client.get(reverse("admin_sales_excel"))
+        self.assertIn("Server-Timing", export)
+        self.assertNotIn("admin_sales_excel", perf.STATS.snapshot())  # recorded once fully sent
+        size = len(b"".join(export.streaming_content))
+
+        urls = self.client.get(reverse("perf_stats")).json()["urls"]
+        self.assertEqual(urls["admin_dashboard"]["requests"], 1)
+        self.assertEqual(urls["admin_dashboard"]["max_queries"], count)
+        self.assertEqual(urls["admin_sales_excel"]["avg_bytes"], size)
+        self.assertEqual(sum(urls["admin_dashboard"]["histogram_ms"].values()), 1)
+
+
+class DashboardCacheTests(TestCase):
+    """Versions and hit counters are cache counters: add once, then incr."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_versions_count_up_and_restart_above_an_expired_one(self):
+        first = dashboard_cache.version("sales")
+        with self.captureOnCommitCallbacks(execute=True):
+            dashboard_cache.bump("sales")
+        self.assertEqual(dashboard_cache.version("sales"), first + 2)  # now and on commit
+
+        cache.delete(dashboard_cache._version_key("sales"))  # expired
+        self.assertGreater(dashboard_cache.version("sales"), first + 2)
+
+    def test_stats_count_and_reset(self):
+        build = lambda: 42
+        for _ in range(3):
+            dashboard_cache.cached("sales", "sales_totals", build)
+        self.assertEqual(dashboard_cache.stats(), {"sales_totals": {"hits": 2, "misses": 1, "hit_rate": 0.667}})
+
+        dashboard_cache.reset_stats()
+        self.assertEqual(dashboard_cache.stats(), {})
+        dashboard_cache.cached("sales", "sales_totals", build)
+        self.assertEqual(dashboard_cache.stats()["sales_totals"]["hits"], 1)
+
+
+class BenchmarkSuiteTests(TestCase):
+    """Small-volume run of the benchmark suite (``manage.py benchmark`` for real numbers)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        benchmarks.seed(sales=200, expenses=50, days=30)
+
+    def test_every_scenario_succeeds_and_reports_stats(self):
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        results = benchmarks.run_benchmarks(repeat=3, warmup=0, upload_rows=20, user=self.admin, media_dir=media)
+
+        self.assertTrue(os.path.isdir(os.path.join(media, "imports")))  # uploads went here, not MEDIA_ROOT
+
+        self.assertEqual(list(results), benchmarks.SCENARIOS)
+        for name, stats in results.items():
+            with self.subTest(scenario=name):
+                self.assertEqual(stats["status"], [200])
+                self.assertEqual(stats["runs"], 3)
+                self.assertLessEqual(stats["min_ms"], stats["p50_ms"])
+                self.assertLessEqual(stats["p50_ms"], stats["p95_ms"])
+                self.assertGreater(stats["queries"], 0)
+                self.assertGreater(stats["peak_kb"], 0)
+                self.assertGreater(stats["bytes"], 0)
+
+    def test_compare_flags_slower_or_chattier_scenarios(self):
+        baseline = {
+            "sales_report": {"p50_ms": 10.0, "queries": 2},
+            "admin_dashboard": {"p50_ms": 10.0, "queries": 4},
+            "user_dashboard": {"p50_ms": 10.0, "queries": 3},
+        }
+        results = {
+            "sales_report": {"p50_ms": 11.0, "queries": 2},     # within tolerance
+            "admin_dashboard": {"p50_ms": 20.0, "queries": 4},  # slower
+            "user_dashboard": {"p50_ms": 9.0, "queries": 4},    # one more query
+            "upload_expense": {"p50_ms": 50.0, "queries": 9},   # not in the baseline
+        }
+        rows, regressions = benchmarks.compare(results, baseline, tolerance=0.25)
+
+        self.assertEqual([row["scenario"] for row in rows], ["sales_report", "admin_dashboard", "user_dashboard"])
+        self.assertEqual(regressions, ["admin_dashboard", "user_dashboard"])
+
+
+class SQLiteConcurrencyTests(TransactionTestCase):
+    """Orders keep going through while exports read (WAL, busy timeout, IMMEDIATE)."""
+
+    serialized_rollback = True  # keep the migrated Product catalog for later tests
+    WRITERS = 4
+    ORDERS_PER_WRITER = 15
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.clerks = [User.objects.create_user(f"clerk{i}", password="pw") for i in range(self.WRITERS)]
+        benchmarks.seed(sales=2000, expenses=200, days=30)
+        self.client.force_login(self.admin)
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "SQLite pragmas")
+    def test_connection_pragmas(self):
+        with connection.cursor() as cursor:
+            pragmas = {
+                name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "temp_store")
+            }
+        self.assertEqual(pragmas["journal_mode"], "wal")
+        self.assertEqual(pragmas["synchronous"], 1)  # NORMAL
+        self.assertEqual(pragmas["busy_timeout"], 20000)
+        self.assertEqual(pragmas["cache_size"], -64 * 1024)
+        self.assertEqual(pragmas["temp_store"], 2)  # MEMORY
+
+    def test_orders_while_exporting(self):
+        before = Sale.objects.count()
+        errors = []
+        start = threading.Barrier(self.WRITERS + 1)
+
+        def place_orders(clerk):
+            try:
+                client = Client()
+                client.force_login(clerk)
+                start.wait()
+                for _ in range(self.ORDERS_PER_WRITER):
+                    response = client.post(reverse("user_dashboard"), {
+                        "category": "Water", "item": "5L (R)", "quantity": "2",
+                        "payment_method": "Cash", "payment_status": "Paid",
+                    })
+                    if response.status_code != 302:
+                        errors.append(f"HTTP {response.status_code}")
+            except Exception as exc:  # "database is locked" would land here
+                errors.append(repr(exc))
+            finally:
+                connections.close_all()
+
+        writers = [threading.Thread(target=place_orders, args=(clerk,)) for clerk in self.clerks]
+        for thread in writers:
+            thread.start()
+        start.wait()
+
+        exports = 0
+        while exports < 2 or any(thread.is_alive() for thread in writers):
+            response = self.client.get(reverse("admin_sales_excel"))
+            content = b"".join(response.streaming_content)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(content.startswith(b"PK"))
+            exports += 1
+        for thread in writers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(Sale.objects.count(), before + self.WRITERS * self.ORDERS_PER_WRITER)
+
+
+class ExpenseImportTests(TestCase):
+    """Expense files are normalised, written in chunks and rebalanced."""
+
+    CSV = (
+        "R. No,Date,Paid To,Amount Paid\n"
+        "R1,02/01/2024,Supplier,10\n"
+        "R2,03/01/2024,Supplier,10\n"
+        "R3,04/01/2024,Supplier,10\n"
+        "R4,05/01/2024,,10\n"
+    )
+
+    def frame(self, *amounts, day="02/01/2024"):
+        return pd.DataFrame({
+            "R. No": [f"R{i}" for i in range(len(amounts))],
+            "Date": [day] * len(amounts),
+            "Paid To": ["Supplier"] * len(amounts),
+            "Amount Paid": list(amounts),
+            "C. Balance": [0] * len(amounts),
+        })
+
+    def test_normalisation_and_skip_counts(self):
+        df = ingest.clean_columns(pd.DataFrame({
+            "R.\xa0No ": [101, "R2", "R3", "R4", "R5", "R6"],
+            "Date": ["05/01/2024", "2024-01-06", "not a date", "07/01/2024", "08/01/2024", "09/01/2024"],
+            "Paid To": ["Supplier", "  Fuel Co", "Supplier", "   ", "Supplier", "Supplier"],
+            "Amount Paid": ["1,000", 12.3456, 10, 10, 0, "abc"],
+            "Received Amnt": [None, 50, None, None, None, None],
+            "Description": [None, "Diesel", None, None, None, None],
+        }))
+        frame, skipped = ingest.normalize_expense_frame(df)
+        # "1,000" is not a number either: only row 2 has a date, a payee and a non-zero amount
+        self.assertEqual((len(frame), skipped), (1, 5))
+
+        result = ingest.ingest_expenses(df)
+        self.assertEqual((result.created, result.skipped, result.rows, result.chunks), (1, 5, 6, 1))
+        expense = Expense.objects.get()
+        self.assertEqual(
+            (expense.receipt_no, expense.date.isoformat(), expense.paid_to, expense.description,
+             expense.amount_paid, expense.received_amount, expense.bank_charges),
+            ("R2", "2024-01-06", "  Fuel Co", "Diesel", Decimal("12.35"), Decimal("50.00"), None),
+        )
+        self.assertEqual(expense.cumulative_balance, Decimal("37.65"))
+
+        numbers = ingest.normalize_expense_frame(self.frame(10, 20, day="31/01/2024"))[0]
+        self.assertEqual(list(numbers["date"].map(str)), ["2024-01-31", "2024-01-31"])  # day first
+        self.assertEqual(list(numbers["receipt_no"]), ["R0", "R1"])
+        cells = ingest.normalize_expense_frame(pd.DataFrame({  # Excel date cells
+            "Date": [datetime(2024, 1, 6)], "Paid To": ["Supplier"], "Amount Paid": [1],
+        }))[0]
+        self.assertEqual(str(cells["date"].iloc[0]), "2024-01-06")
+
+    def test_csv_and_xlsx_stream_in_bounded_chunks(self):
+        csv = SimpleUploadedFile("statement.csv", self.CSV.encode())
+        self.assertEqual([len(df) for df in ingest.iter_expense_chunks(csv, chunk_size=3)], [3, 1])
+
+        book = Workbook()
+        sheet = book.active
+        sheet.append(["R.\xa0No", "Date", "Paid To", "Amount Paid"])
+        for i in range(5):
+            sheet.append([f"R{i}", datetime(2024, 1, i + 1), "Supplier", 10])
+            sheet.append([None, None, None, None])  # blank rows are dropped, not counted
+        sheet.append(["R9", datetime(2024, 1, 9)])  # short row: padded, then skipped (no payee)
+        data = io.BytesIO()
+        book.save(data)
+
+        xlsx = SimpleUploadedFile("statement.xlsx", data.getvalue())
+        chunks = list(ingest.iter_expense_chunks(xlsx, chunk_size=2))
+        self.assertEqual([len(df) for df in chunks], [2, 2, 2])
+        self.assertEqual(list(chunks[0].columns), ["R. No", "Date", "Paid To", "Amount Paid"])
+
+        xlsx.seek(0)
+        result = ingest.import_expense_file(xlsx, chunk_size=2)
+        self.assertEqual((result.chunks, result.rows, result.created, result.skipped), (3, 6, 5, 1))
+        self.assertEqual(Expense.objects.order_by("date").last().cumulative_balance, Decimal("-50.00"))
+        self.assertTrue({"read", "normalize", "write", "balances"} <= set(result.timings))
+
+    def test_committed_chunks_are_rebalanced_when_a_later_one_fails(self):
+        def chunks():
+            yield self.frame(10, 10)
+            raise ValueError("unreadable row")
+
+        with self.assertRaises(ValueError):
+            ingest.ingest_expense_chunks(chunks(), atomic=False)
+        self.assertEqual(
+            list(Expense.objects.order_by("id").values_list("cumulative_balance", flat=True)),
+            [Decimal("-10.00"), Decimal("-20.00")],
+        )
+
+
+class ExpenseLedgerTests(TestCase):
+    """Running balances are recalculated from the earliest changed date only."""
+
+    def expense(self, day, receipt_no, paid=0, received=0):
+        return Expense.objects.create(receipt_no=receipt_no, date=f"2024-01-{day:02d}", paid_to="Supplier",
+                                      description="", amount_paid=Decimal(paid), received_amount=Decimal(received))
+
+    def balances(self):
+        return list(Expense.objects.order_by(*ledger.ORDER).values_list("receipt_no", "cumulative_balance"))
+
+    def test_out_of_order_inserts_and_edits(self):
+        self.expense(1, "R1", received=100)
+        self.expense(5, "R5", paid=10)
+        self.expense(7, "R7", paid=20)
+        late = self.expense(3, "R3", paid=30)  # entered after the rows it precedes
+        self.assertEqual(self.balances(), [
+            ("R1", Decimal("100.00")), ("R3", Decimal("70.00")), ("R5", Decimal("60.00")), ("R7", Decimal("40.00")),
+        ])
+
+        # Bulk rows skip the signals: recalculate from their date, leaving earlier rows alone
+        Expense.objects.bulk_create([
+            Expense(receipt_no=receipt_no, date="2024-01-05", paid_to="Supplier", description="",
+                    amount_paid=Decimal("5.00"))
+            for receipt_no in ("R4", None)
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(ledger.recalculate_from(ledger.as_date("2024-01-05")), 4)
+        window = [q["sql"] for q in queries if " OVER " in q["sql"]]
+        self.assertEqual(len(window), 1)
+        self.assertIn('"date" >=', window[0])  # the running sum only reads rows from that date
+        self.assertEqual(self.balances(), [
+            ("R1", Decimal("100.00")), ("R3", Decimal("70.00")), (None, Decimal("65.00")), ("R4", Decimal("60.00")),
+            ("R5", Decimal("50.00")), ("R7", Decimal("30.00")),
+        ])
+
+        # Moving a row later recalculates from its old date
+        late.date = "2024-01-06"
+        late.save()
+        self.assertEqual(self.balances()[:4], [
+            ("R1", Decimal("100.00")), (None, Decimal("95.00")), ("R4", Decimal("90.00")), ("R5", Decimal("80.00")),
+        ])
+        self.assertEqual(Expense.objects.get(receipt_no="R7").cumulative_balance, Decimal("30.00"))
+
+
+class ImportJobTests(TestCase):
+    """Background expense imports: only their owner sees them, and a dead worker's job is picked up again."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=tmp.name))
+        self.clerk = User.objects.create_user("clerk", password="pw")
+
+    def job(self, **fields):
+        job = ImportJob(user=self.clerk, original_name="statement.csv", **fields)
+        job.file.save("statement.csv", ContentFile(ExpenseImportTests.CSV.encode()), save=False)
+        job.save()
+        return job
+
+    def test_status_is_for_the_owner_and_superusers(self):
+        url = reverse("import_job_status", args=[self.job().pk])
+        self.assertEqual(self.client.get(url).status_code, 302)  # to the login page
+
+        self.client.force_login(User.objects.create_user("other", password="pw"))
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.clerk)
+        self.assertEqual(self.client.get(url).json()["status"], ImportJob.PENDING)
+        self.client.force_login(User.objects.create_superuser("admin", password="pw"))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_stale_running_job_resumes_after_the_committed_rows(self):
+        # A worker died after committing the first chunk (one row)
+        Expense.objects.create(receipt_no="R1", date="2024-01-02", paid_to="Supplier",
+                               description="", amount_paid=Decimal("10.00"))
+        long_ago = timezone.now() - timedelta(hours=1)
+        job = self.job(status=ImportJob.RUNNING, started_at=long_ago, heartbeat_at=long_ago,
+                       rows_processed=1, created_rows=1)
+        fresh = self.job(status=ImportJob.RUNNING, started_at=timezone.now(), heartbeat_at=timezone.now())
+
+        with self.assertLogs("myapp.jobs", "WARNING") as logs:
+            jobs.process_pending_jobs()
+        self.assertEqual(logs.output, [
+            "WARNING:myapp.jobs:Re-queued 1 import job(s) left running by a stopped worker",
+        ])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_processed, job.created_rows, job.skipped_rows),
+                         (ImportJob.DONE, 4, 3, 1))
+        self.assertEqual(
+            list(Expense.objects.order_by("date").values_list("receipt_no", "cumulative_balance")),
+            [("R1", Decimal("-10.00")), ("R2", Decimal("-20.00")), ("R3", Decimal("-30.00"))],
+        )
+        fresh.refresh_from_db()
+        self.assertEqual(fresh.status, ImportJob.RUNNING)  # its worker is still reporting
+
+
+class PdfReportTests(TestCase):
+    """Rendered PDFs are keyed on what the database holds, not on a per-process counter."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(PDF_REPORT_DIR=tmp.name, PDF_REPORTS_EAGER=True))
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(self.admin)
+        self.expense = Expense.objects.create(receipt_no="R1", date="2024-01-02", paid_to="Supplier",
+                                              description="Stock", amount_paid=Decimal("10.00"))
+
+    def test_cache_key_follows_the_data(self):
+        path = pdf_reports.report_path()
+        dashboard_cache.bump("expenses")  # another process' counter: same data, same file
+        self.assertEqual(pdf_reports.report_path(), path)
+
+        self.expense.description = "Stock and crates"
+        self.expense.save()
+        self.assertNotEqual(pdf_reports.report_path(), path)
+        self.assertNotEqual(pdf_reports.report_path(start=timezone.datetime(2024, 1, 3).date()),
+                            pdf_reports.report_path())
+
+    def test_cache_key_follows_edits_that_keep_the_totals(self):
+        other = Expense.objects.create(receipt_no="R2", date="2024-01-02", paid_to="Carrier",
+                                       description="Fuel", amount_paid=Decimal("25.00"))
+        path = pdf_reports.report_path()
+
+        self.expense.paid_to = "Supplies"  # same length
+        self.expense.save()
+        edited = pdf_reports.report_path()
+        self.assertNotEqual(edited, path)
+
+        self.expense.amount_paid, other.amount_paid = other.amount_paid, self.expense.amount_paid
+        self.expense.save()
+        other.save()
+        self.assertNotEqual(pdf_reports.report_path(), edited)
+
+    @override_settings(PDF_REPORTS_EAGER=False, PDF_REPORT_WORKERS=1)
+    def test_rendered_off_the_request_then_served_from_disk(self):
+        self.addCleanup(self.stop_workers)
+        url = reverse("admin_dashboard_pdf")
+        pending = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual((pending.status_code, pending.json()), (202, {"status": "pending"}))
+
+        future = pdf_reports._pending.get(pdf_reports.report_path())
+        if future is not None:
+            future.result(timeout=60)
+        with CaptureQueriesContext(connection) as queries:
+            ready = self.client.get(url)
+        self.assertEqual(ready["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(ready.streaming_content).startswith(b"%PDF"))
+        self.assertFalse([q for q in queries if "myapp_expense" in q["sql"] and "MAX(" not in q["sql"]])
+
+    def stop_workers(self):
+        if pdf_reports._executor is not None:
+            pdf_reports._executor.shutdown()
+            pdf_reports._executor = None
+
+    def test_superseded_renders_outlive_the_grace_period(self):
+        first = self.client.get(reverse("admin_dashboard_pdf"))
+        self.assertEqual(first["Content-Type"], "application/pdf")
+        old = pdf_reports.report_path()
+        Expense.objects.create(receipt_no="R2", date="2024-01-03", paid_to="Supplier",
+                               description="Stock", amount_paid=Decimal("5.00"))
+        self.client.get(reverse("admin_dashboard_pdf"))
+        self.assertTrue(os.path.exists(old))  # may still be being served elsewhere
+
+        with override_settings(PDF_REPORT_STALE_GRACE_SECONDS=-1):
+            self.client.get(reverse("admin_dashboard_pdf"))
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(pdf_reports.report_path()))
+
+
+class CopyFromSQLiteTests(TestCase):
+    """copy_from_sqlite moves users, sales and expenses into whichever database is configured."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(close_source)
+        self.source = Path(tmp.name) / "source.sqlite3"
+        open_source(self.source)
+        call_command("migrate", database=SOURCE_ALIAS, verbosity=0)
+
+        users = User.objects.using(SOURCE_ALIAS)
+        self.clerk = users.create(username="clerk", password="hash")
+        users.create(username="admin", password="hash", is_superuser=True, is_staff=True)
+        # A product only the source has, with an id the target hands out to something else
+        special = Product.objects.using(SOURCE_ALIAS).create(name="Special 1L", category="Water", unit_price=99)
+        Product.objects.create(name="Target only", category="Gas", unit_price=1)
+        Sale.objects.using(SOURCE_ALIAS).bulk_create([
+            Sale(user=self.clerk, product=special, category="Water", item="Special 1L",
+                 quantity=i + 1, price=Decimal("99.00") * (i + 1), payment_method="Cash", payment_status="Paid")
+            for i in range(5)
+        ])
+        Expense.objects.using(SOURCE_ALIAS).bulk_create([
+            Expense(receipt_no=f"R{i}", date=f"2024-01-0{i + 1}", paid_to="Supplier",
+                    description="Stock", amount_paid=Decimal("10.00"))
+            for i in range(3)
+        ])
+
+    def test_copies_in_bulk_keeping_ids(self):
+        call_command("copy_from_sqlite", str(self.source), batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(
+            set(User.objects.values_list("id", "username")),
+            {(self.clerk.id, "clerk"), (self.clerk.id + 1, "admin")},
+        )
+        special = Product.objects.get(name="Special 1L")
+        self.assertEqual(Sale.objects.filter(user_id=self.clerk.id, product=special).count(), 5)
+        self.assertEqual(DailySalesSummary.objects.get().amount, Decimal("99.00") * 15)
+        self.assertEqual(
+            list(Expense.objects.order_by("date").values_list("cumulative_balance", flat=True)),
+            [Decimal("-10.00"), Decimal("-20.00"), Decimal("-30.00")],
+        )
+        # Sequences continue after the copied ids
+        self.assertGreater(User.objects.create(username="new").id, self.clerk.id + 1)
+
+        with self.assertRaisesMessage(CommandError, "--replace"):
+            call_command("copy_from_sqlite", str(self.source))
+
+
+class CartOrderTests(TestCase):
+    """user_dashboard takes a whole cart in one POST: one INSERT, all lines or none."""
+
+    def setUp(self):
+        self.clerk = User.objects.create_user("clerk", password="pw")
+        self.client.force_login(self.clerk)
+        self.product = Product.objects.get(name="5L (R)")
+
+    def test_json_cart_is_one_insert(self):
+        lines = [{"category": "Water", "item": "5L (R)", "quantity": i + 1} for i in range(9)]
+        lines.append({"category": "Gas", "local_item": "Burner", "quantity": 2, "price": "350"})
+        payload = {"payment_method": "Cash", "payment_status": "Paid", "lines": lines}
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(
+                reverse("user_dashboard"), payload, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 201)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith('INSERT INTO "myapp_sale"')]
+        self.assertEqual(len(inserts), 1)
+
+        data = response.json()
+        self.assertEqual(data["created"], 10)
+        self.assertEqual(Decimal(data["total"]), self.product.unit_price * 45 + 350)
+        self.assertEqual(Sale.objects.filter(product=self.product).count(), 9)
+        self.assertIn(f'value="{data["ids"][0]}"', data["rows"])
+        self.assertEqual(
+            sum(DailySalesSummary.objects.values_list("amount", flat=True)),
+            Decimal(data["total"]),
+        )
+
+    def test_bad_line_rejects_the_whole_cart(self):
+        response = self.client.post(reverse("user_dashboard"), {
+            "category": ["Water", "Water"],
+            "item": ["5L (R)", "5L (R)"],
+            "local_item": ["", ""],
+            "quantity": ["2", "1"],
+            "price": [str(self.product.unit_price * 2), "1"],  # stale total on line 2
+            "payment_method": "MPesa",
+            "payment_status": "Paid",
+        }, follow=True)
+
+        self.assertFalse(Sale.objects.exists())
+        self.assertContains(response, "Line 2:")
+
+
+class SaleProductLinkTests(TestCase):
+    """Sale.product follows the item name, matched the way the catalog matches it."""
+
+    def setUp(self):
+        self.clerk = User.objects.create_user("clerk", password="pw")
+        self.refill = Product.objects.get(name="5L (R)")
+
+    def sale(self, item, **fields):
+        return Sale.objects.create(user=self.clerk, category="Water", item=item, quantity=1,
+                                   price=Decimal("70.00"), **fields)
+
+    def test_product_is_resolved_only_when_the_item_changes(self):
+        sale = self.sale("5l  (r)")
+        self.assertEqual(sale.product, self.refill)
+
+        self.refill.active = False
+        self.refill.save()  # drops it from the catalog
+        self.addCleanup(catalog.invalidate)  # the rollback does not reach the process cache
+        sale = Sale.objects.get(pk=sale.pk)
+        sale.quantity = 2
+        sale.save()
+        self.assertEqual(Sale.objects.get(pk=sale.pk).product, self.refill)
+
+        sale.item = "20L  Bottle"
+        sale.save()
+        self.assertEqual(sale.product, Product.objects.get(name="20L  Bottle"))
+        sale.item = "Borehole water"
+        sale.save()
+        self.assertIsNone(sale.product)
+
+    def test_migration_links_names_like_the_catalog(self):
+        bottle = Product.objects.get(name="20L  Bottle")
+        Sale.objects.bulk_create([
+            Sale(user=self.clerk, category="Water", item=item, quantity=2, price=Decimal("1000.00"))
+            for item in ("20l bottle", "20L Bottle ", "Borehole water")
+        ])
+        seed = import_module("myapp.migrations.0003_product")
+        seed.seed_products(django_apps, SimpleNamespace(connection=connection))
+
+        self.assertEqual(Sale.objects.filter(product=bottle).count(), 2)
+        self.assertIsNone(Sale.objects.get(item="Borehole water").product)
+
+
+class KeysetPaginationTests(TestCase):
+    """Keyset pages: no gaps or repeats across ties and NULLs, and a bad cursor starts over."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+        Sale.objects.bulk_create([
+            Sale(user=self.admin, category="Water", item="5L (R)", quantity=1, price=Decimal("70.00"),
+                 payment_method="Cash", payment_status="Paid")
+            for i in range(60)
+        ])
+
+    def test_tampered_cursors_start_over(self):
+        for values in (["abc"], [{"a": 1}], [[1]], [1, 2], "x"):
+            cursor = encode_cursor(values)
+            self.assertIsNone(decode_cursor(cursor, SALE_ORDER, Sale))
+            self.assertEqual(self.client.get(reverse("admin_dashboard"), {"sales_cursor": cursor,
+                                                                          "expenses_cursor": cursor}).status_code, 200)
+        self.assertIsNone(decode_cursor("%%%", SALE_ORDER, Sale))
+        self.assertEqual(decode_cursor(encode_cursor(["7"]), SALE_ORDER, Sale), [7])
+
+    def test_page_boundaries(self):
+        sales = Sale.objects.order_by("-id")
+        ids = list(sales.values_list("id", flat=True))
+        full = keyset_page(Sale.objects.all(), SALE_ORDER, None, 60)
+        self.assertEqual((len(full), full.next_cursor, full.is_first), (60, None, True))
+
+        first = keyset_page(Sale.objects.all(), SALE_ORDER, None, 59)
+        last = keyset_page(Sale.objects.all(), SALE_ORDER, first.next_cursor, 59)
+        self.assertEqual([sale.id for sale in last], ids[59:])
+        self.assertEqual((last.has_next, last.is_first), (False, False))
+        after_last = keyset_page(Sale.objects.all(), SALE_ORDER, encode_cursor([ids[-1]]), 25)
+        self.assertEqual(len(after_last), 0)
+
+        # NULL receipt numbers sort after every other receipt, across page breaks
+        Expense.objects.bulk_create([
+            Expense(receipt_no=receipt_no, paid_to="Supplier", description="", amount_paid=Decimal("1.00"),
+                    date="2024-01-01")
+            for receipt_no in (None, "R1", None, "R2")
+        ])
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(Expense.objects.all(), EXPENSE_ORDER, cursor, 1)
+            seen += [expense.receipt_no for expense in page]
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        self.assertEqual(seen, ["R2", "R1", None, None])
+
+    def test_ties_on_the_sort_key_span_pages(self):
+        Expense.objects.bulk_create([
+            Expense(receipt_no="R1" if i < 5 else "R2", paid_to="Supplier", description="Stock",
+                    amount_paid=Decimal("1.00"), date="2024-01-01")
+            for i in range(7)
+        ])
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(Expense.objects.all(), EXPENSE_ORDER, cursor, 2)
+            seen += [(expense.receipt_no, expense.id) for expense in page]
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted(Expense.objects.values_list("receipt_no", "id"), key=lambda r: (r[0], -r[1]),
+                                      reverse=True))
+
+
+class JsonApiTests(TestCase):
+    """/api/sales/: keyset pages, sparse fields, conditional GET and gzip."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.force_login(self.admin)
+        Sale.objects.bulk_create([
+            Sale(user=self.admin, category="Water", item="5L (R)", quantity=1, price=Decimal("70.00"),
+                 payment_method="Cash" if i % 2 else "MPesa", payment_status="Paid")
+            for i in range(60)
+        ])
+        dashboard_cache.bump("sales")
+
+    def test_pages_fields_and_filters(self):
+        url = reverse("api_sales") + "?fields=id,price&payment_method=Cash&page_size=25"
+        first = self.client.get(url).json()
+        second = self.client.get(first["next"]).json()
+
+        self.assertEqual(set(first["results"][0]), {"id", "price"})
+        ids = [row["id"] for row in first["results"] + second["results"]]
+        self.assertEqual(ids, sorted(Sale.objects.filter(payment_method="Cash").values_list("id", flat=True), reverse=True))
+        self.assertIsNone(second["next"])
+        self.assertEqual(self.client.get(reverse("api_sales") + "?fields=nope").status_code, 400)
+
+    def test_etag_and_gzip(self):
+        url = reverse("api_sales")
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(cached.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if "myapp_sale" in q["sql"]])
+
+        self.client.delete(reverse("api_sale", args=[Sale.objects.first().pk]))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_tampered_cursors_start_over(self):
+        first_page = self.client.get(reverse("api_sales")).json()["results"]
+        for cursor in (encode_cursor(["abc"]), encode_cursor([{"a": 1}]), "%%%"):
+            self.assertEqual(self.client.get(reverse("api_sales"), {"cursor": cursor}).json()["results"], first_page)
+
+
+class SaleFeedTests(TestCase):
+    """The live dashboard gets changes after its last-seen event, not the whole table."""
+
+    LINE = {"category": "Water", "item": "5L (R)", "quantity": 1, "payment_method": "Cash", "payment_status": "Paid"}
+
+    def setUp(self):
+        self.clerk = User.objects.create_user("clerk", password="pw")
+        self.client.force_login(self.clerk)
+
+    def place(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return orders.place_order(self.clerk, [self.LINE] * count)
+
+    @staticmethod
+    async def consume(content):
+        return b"".join([chunk async for chunk in content])
+
+    def test_long_poll_sends_collapsed_deltas(self):
+        kept, dropped = self.place(2)
+        after = feed.last_event_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            kept.payment_status = "Not Paid"
+            kept.save()
+            kept.save()
+            delete_with_rollup(Sale.objects.filter(pk=dropped.pk))
+        new, = self.place()
+
+        data = self.client.get(reverse("user_dashboard_feed"), {"after": after}).json()
+        self.assertEqual(
+            [(delta["id"], delta["action"]) for delta in data["deltas"]],
+            [(kept.pk, "updated"), (dropped.pk, "deleted"), (new.pk, "created")],
+        )
+        self.assertIn(f'data-sale-id="{kept.pk}"', data["deltas"][0]["row"])
+        self.assertIn("Not Paid", data["deltas"][0]["row"])
+
+        with override_settings(SALE_FEED_LONG_POLL_SECONDS=0):
+            idle = self.client.get(reverse("user_dashboard_feed"), {"after": data["last_id"]}).json()
+        self.assertEqual(idle, {"last_id": data["last_id"], "deltas": [], "reset": False})
+
+    @override_settings(USER_DASHBOARD_WINDOW=5, SALE_FEED_STREAM_SECONDS=0.2, SALE_FEED_POLL_SECONDS=0.05)
+    def test_bounded_page_then_event_stream(self):
+        self.place(8)
+        dashboard_cache.bump("sales")
+        page = self.client.get(reverse("user_dashboard"))
+        self.assertEqual(page.content.count(b"<tr data-sale-id="), 5)
+
+        new, = self.place()
+        self.async_client.force_login(self.clerk)
+        response = async_to_sync(self.async_client.get)(
+            reverse("user_dashboard_feed"), headers={
+                "Accept": "text/event-stream", "Last-Event-ID": str(page.context["feed_after"]),
+            },
+        )
+        stream = async_to_sync(self.consume)(response.streaming_content).decode()
+        self.assertIn(f"id: {feed.last_event_id()}\nevent: sales\n", stream)
+        self.assertIn(f'"id": {new.pk}, "action": "created"', stream)
+
+    def test_wsgi_refuses_the_event_stream(self):
+        page = self.client.get(reverse("user_dashboard"))
+        self.assertFalse(page.context["feed_stream"])
+
+        # Buffered by WSGI until it ends: EventSource gets 204 and the page long-polls
+        new, = self.place()
+        response = self.client.get(
+            reverse("user_dashboard_feed"), {"after": page.context["feed_after"]}, HTTP_ACCEPT="text/event-stream",
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+        data = self.client.get(reverse("user_dashboard_feed"), {"after": page.context["feed_after"]}).json()
+        self.assertEqual([delta["id"] for delta in data["deltas"]], [new.pk])
+
+
+class ScopedDashboardTests(TestCase):
+    """A clerk's dashboard reads, caches and follows only the sales of its scope."""
+
+    LINE = SaleFeedTests.LINE
+
+    def setUp(self):
+        self.alice = User.objects.create_user("alice", password="pw")
+        self.bob = User.objects.create_user("bob", password="pw")
+        self.carol = User.objects.create_user("carol", password="pw")
+        team = Group.objects.create(name="Gate B")
+        team.user_set.add(self.alice, self.bob)
+        self.client.force_login(self.alice)
+
+    def place(self, user, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return orders.place_order(user, [self.LINE] * count)
+
+    def shown(self, scope):
+        page = self.client.get(reverse("user_dashboard"), {"scope": scope})
+        return page, page.content.count(b"<tr data-sale-id=")
+
+    def test_scopes_totals_and_feed(self):
+        self.place(self.alice, 2)
+        self.place(self.bob, 3)
+        self.place(self.carol, 4)
+
+        self.assertEqual(self.shown("own")[1], 2)
+        self.assertEqual(self.shown("today")[1], 2)
+        self.assertEqual(self.shown("team")[1], 5)
+        self.assertEqual(self.shown("all")[1], 9)
+
+        # The scope sticks to the session; today's totals are alice's own
+        page = self.client.get(reverse("user_dashboard"))
+        self.assertEqual(page.context["scope"], scopes.ALL)
+        self.assertEqual(page.context["today_totals"]["count"], 2)
+
+        # Other clerks' orders leave alice's cached rows and totals alone
+        version = dashboard_cache.version(dashboard_cache.user_area(self.alice.id))
+        after = feed.last_event_id()
+        self.place(self.carol)
+        bob_sale, = self.place(self.bob)
+        self.assertEqual(dashboard_cache.version(dashboard_cache.user_area(self.alice.id)), version)
+        with CaptureQueriesContext(connection) as queries:
+            scopes.daily_totals(self.alice)
+        self.assertEqual(len(queries), 0)
+
+        data = self.client.get(reverse("user_dashboard_feed"), {"after": after, "scope": "team"}).json()
+        self.assertEqual([delta["id"] for delta in data["deltas"]], [bob_sale.pk])
+
+
+class IdempotentOrderTests(TestCase):
+    """A retried order submit returns the original sales instead of inserting new ones."""
+
+    def setUp(self):
+        self.clerk = User.objects.create_user("clerk", password="pw")
+        self.client.force_login(self.clerk)
+        self.cart = {"lines": [SaleFeedTests.LINE, {**SaleFeedTests.LINE, "quantity": 2}]}
+
+    def submit(self, key, cart=None):
+        return self.client.post(
+            reverse("user_dashboard"), cart or self.cart, content_type="application/json", HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retries_replay_the_original_order(self):
+        first = self.submit("cart-1")
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.submit("cart-1")
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.json()["ids"], first.json()["ids"])
+        self.assertFalse([q for q in queries if q["sql"].startswith("INSERT INTO \"myapp_sale\"")])
+        self.assertEqual(Sale.objects.count(), 2)
+
+        # A rejected cart does not use up its key; another key is another order
+        self.assertEqual(self.submit("cart-2", {"lines": [{**SaleFeedTests.LINE, "quantity": 0}]}).status_code, 400)
+        self.assertEqual(self.submit("cart-2").status_code, 201)
+        self.assertEqual(Sale.objects.count(), 4)
+
+        # Form double submit: same hidden token, one sale
+        form = {"category": "Water", "item": "5L (R)", "quantity": 1, "payment_method": "Cash",
+                "payment_status": "Paid", "idempotency_key": idempotency.new_key()}
+        self.client.post(reverse("user_dashboard"), form)
+        self.client.post(reverse("user_dashboard"), form)
+        self.assertEqual(Sale.objects.count(), 5)
+
+    def test_expired_keys(self):
+        self.submit("cart-1")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=25))
+        self.assertNotIn("Idempotent-Replayed", self.submit("cart-1"))
+        self.assertEqual(Sale.objects.count(), 4)
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(hours=25))
+        self.assertEqual(idempotency.prune(force=True), 1)
+
+
+@override_settings(BULK_BATCH_SIZE=2)
+
+
+class BulkOperationTests(TestCase):
+    """Bulk deletes/archives run in bounded batches and keep the rollup and ledger right."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(self.admin)
+        Sale.objects.bulk_create([
+            Sale(user=self.admin, category="Water", item="Local", quantity=1, price=Decimal("10.00"),
+                 payment_method="Cash" if i % 2 else "MPesa", payment_status="Paid",
+                 date=timezone.make_aware(timezone.datetime(2024, 1, i + 1, 12)))
+            for i in range(7)
+        ])
+        summary.rebuild()
+        Expense.objects.bulk_create([
+            Expense(receipt_no="R1", date=f"2024-01-0{i + 1}", paid_to="Supplier", description="Stock",
+                    received_amount=Decimal("100.00"), amount_paid=Decimal("10.00"))
+            for i in range(5)
+        ])
+        ledger.recalculate_from(None)
+
+    def rollup_total(self):
+        return DailySalesSummary.objects.aggregate(total=Sum("amount"))["total"] or 0
+
+    def test_archive_range_in_batches_then_move_to_cold_storage(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("bulk_by_range"), {
+                "target": "sales", "action": "archive", "start_date": "2024-01-01", "end_date": "2024-01-05",
+            })
+        self.assertEqual(response.status_code, 302)
+        updates = [q for q in queries if q["sql"].startswith('UPDATE "myapp_sale"')]
+        self.assertEqual(len(updates), 3)  # 5 rows, 2 per batch
+
+        self.assertEqual(Sale.objects.count(), 2)
+        self.assertEqual(Sale.all_objects.count(), 7)
+        self.assertEqual(self.rollup_total(), Decimal("20.00"))
+
+        # No date range, no bulk operation
+        self.client.post(reverse("bulk_by_range"), {"target": "sales", "action": "delete"})
+        self.assertEqual(Sale.objects.count(), 2)
+
+        call_command("move_archived", stdout=io.StringIO())
+        self.assertEqual(Sale.all_objects.count(), 2)
+        self.assertEqual(ArchivedSale.objects.count(), 5)
+        self.assertEqual(self.rollup_total(), Decimal("20.00"))
+
+    def test_deleting_a_user_does_not_subtract_archived_sales_twice(self):
+        clerk = User.objects.create_user("clerk", password="pw")
+        sales = Sale.objects.bulk_create([
+            Sale(user=clerk, category="Water", item="Local", quantity=1, price=Decimal("70.00"),
+                 payment_method="Cash", payment_status="Paid") for _ in range(3)
+        ])
+        summary.add_sales(sales)
+        self.assertEqual(self.rollup_total(), Decimal("280.00"))
+
+        bulk.sales(bulk.ARCHIVE, ids=[sale.pk for sale in sales])
+        self.assertEqual(self.rollup_total(), Decimal("70.00"))
+        clerk.delete()  # cascades to the archived sales through the base manager
+        self.assertEqual(Sale.all_objects.filter(pk__in=[sale.pk for sale in sales]).count(), 0)
+        self.assertEqual(self.rollup_total(), Decimal("70.00"))
+
+    def test_selected_expenses_by_id(self):
+        # Every row shares a receipt number: the checkboxes must carry ids
+        page = self.client.get(reverse("admin_dashboard"))
+        first, second, *rest = Expense.objects.order_by("date")
+        self.assertContains(page, f'name="selected_expenses" value="{second.id}"')
+
+        self.client.post(reverse("delete_expenses"), {"selected_expenses": [second.id, "R1", ""], "action": "archive"})
+        self.client.post(reverse("delete_expenses"), {"selected_expenses": [rest[0].id]})
+        self.assertEqual(list(Expense.objects.order_by("date")), [first, rest[1], rest[2]])
+        self.assertEqual(Expense.all_objects.count(), 4)
+        self.assertEqual(
+            list(Expense.objects.order_by("date").values_list("cumulative_balance", flat=True)),
+            [Decimal("90.00"), Decimal("180.00"), Decimal("270.00")],
+        )
+
+
+class SalePartitionTests(TransactionTestCase):
+    """Old months move to their own tables; date-range reports read only the ones in range."""
+
+    serialized_rollback = True  # the schema editor cannot run inside TestCase's transaction on SQLite
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", password="pw")
+        self.client.force_login(self.admin)
+        Sale.objects.bulk_create([
+            Sale(user=self.admin, category="Water", item="Local", quantity=1, price=Decimal("10.00"),
+                 payment_method="Cash", payment_status="Paid",
+                 date=timezone.make_aware(timezone.datetime(2026, month, day, 12)))
+            for month in (7, 8, 9, 10) for day in (3, 17)
+        ])
+        summary.rebuild()
+
+    def tearDown(self):
+        partitions.drop_partitions()  # unmanaged tables outlive the test's flush otherwise
+
+    def overall(self):
+        return summary_totals()["overall"]
+
+    def roll_over(self):
+        partitions.roll_over(today=timezone.datetime(2026, 10, 18).date(), keep_months=2)
+        return list(Sale.objects.order_by("-id").values_list("id", flat=True))
+
+    def test_roll_over_and_routed_reports(self):
+        out = io.StringIO()
+        call_command("roll_over_sales", today="2026-10-18", keep_months=2, batch_size=1, stdout=out)
+        self.assertIn("myapp_sale_2026_07: 2", out.getvalue())
+        self.assertEqual(Sale.objects.count(), 4)
+        self.assertEqual(list(SalePartition.objects.values_list("table", "rows")),
+                         [("myapp_sale_2026_07", 2), ("myapp_sale_2026_08", 2)])
+        self.assertEqual(self.overall(), Decimal("80.00"))
+        summary.rebuild()
+        self.assertEqual(self.overall(), Decimal("80.00"))
+
+        # August to September: one partition plus the hot table, July untouched
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get(reverse("sales_report"), {"start_date": "2026-08-10", "end_date": "2026-09-30"})
+        self.assertEqual(len(page.context["sales"]), 3)
+        self.assertEqual(page.context["sales"][0].user.username, "admin")
+        tables = " ".join(q["sql"] for q in queries)
+        self.assertIn('"myapp_sale_2026_08"', tables)
+        self.assertNotIn('"myapp_sale_2026_07"', tables)
+
+        export = self.client.get(reverse("admin_sales_excel"))
+        sheet = load_workbook(io.BytesIO(b"".join(export.streaming_content))).active
+        dates = [row[0] for row in sheet.iter_rows(min_row=2, values_only=True) if row[4] == "Cash (Paid)"]
+        self.assertEqual(dates[:3], ["03/07/26", "17/07/26", "03/08/26"])
+        self.assertEqual(len(dates), 8)
+
+        # Nothing left to move
+        self.assertEqual(partitions.roll_over(today=timezone.datetime(2026, 10, 18).date(), keep_months=2), {})
+
+    def test_reads_route_into_closed_months_and_writes_stop_there(self):
+        hot = self.roll_over()
+        closed = [sale.id for month in SalePartition.objects.values_list("month", flat=True)
+                  for sale in partitions.partition_model(month).objects.all()]
+        everything = sorted(hot + closed, reverse=True)
+
+        # Keyset pages run on from the hot table into the partitions, without gaps or repeats
+        seen, cursor = [], None
+        while True:
+            page = partitions.keyset_page(cursor, 3)
+            seen += [sale.id for sale in page]
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, everything)
+
+        api_ids = [row["id"] for row in self.client.get(reverse("api_sales")).json()["results"]]
+        self.assertEqual(api_ids, everything)
+        august = self.client.get(reverse("api_sales"), {"start_date": "2026-08-01", "end_date": "2026-08-31"})
+        self.assertEqual(len(august.json()["results"]), 2)
+        self.assertEqual(self.client.get(reverse("api_sale", args=[closed[0]])).json()["id"], closed[0])
+        response = self.client.patch(reverse("api_sale", args=[closed[0]]), '{"quantity": 2}',
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 409)
+
+        dashboard = self.client.get(reverse("admin_dashboard"))
+        self.assertEqual(dashboard.content.count(b'name="selected_sales"'), 8)
+        self.assertEqual(self.client.get(reverse("user_dashboard")).content.count(b"<tr data-sale-id="), 8)
+
+        # Closed months are read-only: no edit form, no bulk range over them
+        self.assertRedirects(self.client.get(reverse("edit_sale", args=[closed[0]])), reverse("admin_dashboard"))
+        self.assertEqual(self.client.get(reverse("edit_sale", args=[10 ** 6])).status_code, 404)
+        self.client.post(reverse("bulk_by_range"), {
+            "target": "sales", "action": "delete", "start_date": "2026-07-01", "end_date": "2026-10-31",
+        })
+        self.assertEqual(Sale.objects.count(), 4)
+        self.assertEqual(self.overall(), Decimal("80.00"))
+
+    def test_copy_from_sqlite_brings_the_partitions(self):
+        self.roll_over()
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(close_source)
+            open_source(Path(tmp) / "source.sqlite3")
+            call_command("migrate", database=SOURCE_ALIAS, verbosity=0)
+            for model in (User, Sale, SalePartition):
+                model._base_manager.using(SOURCE_ALIAS).bulk_create(model._base_manager.all())
+            for month in SalePartition.objects.values_list("month", flat=True):
+                model = partitions.create_table(month, using=SOURCE_ALIAS)
+                model.objects.using(SOURCE_ALIAS).bulk_create(model.objects.all())
+            close_source()
+
+            call_command("copy_from_sqlite", str(Path(tmp) / "source.sqlite3"), replace=True, stdout=io.StringIO())
+
+        self.assertEqual(Sale.objects.count(), 4)
+        self.assertEqual(list(SalePartition.objects.values_list("rows", flat=True)), [2, 2])
+        self.assertEqual(sum(len(part) for part in partitions.route()), 8)
+        self.assertEqual(self.overall(), Decimal("80.00"))
+        # New sales get ids past the rolled-over ones
+        self.assertGreater(Sale.objects.create(user=self.admin, category="Water", item="Local", quantity=1,
+                                               price=Decimal("10.00")).id,
+                           SalePartition.objects.aggregate(top=Max("max_id"))["top"])
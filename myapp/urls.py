@@ -11,17 +11,29 @@ urlpatterns = [
 
     # Dashboards
     path("dashboard/", views.user_dashboard, name="user_dashboard"),
+    path("dashboard/feed/", views.user_dashboard_feed, name="user_dashboard_feed"), # async (SSE / long-poll)
     path("admin-dashboard/", views.admin_dashboard, name="admin_dashboard"),
+    path("admin-dashboard/totals/", views.admin_dashboard_totals, name="admin_dashboard_totals"), # async (JSON)
+    path("admin-dashboard/pdf/", views.admin_dashboard_pdf, name="admin_dashboard_pdf"), # PDF report (date range)
+    path("admin-dashboard/perf/", views.perf_stats, name="perf_stats"), # request timings (JSON, staff)
+    path("admin-dashboard/cache-stats/", views.dashboard_cache_stats, name="dashboard_cache_stats"), # cache hit/miss (JSON)
 
     # Expenses
     path("add-expense/", views.add_expense, name="add_expense"),          # for adding new expense
     path("upload-expense/", views.upload_expense, name="upload_expense"), # for uploading via Excel
+    path("import-jobs/<int:pk>/", views.import_job_status, name="import_job_status"), # upload progress (JSON)
     path("admin-dashboard/expenses-excel/", views.admin_expenses_excel, name="admin_expenses_excel"), # export
 
     # Sales
     path("add-sale/", views.add_sale, name="add_sale"),                   # for adding new sale
     path("admin-sales-excel/", views.admin_sales_excel, name="admin_sales_excel"),
 
+    # JSON API (cursor pages, ?fields=, ETag, gzip)
+    path("api/sales/", views.api_sales, name="api_sales"),
+    path("api/sales/<int:pk>/", views.api_sale, name="api_sale"),
+    path("api/expenses/", views.api_expenses, name="api_expenses"),
+    path("api/expenses/<int:pk>/", views.api_expense, name="api_expense"),
+
   
      path("orders/<int:pk>/edit/", views.edit_order, name="edit_order"),
      path("dashboard/", views.user_dashboard, name="dashboard"),
@@ -31,6 +43,7 @@ urlpatterns = [
        path("delete-orders/", views.delete_orders, name="delete_orders"), 
         path("delete-sales/", views.delete_sales, name="delete_sales"),
         path("delete-expenses/", views.delete_expenses, name="delete_expenses"),
+        path("admin-dashboard/bulk/", views.bulk_by_range, name="bulk_by_range"), # delete/archive a date range
         path("sales-report/", views.sales_report, name="sales_report"),
 path("sales-excel/", views.admin_sales_excel, name="admin_sales_excel"),
 
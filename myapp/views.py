@@ -1,43 +1,36 @@
 # myapp/views.py
-from django.shortcuts import render, redirect
+import asyncio
+import json
+from datetime import datetime
+from operator import itemgetter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.contrib import messages
+from django.core.handlers.asgi import ASGIRequest
 from django.db.models import Sum
-from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from .models import Expense, Sale
-from decimal import Decimal
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
 from django.utils import timezone
-import json
+from django.utils.dateparse import parse_date
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_http_methods
+
+from . import api, bulk, catalog, dashboard_cache, feed, idempotency, orders, partitions, perf, scopes
+from .forms import ExpenseForm, SaleForm
+from .jobs import enqueue_import, job_status
+from .ledger import ORDER as LEDGER_ORDER, delete_expenses as delete_expenses_and_rebalance
+from .models import Expense, ImportJob, Sale
+from .pagination import EXPENSE_ORDER, PAGE_SIZES, get_page_size, keyset_page
+from .pdf_reports import request_report
+from .reports import asummary_totals, summary_totals, totals_rows
+from .summary import delete_with_rollup
+from .xlsx import BOLD, COMMA, CONTENT_TYPE as XLSX_CONTENT_TYPE, Cell, astream_xlsx, stream_xlsx
 
-# --------------------------
-# Price list for sales
-# --------------------------
-PRICE_LIST = {
-    "Water": {
-        "1L (R)": 10,
-        "1L + B": 30,
-        "1L (R)": 10,
-        "5L (R)": 70,
-        "5L Bottle": 150,
-        "10L (R)": 130,
-        "10L Bottle": 250,
-        "20L (R)": 250,
-        "20L  Bottle": 500,
-        "20L (Hard) + water": 1500,
-    },
-    "Gas": {
-        "Insta Gas 6kg": 1000,
-        "Insta Gas 13kg": 3500,
-        "Pro Gas 6kg": 1000,
-        "Pro Gas 13kg": 3500,
-        "Wajiko 6kg": 1000,
-        "Wajiko 13kg": 3500,
-    }
-}
 
 # --------------------------
 # Landing page
@@ -70,10 +63,7 @@ def register_view(request):
 
 # --------------------------
 # User login
-from django.contrib.auth import authenticate, login
-from django.shortcuts import render, redirect
-from django.contrib import messages
-
+# --------------------------
 def login_view(request):
     if request.method == "POST":
         username = request.POST.get("username")
@@ -103,51 +93,139 @@ def logout_view(request):
 # --------------------------
 # User dashboard
 # --------------------------
-from decimal import Decimal
-from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect
-import json
-from .models import Sale
 @login_required
 def user_dashboard(request):
     if request.method == "POST":
-        category = request.POST.get("category")
-        item = request.POST.get("item") or request.POST.get("local_item")
-        quantity = request.POST.get("quantity")
-        payment_method = request.POST.get("payment_method")
-        payment_status = request.POST.get("payment_status")
-        delivery_place = request.POST.get("delivery_place")  # ✅ capture delivery
-
-        if not category or not item or not quantity or not payment_method or not payment_status:
-            messages.error(request, "⚠️ Please fill all required fields.")
+        # One line from the classic form, or a whole cart (repeated fields or JSON)
+        is_json = request.content_type == "application/json"
+        wants_json = is_json or request.headers.get("Accept", "").startswith("application/json")
+        try:
+            lines = orders.lines_from_json(request.body) if is_json else orders.lines_from_post(request.POST)
+            # A retried submit (same key) gets the original sales back instead of new rows
+            sales, replayed = idempotency.run(
+                request.user, idempotency.get_key(request), lambda: orders.place_order(request.user, lines)
+            )
+        except orders.OrderError as e:
+            if wants_json:
+                return JsonResponse({"errors": e.errors}, status=400)
+            for error in e.errors:
+                messages.error(request, f"⚠️ {error}")
             return redirect("user_dashboard")
 
-        # Automatically get price from PRICE_LIST
-        item_price = Decimal(PRICE_LIST.get(item, 0))
-        total_price = item_price * Decimal(quantity)
-
-        Sale.objects.create(
-            user=request.user,  # still track who made the order
-            category=category,
-            item=item,
-            quantity=int(quantity),
-            price=total_price,
-            payment_method=payment_method,
-            payment_status=payment_status,
-            delivery_place=delivery_place if payment_status == "Delivery" else "",  # ✅ save only if Delivery
-        )
-        messages.success(request, f"✅ Order submitted successfully! {item} - {quantity} @ {item_price} = {total_price}")
+        total = sum(sale.price for sale in sales)
+        if wants_json:
+            # Just the new rows, for the page to prepend; no full re-render
+            response = JsonResponse({
+                "created": len(sales),
+                "ids": [sale.id for sale in sales],
+                "total": str(total),
+                "rows": render_to_string("user_orders_rows.html", {"rows": sales[::-1]}),
+            }, status=201)
+            if replayed:
+                response["Idempotent-Replayed"] = "true"
+            return response
+
+        if replayed:
+            messages.info(request, "ℹ️ This order was already submitted.")
+        elif len(sales) == 1:
+            sale = sales[0]
+            item_price = sale.price / sale.quantity
+            messages.success(request, f"✅ Order submitted successfully! {sale.item} - {sale.quantity} @ {item_price} = {sale.price}")
+        else:
+            messages.success(request, f"✅ Order submitted successfully! {len(sales)} items, total {total}")
         return redirect("user_dashboard")
 
-    # ✅ show all sales, not just current user's
-    sales = Sale.objects.all().order_by("-id")
+    # Newest event first, rows second: anything written in between comes through the feed again
+    feed_after = feed.last_event_id()
+
+    # ✅ own / today / team / all orders (myapp/scopes.py), the most recent window of them,
+    # rendered once per data version; the page then follows changes through user_dashboard_feed
+    scope = scopes.get_scope(request)
+    user_ids = scopes.user_ids(request.user, scope)
+    window = feed.get_window()
+    sales_rows = dashboard_cache.cached_rows(
+        scopes.cache_area(request.user, scope), "user_orders",
+        lambda: scopes.recent_sales(request.user, scope, user_ids, window),
+        "user_orders_rows.html", scope, user_ids, window, timezone.localdate(),
+    )
 
     return render(request, "user_dashboard.html", {
-        "sales": sales,
-        "PRICE_LIST_JSON": json.dumps(PRICE_LIST),
+        "sales_rows": sales_rows,
+        "PRICE_LIST_JSON": json.dumps(catalog.price_list()),
+        "feed_after": feed_after,
+        "feed_window": window,
+        "feed_stream": isinstance(request, ASGIRequest),
+        "scope": scope,
+        "scopes": scopes.SCOPES,
+        "today_totals": scopes.daily_totals(request.user),
+        "idempotency_key": idempotency.new_key(),
     })
 
+
+# --------------------------
+# Live user dashboard: sale deltas as server-sent events or long-poll JSON (myapp/feed.py)
+# --------------------------
+
+
+def _feed_after(request):
+    # EventSource sends Last-Event-ID when it reconnects
+    value = request.headers.get("Last-Event-ID") or request.GET.get("after") or 0
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+async def _sale_events(after, user_ids):
+    loop = asyncio.get_running_loop()
+    poll = getattr(settings, "SALE_FEED_POLL_SECONDS", feed.DEFAULT_POLL_SECONDS)
+    deadline = loop.time() + getattr(settings, "SALE_FEED_STREAM_SECONDS", feed.DEFAULT_STREAM_SECONDS)
+    heartbeat = loop.time()
+    yield f"retry: {feed.RETRY_MS}\n\n"
+    while loop.time() < deadline:
+        batch = await sync_to_async(feed.deltas)(after, user_ids)
+        if batch["reset"]:
+            yield "event: reset\ndata: {}\n\n"
+            return
+        if batch["deltas"]:
+            after = batch["last_id"]
+            yield f"id: {after}\nevent: sales\ndata: {json.dumps(batch['deltas'])}\n\n"
+            heartbeat = loop.time()
+            continue  # a full batch may have more behind it
+        if loop.time() - heartbeat >= feed.HEARTBEAT_SECONDS:
+            yield ": ping\n\n"  # keeps proxies from closing an idle stream
+            heartbeat = loop.time()
+        await asyncio.sleep(poll)
+    # The client reconnects on its own, with Last-Event-ID
+
+
+@login_required
+async def user_dashboard_feed(request):
+    after = _feed_after(request)
+    # Only the clerks the page's scope shows (own / today / team), read through saleevent_user_idx
+    scope = await sync_to_async(scopes.get_scope)(request)
+    user = await request.auser()
+    user_ids = await sync_to_async(scopes.user_ids)(user, scope)
+    if "text/event-stream" in request.headers.get("Accept", ""):
+        if not isinstance(request, ASGIRequest):
+            # A WSGI server would only send the stream once it ends; 204 stops EventSource
+            # from reconnecting and the page long-polls instead
+            return HttpResponse(status=204)
+        response = StreamingHttpResponse(_sale_events(after, user_ids), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"  # nginx: pass events through unbuffered
+        return response
+
+    # Long-poll: answer as soon as something changed, or empty once the wait is over
+    loop = asyncio.get_running_loop()
+    poll = getattr(settings, "SALE_FEED_POLL_SECONDS", feed.DEFAULT_POLL_SECONDS)
+    deadline = loop.time() + getattr(settings, "SALE_FEED_LONG_POLL_SECONDS", feed.DEFAULT_LONG_POLL_SECONDS)
+    while True:
+        batch = await sync_to_async(feed.deltas)(after, user_ids)
+        if batch["deltas"] or batch["reset"] or loop.time() >= deadline:
+            return JsonResponse(batch)
+        await asyncio.sleep(poll)
+
 # --------------------------
 # Admin dashboard
 @login_required
@@ -157,52 +235,94 @@ def admin_dashboard(request):
         messages.error(request, "🚫 Unauthorized access.")
         return redirect("user_dashboard")
 
-    # Admin expenses (latest first by receipt number)
-    expenses = Expense.objects.all().order_by("-receipt_no")
-    total_expenses = expenses.aggregate(total=Sum("amount_paid"))["total"] or 0
+    page_size = get_page_size(request)
+    expenses_cursor = request.GET.get("expenses_cursor")
+    sales_cursor = request.GET.get("sales_cursor")
 
-    # User sales/orders (latest first by ID)
-    sales = Sale.objects.all().order_by("-id")
-    total_sales = sales.aggregate(total=Sum("price"))["total"] or 0
+    # Admin expenses (latest first by receipt number), one keyset page at a time
+    expenses = Expense.objects.all()
+    total_expenses = dashboard_cache.cached(
+        "expenses", "expenses_total",
+        lambda: expenses.aggregate(total=Sum("amount_paid"))["total"] or 0,
+    )
+    expenses_page = dashboard_cache.cached_page(
+        "expenses", "admin_expenses",
+        lambda: keyset_page(expenses, EXPENSE_ORDER, expenses_cursor, page_size),
+        "admin_expenses_rows.html", page_size, expenses_cursor,
+    )
+
+    # User sales/orders (latest first by ID), paging on into the rolled-over months
+    sales_summary = dashboard_cache.cached("sales", "sales_totals", summary_totals)  # whole history, from the daily rollup
+    sales_page = dashboard_cache.cached_page(
+        "sales", "admin_sales",
+        lambda: partitions.keyset_page(sales_cursor, page_size, lambda sales: sales.for_listing()),
+        "admin_sales_rows.html", page_size, sales_cursor,
+    )
 
     context = {
-        "expenses": expenses,
+        "expenses": expenses_page,
         "total_expenses": total_expenses,
-        "sales": sales,
-        "total_sales": total_sales,
+        "sales": sales_page,
+        "total_sales": sales_summary["overall"],
+        "sales_summary": sales_summary,
+        "page_size": page_size,
+        "page_sizes": PAGE_SIZES,
     }
     return render(request, "admin_dashboard.html", context)
 
 
+# --------------------------
+# Admin dashboard totals (async JSON, for refreshing the summary lines)
+# --------------------------
 
+async def _aexpenses_total():
+    return (await Expense.objects.aaggregate(total=Sum("amount_paid")))["total"] or 0
 
+@login_required
+async def admin_dashboard_totals(request):
+    user = await request.auser()
+    if not user.is_superuser:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+
+    sales_summary = await dashboard_cache.acached("sales", "sales_totals", asummary_totals)
+    total_expenses = await dashboard_cache.acached("expenses", "expenses_total", _aexpenses_total)
+    return JsonResponse({
+        "sales": {key: str(value) for key, value in sales_summary.items()},
+        "total_expenses": str(total_expenses),
+    })
 
 
-from django.shortcuts import render
-from django.contrib import messages
-import pandas as pd
-from decimal import Decimal, InvalidOperation
-from .models import Expense
+# --------------------------
+# Admin dashboard PDF (rendered in a process pool, cached on disk)
+# --------------------------
 
-def safe_decimal(value):
-    try:
-        if pd.isna(value) or value == '':
-            return None
-        return Decimal(str(value))
-    except (InvalidOperation, TypeError, ValueError):
-        return None
-
-def safe_date(value):
-    if pd.isna(value) or value == '':
-        return None
-    if isinstance(value, pd.Timestamp):
-        return value.date()
-    try:
-        # dayfirst=True ensures dd/mm/yyyy is interpreted correctly
-        return pd.to_datetime(value, dayfirst=True).date()
-    except Exception:
-        return None
+@login_required
+def admin_dashboard_pdf(request):
+    if not request.user.is_superuser:
+        messages.error(request, "🚫 Unauthorized access.")
+        return redirect("user_dashboard")
 
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
+    start = parse_date(start_date) if start_date else None
+    end = parse_date(end_date) if end_date else None
+
+    path, ready = request_report(start, end)
+    if ready:
+        filename = f"dashboard_report_{start or 'all'}_{end or 'latest'}.pdf"
+        try:
+            report = open(path, "rb")
+        except FileNotFoundError:
+            report = None  # superseded and cleaned up since; the next poll gets the fresh one
+        if report is not None:
+            return FileResponse(report, as_attachment=True, filename=filename, content_type="application/pdf")
+
+    if request.headers.get("Accept", "").startswith("application/json"):
+        return JsonResponse({"status": "pending"}, status=202)
+    return render(request, "report_pending.html", status=202)
+
+
+@login_required
 def upload_expense(request):
     if request.method == 'POST':
         uploaded_file = request.FILES.get('file')
@@ -211,60 +331,54 @@ def upload_expense(request):
             return render(request, 'upload_expense.html')
 
         try:
-            # Read CSV or Excel
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
-
-            # Clean column names
-            df.columns = df.columns.str.replace('\xa0', ' ').str.strip()
-
-            # Map CSV columns -> model fields
-            COLUMN_MAP = {
-                'R. No': 'receipt_no',
-                'Date': 'date',
-                'Paid To': 'paid_to',
-                'Charges A/c': 'charges_account',
-                'Description': 'description',
-                'Received Amnt': 'received_amount',
-                'Bank charges': 'bank_charges',
-                'Amount Paid': 'amount_paid',
-                'C. Balance': 'cumulative_balance',
-            }
-
-            decimal_fields = {'received_amount', 'bank_charges', 'amount_paid', 'cumulative_balance'}
-
-            created = 0
-            skipped = 0
-            for _, row in df.iterrows():
-                data = {}
-                for csv_col, model_field in COLUMN_MAP.items():
-                    value = row.get(csv_col, None)
-                    if model_field in decimal_fields:
-                        value = safe_decimal(value)
-                    elif model_field == 'date':
-                        value = safe_date(value)
-                    data[model_field] = value
-
-                # Skip rows with missing required fields
-                if not data.get('amount_paid') or not data.get('date') or not data.get('paid_to'):
-                    skipped += 1
-                    continue
-
-                Expense.objects.create(**data)
-                created += 1
-
-            messages.success(request, f"✅ Uploaded {created} rows. Skipped {skipped} rows.")
+            # Stored and processed by the background import workers
+            job = enqueue_import(uploaded_file, request.user)
         except Exception as e:
             messages.error(request, f"⚠ Error processing file: {str(e)}")
+            return render(request, 'upload_expense.html')
+
+        if request.headers.get("Accept", "").startswith("application/json"):
+            return JsonResponse(job_status(job), status=202)
+        messages.success(request, f"✅ {job.original_name} queued for import (job #{job.pk}).")
+        return render(request, 'upload_expense.html', {"job": job})
 
     return render(request, 'upload_expense.html')
 
 
+@login_required
+def import_job_status(request, pk):
+    job = get_object_or_404(ImportJob, pk=pk)
+    if job.user_id != request.user.id and not request.user.is_superuser:
+        return JsonResponse({"error": "Not your import job"}, status=403)
+    return JsonResponse(job_status(job))
 
 
+# --------------------------
+# Request timings per URL name (JSON, staff only)
+# --------------------------
 
+@login_required
+def perf_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    if request.method == "POST" and request.POST.get("reset"):
+        perf.STATS.reset()
+    return JsonResponse({
+        "window": getattr(settings, "PERF_WINDOW", perf.DEFAULT_WINDOW),
+        "urls": perf.STATS.snapshot(),
+    })
+
+
+# --------------------------
+# Dashboard cache hit/miss counters (JSON, superusers only)
+# --------------------------
+@login_required
+def dashboard_cache_stats(request):
+    if not request.user.is_superuser:
+        return JsonResponse({"error": "Unauthorized"}, status=403)
+    if request.method == "POST" and request.POST.get("reset"):
+        dashboard_cache.reset_stats()
+    return JsonResponse({"fragments": dashboard_cache.stats()})
 
 
 @login_required
@@ -273,12 +387,11 @@ def add_expense(request):
         receipt_no = request.POST.get("receipt_no")
         date = request.POST.get("date")
         paid_to = request.POST.get("paid_to")
-        charges_account = request.POST.get("charged_to")
+        charges_account = request.POST.get("charges_account") or request.POST.get("charged_to")
         description = request.POST.get("description")
         received_amount = request.POST.get("received_amount") or 0
         bank_charges = request.POST.get("bank_charges") or 0
         amount_paid = request.POST.get("amount_paid") or 0
-        closing_balance = request.POST.get("running_balance") or 0
 
         Expense.objects.create(
             receipt_no=receipt_no,
@@ -289,79 +402,98 @@ def add_expense(request):
             received_amount=received_amount,
             bank_charges=bank_charges,
             amount_paid=amount_paid,
-            closing_balance=closing_balance,
-        )
+        )  # cumulative_balance is computed by the ledger (myapp/ledger.py)
         return redirect("admin_dashboard")
 
     return render(request, "add_expense.html")
 
 
-
-
-
-# myapp/views.py
-from django.http import HttpResponse
-from openpyxl import Workbook
-from reportlab.pdfgen import canvas
-from .models import Expense, Sale
-
 # ------------------- Excel Expenses -------------------
-from django.http import HttpResponse
-from openpyxl import Workbook
-from .models import Expense
 
-def admin_expenses_excel(request):
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename="expenses_report.xlsx"'
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Expenses Report"
+def xlsx_response(request, rows, arows, sheet_title, filename):
+    """
+    Streaming XLSX download.
 
-    # Exact headers
-    headers = [
-        "Receipt No", "Date", "Paid To", "Charges A/c",
-        "Description", "Received Amount", "Amount Paid",
-        "Bank Charges", "Cumulative Balance"
-    ]
-    ws.append(headers)
-
-    expenses = Expense.objects.all().order_by("date")
-
-    total_paid = 0
-    total_balance = 0
-
-    for exp in expenses:
-        received_value = exp.received_amount if exp.received_amount is not None else ""
-
-        # Add row
-        ws.append([
-            exp.receipt_no or "",
-            exp.date.strftime("%d/%m/%Y") if exp.date else "",
-            exp.paid_to or "",
-            exp.charges_account or "",
-            exp.description or "",
-            received_value,
-            float(exp.amount_paid or 0),
-            float(exp.bank_charges or 0),
-            float(exp.cumulative_balance or 0),
-        ])
-
-        # Accumulate totals
-        total_paid += float(exp.amount_paid or 0)
-        total_balance += float(exp.cumulative_balance or 0)
-
-    # Add totals row
-    ws.append([
-        "", "", "", "", "TOTALS", "", 
-        total_paid, "", total_balance
-    ])
-
-    wb.save(response)
+    Under ASGI the rows come from the async generator ``arows()`` (async ORM),
+    under WSGI from ``rows()``: Django would buffer a whole async iterator
+    before sending it to a WSGI server.
+    """
+    if isinstance(request, ASGIRequest):
+        content = astream_xlsx(arows(), sheet_title=sheet_title)
+    else:
+        content = stream_xlsx(rows(), sheet_title=sheet_title)
+    response = StreamingHttpResponse(content, content_type=XLSX_CONTENT_TYPE)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
+EXPENSE_EXCEL_HEADERS = [
+    "Receipt No", "Date", "Paid To", "Charges A/c",
+    "Description", "Received Amount", "Amount Paid",
+    "Bank Charges", "Cumulative Balance"
+]
+EXPENSE_EXCEL_FIELDS = (
+    "receipt_no", "date", "paid_to", "charges_account", "description",
+    "received_amount", "amount_paid", "bank_charges", "cumulative_balance",
+)
+
+
+def _expense_excel_row(values):
+    receipt_no, date, paid_to, charges_account, description, received, paid, charges, balance = values
+    return [
+        receipt_no or "",
+        date.strftime("%d/%m/%Y") if date else "",
+        paid_to or "",
+        charges_account or "",
+        description or "",
+        received if received is not None else "",
+        float(paid or 0),
+        float(charges or 0),
+        float(balance or 0),
+    ]
+
+
+def _expense_totals_row(total_paid, closing_balance):
+    # Balances are running, so the last one is the closing balance
+    return ["", "", "", "", "TOTALS", "", total_paid, "", closing_balance]
+
+
+def _expenses_excel_rows(expenses):
+    yield EXPENSE_EXCEL_HEADERS
+    total_paid = closing_balance = 0
+    # On PostgreSQL iterator() reads through a server-side cursor, one chunk per fetch
+    for values in expenses.iterator(chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000)):
+        row = _expense_excel_row(values)
+        total_paid += row[6]
+        closing_balance = row[8]
+        yield row
+    yield _expense_totals_row(total_paid, closing_balance)
+
+
+async def _aexpenses_excel_rows(expenses):
+    yield EXPENSE_EXCEL_HEADERS
+    total_paid = closing_balance = 0
+    fields = itemgetter(*EXPENSE_EXCEL_FIELDS)
+    async for values in expenses.values(*EXPENSE_EXCEL_FIELDS).aiterator(
+        chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    ):
+        row = _expense_excel_row(fields(values))
+        total_paid += row[6]
+        closing_balance = row[8]
+        yield row
+    yield _expense_totals_row(total_paid, closing_balance)
+
+
+async def admin_expenses_excel(request):
+    # Ledger order, so the last running balance is the closing balance
+    expenses = Expense.objects.order_by(*LEDGER_ORDER)
+    return xlsx_response(
+        request,
+        lambda: _expenses_excel_rows(expenses.values_list(*EXPENSE_EXCEL_FIELDS)),
+        lambda: _aexpenses_excel_rows(expenses),
+        sheet_title="Expenses Report",
+        filename="expenses_report.xlsx",
+    )
 
 
         
@@ -369,176 +501,152 @@ def admin_expenses_excel(request):
         
 
 # ------------------- Excel Sales with Totals by Payment Method -------------------
-from django.shortcuts import render
-from django.http import HttpResponse
-from django.db.models import Sum
-from openpyxl import Workbook
-from openpyxl.styles import Font, numbers
-from django.utils.dateparse import parse_date
-from .models import Sale
 
 
 # =========================
 # 📊 Sales Report (HTML page)
 # =========================
-def sales_report(request):
+async def sales_report(request):
     start_date = request.GET.get("start_date")
     end_date = request.GET.get("end_date")
 
-    sales = Sale.objects.all().order_by("date")
+    start = parse_date(start_date) if start_date else None
+    end = parse_date(end_date) if end_date else None
 
-    # Filter by date range
-    if start_date:
-        sales = sales.filter(date__gte=parse_date(start_date))
-    if end_date:
-        sales = sales.filter(date__lte=parse_date(end_date))
+    # Filter by date range (whole days, end date inclusive): the hot table plus the
+    # monthly partitions overlapping the range, oldest first (myapp/partitions.py)
+    sales = []
+    for part in await partitions.aroute(start, end):
+        part = part.for_listing().order_by("date")
+        sales += [sale async for sale in part.aiterator(chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000))]
 
-    total_amount = sales.aggregate(Sum("price"))["price__sum"] or 0
+    # Totals read a few summary rows per day instead of every sale
+    totals = await asummary_totals(start, end)
 
-    return render(request, "admin_sales_report.html", {
+    # Rendering touches the session (messages, user), so it runs in a thread
+    return await sync_to_async(render)(request, "admin_sales_report.html", {
         "sales": sales,
-        "total_amount": total_amount,
+        "total_amount": totals["overall"],
+        "totals": totals,
     })
 # =========================
-# 📥 Export Sales to Excel (Safe Version)
+# 📥 Export Sales to Excel (Streaming)
 # =========================
-from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, numbers
-from django.utils.dateparse import parse_date
-from datetime import datetime
-from .models import Sale
 
-def admin_sales_excel(request):
-    start_date = request.GET.get("start_date")
-    end_date = request.GET.get("end_date")
+SALES_EXCEL_HEADERS = ["Date", "Item", "Quantity", "Price", "Payment Method"]
+SALES_EXCEL_FIELDS = ("date", "item", "quantity", "price", "payment_method", "payment_status")
+
+
+def _sales_excel_row(values):
+    date, item, quantity, price, payment_method, payment_status = values
+
+    # ✅ Safe date handling
+    sale_date = ""
+    if date:
+        if isinstance(date, str):
+            try:
+                sale_date = datetime.strptime(date, "%Y-%m-%d").strftime("%d/%m/%y")
+            except ValueError:
+                sale_date = date
+        else:
+            sale_date = date.strftime("%d/%m/%y")
+
+    return [
+        sale_date,
+        item,
+        quantity,
+        Cell(float(price), COMMA),
+        f"{payment_method} ({payment_status})",
+    ]
 
-    sales = Sale.objects.all().order_by("date")
 
-    # ✅ Filter by dates
-    if start_date:
-        sales = sales.filter(date__gte=parse_date(start_date))
-    if end_date:
-        sales = sales.filter(date__lte=parse_date(end_date))
+def _sales_excel_totals(totals):
+    # Totals section (bold)
+    yield []
+    for row in totals_rows(totals):
+        yield [Cell(value, BOLD) for value in row]
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Sales Report"
 
-    # Headers
-    headers = ["Date", "Item", "Quantity", "Price", "Payment Method"]
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
+def _sales_excel_rows(parts, totals):
+    """Yield the sales sheet rows, reading each queryset of ``parts`` in bounded chunks."""
+    yield [Cell(h, BOLD) for h in SALES_EXCEL_HEADERS]
 
-    # Totals
-    total_price = 0
-    total_cash = 0
-    total_mpesa = 0
+    if not totals["count"]:
+        yield ["No sales data available"]
+        return
 
-    total_delivery = 0
-    delivery_qty = 0
+    # Server-side cursor on PostgreSQL (unless DISABLE_SERVER_SIDE_CURSORS),
+    # chunked fetchmany() on SQLite: never the whole result set in memory
+    for sales in parts:
+        rows = sales.values_list(*SALES_EXCEL_FIELDS).iterator(
+            chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+        )
+        for values in rows:
+            yield _sales_excel_row(values)
+    yield from _sales_excel_totals(totals)
+
+
+async def _asales_excel_rows(parts, totals):
+    """``_sales_excel_rows`` over the async ORM."""
+    yield [Cell(h, BOLD) for h in SALES_EXCEL_HEADERS]
+
+    if not totals["count"]:
+        yield ["No sales data available"]
+        return
+
+    # values(), not values_list(): the latter runs its query on __iter__,
+    # i.e. in the event loop, when driven by aiterator()
+    # aiterator() fetches chunks from the same server-side cursor as iterator()
+    fields = itemgetter(*SALES_EXCEL_FIELDS)
+    for sales in parts:
+        rows = sales.values(*SALES_EXCEL_FIELDS).aiterator(
+            chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+        )
+        async for values in rows:
+            yield _sales_excel_row(fields(values))
+    for row in _sales_excel_totals(totals):
+        yield row
 
-    total_r_amount = 0
-    total_r_liters = 0  # already there
 
-    total_gas_amount = 0
-    gas_qty = 0
+async def admin_sales_excel(request):
+    start_date = request.GET.get("start_date")
+    end_date = request.GET.get("end_date")
 
-    total_bottle_amount = 0
-    bottle_qty = 0
+    start = parse_date(start_date) if start_date else None
+    end = parse_date(end_date) if end_date else None
 
-    if not sales.exists():
-        ws.append(["No sales data available"])
-    else:
-        for s in sales:
-            # ✅ Safe date handling
-            sale_date = ""
-            if s.date:
-                if isinstance(s.date, str):
-                    try:
-                        sale_date = datetime.strptime(s.date, "%Y-%m-%d").strftime("%d/%m/%y")
-                    except ValueError:
-                        sale_date = s.date
-                else:
-                    sale_date = s.date.strftime("%d/%m/%y")
-
-            ws.append([
-                sale_date,
-                s.item,
-                s.quantity,
-                float(s.price),
-                f"{s.payment_method} ({s.payment_status})",
-            ])
-            ws.cell(row=ws.max_row, column=4).number_format = numbers.FORMAT_NUMBER_COMMA_SEPARATED1
-
-            # Totals tracking
-            price_val = float(s.price or 0)
-            qty_val = int(s.quantity or 0)
-            total_price += price_val
-
-            # Liter tracking for (R)
-            if "(R)" in str(s.item):
-                total_r_liters += qty_val
-                total_r_amount += price_val
-
-            # Payment method totals
-            if s.payment_method and s.payment_method.lower() == "cash":
-                total_cash += price_val
-            elif s.payment_method and s.payment_method.lower() == "mpesa":
-                total_mpesa += price_val
-
-            # Delivery total
-            if s.payment_status and s.payment_status.lower() == "delivery":
-                total_delivery += price_val
-                delivery_qty += qty_val
-
-            # Gas total
-            if "gas" in str(s.item).lower() or "wajiko" in str(s.item).lower():
-                total_gas_amount += price_val
-                gas_qty += qty_val
-
-            # Bottle total
-            if "bottle" in str(s.item).lower():
-                total_bottle_amount += price_val
-                bottle_qty += qty_val
-
-        # Totals section
-        ws.append([])
-        ws.append(["TOTAL (R only)", "", total_r_liters, total_r_amount, ""])
-        ws.append(["TOTAL Delivery", "", delivery_qty, total_delivery, ""])
-        ws.append(["TOTAL Gas", "", gas_qty, total_gas_amount, ""])
-        ws.append(["TOTAL Bottle", "", bottle_qty, total_bottle_amount, ""])
-        ws.append(["", "Cash Total", "", total_cash, ""])
-        ws.append(["", "MPesa Total", "", total_mpesa, ""])
-        ws.append(["", "Overall Total", "", total_price, ""])
-
-        # Bold totals
-        for row in ws.iter_rows(min_row=ws.max_row-6, max_row=ws.max_row, min_col=1, max_col=5):
-            for cell in row:
-                cell.font = Font(bold=True)
-
-    # Response
-    response = HttpResponse(
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    response["Content-Disposition"] = 'attachment; filename="sales_report.xlsx"'
-    wb.save(response)
-    return response
-# myapp/views.py
+    # ✅ Filter by dates (whole days, end date inclusive), reading only the partitions in range
+    parts = [part.order_by("date") for part in await partitions.aroute(start, end)]
 
+    # Totals come from the daily rollup, not from the row loop
+    totals = await asummary_totals(start, end)
 
+    # Response streams while rows are read, so the download starts immediately
+    return xlsx_response(
+        request,
+        lambda: _sales_excel_rows(parts, totals),
+        lambda: _asales_excel_rows(parts, totals),
+        sheet_title="Sales Report",
+        filename="sales_report.xlsx",
+    )
 
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from .models import Sale
-from .forms import SaleForm
+
+def _editable_sale(request, pk, back):
+    """The hot-table sale ``pk``; a rolled-over one redirects to ``back`` (closed months are read-only)."""
+    sale = Sale.objects.filter(pk=pk).first()
+    if sale is None and partitions.find(pk) is not None:
+        messages.error(request, f"⚠️ Sale #{pk} is in a closed month and can no longer be edited.")
+        return None, redirect(back)
+    if sale is None:
+        raise Http404("No Sale matches the given query.")
+    return sale, None
 
 
 @login_required
 def edit_order(request, pk):
-    sale = get_object_or_404(Sale, pk=pk)
+    sale, closed = _editable_sale(request, pk, "dashboard")
+    if closed:
+        return closed
 
     if request.method == "POST":
         form = SaleForm(request.POST, instance=sale)
@@ -552,12 +660,6 @@ def edit_order(request, pk):
     return render(request, "edit_order.html", {"form": form, "sale": sale})
 
 
-
-# myapp/views.py
-from django.shortcuts import render, get_object_or_404, redirect
-from .models import Expense
-from .forms import ExpenseForm
-
 def expenses_list(request):
     expenses = Expense.objects.all()
     return render(request, "expenses_list.html", {"expenses": expenses})
@@ -575,15 +677,11 @@ def edit_expense(request, pk):
     return render(request, "edit_expense.html", {"form": form, "expense": expense})  
 
 
-
-
-from django.shortcuts import render, get_object_or_404, redirect
-from .models import Sale
-from .forms import SaleForm  # make sure you have this form
-
 @login_required
 def edit_sale(request, sale_id):
-    sale = get_object_or_404(Sale, id=sale_id)
+    sale, closed = _editable_sale(request, sale_id, "admin_dashboard")
+    if closed:
+        return closed
     if request.method == "POST":
         form = SaleForm(request.POST, instance=sale)
         if form.is_valid():
@@ -594,20 +692,18 @@ def edit_sale(request, sale_id):
     return render(request, "edit_sale.html", {"form": form, "sale": sale})
 
 
-
-from django.contrib.auth.decorators import login_required
-from django.contrib import messages
-from django.shortcuts import redirect, get_object_or_404
-from .models import Sale, Expense
+def _bulk_action(request):
+    action = request.POST.get("action", bulk.DELETE)
+    return action if action in bulk.ACTIONS else bulk.DELETE
 
 
 @login_required
 def delete_orders(request):
     if request.method == "POST":
-        order_ids = request.POST.getlist("selected_orders")
+        order_ids = bulk.parse_ids(request.POST.getlist("selected_orders"))
         if order_ids:
-            Sale.objects.filter(id__in=order_ids).delete()
-            messages.success(request, f"{len(order_ids)} order(s) deleted successfully.")
+            deleted = bulk.sales(bulk.DELETE, ids=order_ids)
+            messages.success(request, f"{deleted} order(s) deleted successfully.")
         else:
             messages.error(request, "No orders were selected for deletion.")
     return redirect("dashboard")   # user dashboard
@@ -616,10 +712,11 @@ def delete_orders(request):
 @login_required
 def delete_sales(request):
     if request.method == "POST":
-        sale_ids = request.POST.getlist("selected_sales")
+        sale_ids = bulk.parse_ids(request.POST.getlist("selected_sales"))
         if sale_ids:
-            Sale.objects.filter(id__in=sale_ids).delete()
-            messages.success(request, f"{len(sale_ids)} sale(s) deleted successfully.")
+            action = _bulk_action(request)
+            done = bulk.sales(action, ids=sale_ids)   # batches of BULK_BATCH_SIZE
+            messages.success(request, f"{done} sale(s) {action}d successfully.")
         else:
             messages.error(request, "No sales were selected for deletion.")
     return redirect("admin_dashboard")   # admin dashboard
@@ -628,15 +725,60 @@ def delete_sales(request):
 @login_required
 def delete_expenses(request):
     if request.method == "POST":
-        expense_ids = request.POST.getlist("selected_expenses")
+        expense_ids = bulk.parse_ids(request.POST.getlist("selected_expenses"))
         if expense_ids:
-            Expense.objects.filter(id__in=expense_ids).delete()
-            messages.success(request, f"{len(expense_ids)} expense(s) deleted successfully.")
+            action = _bulk_action(request)
+            done = bulk.expenses(action, ids=expense_ids)
+            messages.success(request, f"{done} expense(s) {action}d successfully.")
         else:
             messages.error(request, "No expenses were selected for deletion.")
     return redirect("admin_dashboard")   # ✅ go back to admin dashboard    here?
 
 
+@login_required
+def bulk_by_range(request):
+    """Delete or archive every sale / expense in a date range (plus optional filters)."""
+    if not request.user.is_superuser:
+        return HttpResponse("Unauthorized", status=403)
+    if request.method != "POST":
+        return redirect("admin_dashboard")
+
+    dates = {}
+    for name in ("start_date", "end_date"):
+        value = request.POST.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            messages.error(request, f"⚠️ Invalid {name.replace('_', ' ')}: {value}")
+            return redirect("admin_dashboard")
+    if not dates["start_date"] and not dates["end_date"]:
+        # Never "everything" by accident
+        messages.error(request, "⚠️ Choose a start and/or end date for the bulk operation.")
+        return redirect("admin_dashboard")
+
+    action = _bulk_action(request)
+    if request.POST.get("target") != "expenses" and partitions.overlaps(dates["start_date"], dates["end_date"]):
+        # Rolled-over months are read-only history (their totals stay in the rollup)
+        messages.error(request, "⚠️ The range reaches into closed months, whose sales can no longer be changed.")
+        return redirect("admin_dashboard")
+    if request.POST.get("target") == "expenses":
+        selection = bulk.select_expenses(
+            dates["start_date"], dates["end_date"],
+            charges_account=request.POST.get("charges_account"), paid_to=request.POST.get("paid_to"),
+        )
+        done = bulk.expenses(action, queryset=selection)
+        messages.success(request, f"✅ {done} expense(s) {action}d.")
+    else:
+        selection = bulk.select_sales(
+            dates["start_date"], dates["end_date"],
+            payment_method=request.POST.get("payment_method"), payment_status=request.POST.get("payment_status"),
+        )
+        done = bulk.sales(action, queryset=selection)
+        messages.success(request, f"✅ {done} sale(s) {action}d.")
+    return redirect("admin_dashboard")
+
 
 @login_required
 def add_sale(request):
@@ -651,18 +793,172 @@ def add_sale(request):
         except:
             quantity = 0
 
-        unit_price = PRICE_LIST.get(item)
+        unit_price = catalog.unit_price(item)
         if category and item and quantity > 0 and unit_price is not None and payment_method:
-            total_price = Decimal(unit_price) * quantity
+            total_price = unit_price * quantity
 
-            Sale.objects.create(
+            # Double submits carry the same form token: only the first one inserts
+            idempotency.run(request.user, idempotency.get_key(request), lambda: [Sale.objects.create(
                 user=request.user,
                 category=category,
                 item=item,
                 quantity=quantity,
                 price=total_price,
                 payment_method=payment_method,
-            )
+            )])
             return redirect("user_dashboard")
 
-    return render(request, "add_sale.html", {"PRICE_LIST": PRICE_LIST})
\ No newline at end of file
+    return render(request, "add_sale.html", {
+        "PRICE_LIST": catalog.price_list(),
+        "idempotency_key": idempotency.new_key(),
+    })
+
+# --------------------------
+# JSON API: sales + expenses (helpers in myapp/api.py)
+# --------------------------
+
+
+def _api_page(request, resource, queryset):
+    names = resource.parse_fields(request)
+    page = keyset_page(resource.load(queryset, names), resource.order, request.GET.get("cursor"), get_page_size(request))
+    return _api_page_response(request, resource, page, names)
+
+
+def _api_page_response(request, resource, page, names):
+    next_url = None
+    if page.next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = page.next_cursor
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return JsonResponse({
+        "results": [resource.serialize(obj, names) for obj in page],
+        "next_cursor": page.next_cursor,
+        "next": next_url,
+    })
+
+
+def _api_object(request, resource, queryset, pk):
+    names = resource.parse_fields(request)
+    obj = resource.load(queryset, names).filter(pk=pk).first()
+    if obj is None:
+        raise api.ApiError("Not found", status=404)
+    return JsonResponse(resource.serialize(obj, names))
+
+
+def _api_get_or_404(model, pk):
+    obj = model.objects.filter(pk=pk).first()
+    if obj is None:
+        raise api.ApiError("Not found", status=404)
+    return obj
+
+
+# ---- Sales ----
+@condition(etag_func=api.etag(api.SALES))
+def _api_sales_page(request):
+    # The hot table plus the rolled-over months in the requested date range
+    names = api.SALES.parse_fields(request)
+    start, end = api.date_range(request)
+    page = partitions.keyset_page(
+        request.GET.get("cursor"), get_page_size(request),
+        lambda sales: api.SALES.load(api.filter_sales(sales, request), names), start, end,
+    )
+    return _api_page_response(request, api.SALES, page, names)
+
+
+@condition(etag_func=api.etag(api.SALES))
+def _api_sale_detail(request, pk):
+    if not Sale.objects.filter(pk=pk).exists():
+        sale = partitions.find(pk)  # closed months: readable, not writable
+        if sale is not None:
+            return JsonResponse(api.SALES.serialize(sale, api.SALES.parse_fields(request)))
+    return _api_object(request, api.SALES, Sale.objects.all(), pk)
+
+
+@gzip_page
+@require_http_methods(["GET", "HEAD", "POST"])
+@api.api_view()
+def api_sales(request):
+    if request.method != "POST":
+        return _api_sales_page(request)
+
+    # One sale, or a cart: {"payment_method": ..., "lines": [...]} (see myapp/orders.py)
+    data = api.read_json(request)
+    lines = orders.lines_from_json(request.body) if "lines" in data else [data]
+    try:
+        sales = orders.place_order(request.user, lines)
+    except orders.OrderError as e:
+        raise api.ApiError("Invalid order", errors=e.errors)
+    names = list(api.SALES.fields)
+    return JsonResponse({"results": [api.SALES.serialize(sale, names) for sale in sales]}, status=201)
+
+
+@gzip_page
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+@api.api_view()
+def api_sale(request, pk):
+    if request.method in ("GET", "HEAD"):
+        return _api_sale_detail(request, pk)
+
+    if not Sale.objects.filter(pk=pk).exists() and partitions.find(pk) is not None:
+        raise api.ApiError("Sale is in a closed month and read-only", status=409)
+    sale = _api_get_or_404(Sale, pk)
+    if request.method == "DELETE":
+        delete_with_rollup(Sale.objects.filter(pk=sale.pk))
+        return HttpResponse(status=204)
+
+    form = SaleForm(api.form_data(sale, SaleForm, api.read_json(request)), instance=sale)
+    if not form.is_valid():
+        raise api.ApiError("Invalid sale", errors=api.form_errors(form))
+    sale = form.save()  # signals keep the daily rollup in step
+    return JsonResponse(api.SALES.serialize(sale, list(api.SALES.fields)))
+
+
+# ---- Expenses (superusers, like the admin dashboard) ----
+@condition(etag_func=api.etag(api.EXPENSES))
+def _api_expenses_page(request):
+    return _api_page(request, api.EXPENSES, api.filter_expenses(Expense.objects.all(), request))
+
+
+@condition(etag_func=api.etag(api.EXPENSES))
+def _api_expense_detail(request, pk):
+    return _api_object(request, api.EXPENSES, Expense.objects.all(), pk)
+
+
+def _api_save_expense(request, expense=None):
+    data = api.read_json(request)
+    form_data = api.form_data(expense, ExpenseForm, data) if expense else data
+    form = ExpenseForm(form_data, instance=expense)
+    if not form.is_valid():
+        raise api.ApiError("Invalid expense", errors=api.form_errors(form))
+    expense = form.save(commit=False)
+    if "receipt_no" in data:
+        expense.receipt_no = data["receipt_no"]
+    expense.save()  # the ledger signal recomputes the running balances
+    expense.refresh_from_db()  # balance from the ledger, amounts as stored
+    return expense
+
+
+@gzip_page
+@require_http_methods(["GET", "HEAD", "POST"])
+@api.api_view(superuser=True)
+def api_expenses(request):
+    if request.method != "POST":
+        return _api_expenses_page(request)
+    expense = _api_save_expense(request)
+    return JsonResponse(api.EXPENSES.serialize(expense, list(api.EXPENSES.fields)), status=201)
+
+
+@gzip_page
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+@api.api_view(superuser=True)
+def api_expense(request, pk):
+    if request.method in ("GET", "HEAD"):
+        return _api_expense_detail(request, pk)
+
+    expense = _api_get_or_404(Expense, pk)
+    if request.method == "DELETE":
+        delete_expenses_and_rebalance(Expense.objects.filter(pk=expense.pk))
+        return HttpResponse(status=204)
+
+    expense = _api_save_expense(request, expense)
+    return JsonResponse(api.EXPENSES.serialize(expense, list(api.EXPENSES.fields)))
@@ -0,0 +1,198 @@
+# myapp/xlsx.py
+"""
+Minimal streaming XLSX writer.
+
+openpyxl keeps the whole workbook (or, in write-only mode, a temp file) until
+``save()``, so nothing reaches the client before the last row is written.
+This writer emits the zip container incrementally: the sheet XML is deflated
+straight into a buffer that is drained every ``flush_rows`` rows, which lets
+a ``StreamingHttpResponse`` start the download immediately and keeps memory
+bounded regardless of the number of rows.
+"""
+import re
+import zipfile
+from collections import namedtuple
+from decimal import Decimal
+from xml.sax.saxutils import escape, quoteattr
+
+CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Cell styles (indexes into cellXfs below)
+PLAIN = 0
+BOLD = 1
+COMMA = 2  # "#,##0.00", same as openpyxl's FORMAT_NUMBER_COMMA_SEPARATED1
+
+Cell = namedtuple("Cell", "value style")
+
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={title} sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="4" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+class _Sink:
+    """Write-only, non-seekable buffer; zipfile falls back to data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _cell_xml(value, style):
+    s = f' s="{style}"' if style else ""
+    if value is None or value == "":
+        return f"<c{s}/>" if style else ""
+    if isinstance(value, bool):
+        return f'<c{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c{s}><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c{s} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def row_xml(index, row):
+    cells = []
+    for value in row:
+        if isinstance(value, Cell):
+            cells.append(_cell_xml(value.value, value.style) or "<c/>")
+        else:
+            cells.append(_cell_xml(value, PLAIN) or "<c/>")
+    return f'<row r="{index}">{"".join(cells)}</row>'
+
+
+class _Writer:
+    """The zip container and sheet stream shared by the sync and async generators."""
+
+    def __init__(self, sheet_title, flush_rows):
+        self.flush_rows = flush_rows
+        self.index = 0
+        self.sink = _Sink()
+        self.zf = zipfile.ZipFile(self.sink, "w", zipfile.ZIP_DEFLATED)
+        self.zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self.zf.writestr("_rels/.rels", _ROOT_RELS)
+        self.zf.writestr("xl/workbook.xml", _WORKBOOK.format(title=quoteattr(sheet_title[:31])))
+        self.zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self.zf.writestr("xl/styles.xml", _STYLES)
+        self.sheet = self.zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self.sheet.write(_SHEET_HEAD.encode())
+
+    def head(self):
+        return self.sink.drain()
+
+    def write(self, row):
+        """Add ``row``; returns the bytes to send (empty between flushes)."""
+        self.index += 1
+        self.sheet.write(row_xml(self.index, row).encode())
+        if self.index % self.flush_rows == 0:
+            return self.sink.drain()
+        return b""
+
+    def close(self):
+        self.sheet.write(_SHEET_TAIL.encode())
+        self.sheet.close()
+        self.zf.close()
+        return self.sink.drain()
+
+    def discard(self):
+        """Release the zip handles of an abandoned download (client went away)."""
+        if not self.sheet.closed:
+            self.sheet.close()
+        self.zf.close()
+
+
+def stream_xlsx(rows, sheet_title="Sheet1", flush_rows=500):
+    """
+    Yield the bytes of a single-sheet XLSX file built from ``rows``.
+
+    Each row is a sequence of plain values or ``Cell(value, style)`` tuples.
+    """
+    writer = _Writer(sheet_title, flush_rows)
+    try:
+        yield writer.head()
+        for row in rows:
+            data = writer.write(row)
+            if data:
+                yield data
+        yield writer.close()
+    finally:
+        writer.discard()
+
+
+async def astream_xlsx(rows, sheet_title="Sheet1", flush_rows=500):
+    """``stream_xlsx`` for an async iterable of rows (ASGI ``StreamingHttpResponse``)."""
+    writer = _Writer(sheet_title, flush_rows)
+    try:
+        yield writer.head()
+        async for row in rows:
+            data = writer.write(row)
+            if data:
+                yield data
+        yield writer.close()
+    finally:
+        writer.discard()
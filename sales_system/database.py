@@ -0,0 +1,62 @@
+"""
+Database settings: a SQLite file tuned for concurrent writes and reads by
+default, PostgreSQL (``DJANGO_DB_ENGINE=postgres``) on request.
+"""
+import os
+
+CACHE_SIZE_MB = 64
+MMAP_SIZE_MB = 256
+BUSY_TIMEOUT_SECONDS = 20
+CONN_MAX_AGE = 600
+
+
+def sqlite_pragmas(cache_size_mb=CACHE_SIZE_MB, mmap_size_mb=MMAP_SIZE_MB):
+    return {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -cache_size_mb * 1024,  # negative = KiB
+        "mmap_size": mmap_size_mb * 1024 * 1024,
+        "temp_store": "MEMORY",
+    }
+
+
+def sqlite_database(name, cache_size_mb=CACHE_SIZE_MB, mmap_size_mb=MMAP_SIZE_MB,
+                    busy_timeout=BUSY_TIMEOUT_SECONDS, conn_max_age=CONN_MAX_AGE):
+    """A ``DATABASES`` entry for the SQLite file ``name`` with the tuning above."""
+    pragmas = sqlite_pragmas(cache_size_mb, mmap_size_mb)
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": conn_max_age,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": ";".join(f"PRAGMA {key}={value}" for key, value in pragmas.items()),
+            "timeout": busy_timeout,  # wait for the write lock instead of "database is locked"
+            "transaction_mode": "IMMEDIATE",  # no read-then-upgrade deadlocks
+        },
+    }
+
+
+def _env_flag(env, name, default=False):
+    value = env.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def postgres_database(env=None, conn_max_age=CONN_MAX_AGE):
+    """A ``DATABASES`` entry for PostgreSQL from ``POSTGRES_*`` variables in ``env``."""
+    env = os.environ if env is None else env
+    return {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": env.get("POSTGRES_DB", "sales_brookelands"),
+        "USER": env.get("POSTGRES_USER", "postgres"),
+        "PASSWORD": env.get("POSTGRES_PASSWORD", ""),
+        "HOST": env.get("POSTGRES_HOST", "localhost"),
+        "PORT": env.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": int(env.get("POSTGRES_CONN_MAX_AGE", conn_max_age)),
+        "CONN_HEALTH_CHECKS": True,
+        # Set behind PgBouncer in transaction pooling mode
+        "DISABLE_SERVER_SIDE_CURSORS": _env_flag(env, "POSTGRES_DISABLE_SERVER_SIDE_CURSORS"),
+        "TEST": {"NAME": env.get("POSTGRES_TEST_DB", "test_sales_brookelands")},
+    }
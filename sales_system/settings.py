@@ -1,6 +1,9 @@
 import os
+import tempfile
 from pathlib import Path
 
+from .database import postgres_database, sqlite_database
+
 # -----------------------------
 # BASE DIRECTORY
 # -----------------------------
@@ -31,6 +34,7 @@ INSTALLED_APPS = [
 # MIDDLEWARE
 # -----------------------------
 MIDDLEWARE = [
+    'myapp.middleware.PerformanceMiddleware',  # first, so it times everything below
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -66,12 +70,58 @@ WSGI_APPLICATION = 'sales_system.wsgi.application'
 # -----------------------------
 # DATABASE
 # -----------------------------
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite unless DJANGO_DB_ENGINE=postgres (POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD,
+# POSTGRES_HOST, POSTGRES_PORT); tests use whichever is selected. See sales_system/database.py
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE in ('postgres', 'postgresql'):
+    DATABASES = {'default': postgres_database()}
+else:
+    # WAL, pragmas, busy timeout and persistent connections
+    DATABASES = {
+        'default': {
+            **sqlite_database(BASE_DIR / 'db.sqlite3'),
+            # A file (not in-memory) test database, so tests see the same locking as production;
+            # kept in the temp dir, out of the checkout
+            'TEST': {'NAME': Path(tempfile.gettempdir()) / 'sales_system_test_db.sqlite3'},
+        }
     }
-}
+
+# -----------------------------
+# ORDERS
+# -----------------------------
+ORDER_MAX_LINES = 100  # line items accepted in one cart submit (user_dashboard)
+USER_DASHBOARD_DEFAULT_SCOPE = "own"  # own | today | team | all (myapp/scopes.py); the last choice is kept per session
+USER_DASHBOARD_WINDOW = 100  # recent sales rendered with the page; later changes arrive through the feed
+SALE_FEED_POLL_SECONDS = 1.0  # /dashboard/feed/ checks for new events this often
+SALE_FEED_LONG_POLL_SECONDS = 25  # longest wait of a long-poll request
+SALE_FEED_STREAM_SECONDS = 300  # server-sent event streams are recycled after this
+SALE_FEED_RETENTION_HOURS = 24  # events older than this are pruned
+IDEMPOTENCY_KEY_TTL_HOURS = 24  # a resubmitted order form / Idempotency-Key is recognised for this long
+
+# -----------------------------
+# EXPENSE IMPORTS
+# -----------------------------
+EXPENSE_IMPORT_BATCH_SIZE = 1000  # rows per bulk_create
+EXPENSE_IMPORT_CHUNK_SIZE = 10000  # rows read from the file at a time
+IMPORT_JOB_WORKERS = 2  # background import threads per process
+IMPORT_JOBS_EAGER = False  # True runs imports inside the upload request
+IMPORT_JOB_STALE_SECONDS = 900  # a running job silent this long is re-queued (its worker died)
+
+# -----------------------------
+# EXPORTS
+# -----------------------------
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip when streaming exports
+
+# -----------------------------
+# BULK DELETE / ARCHIVE
+# -----------------------------
+BULK_BATCH_SIZE = 500  # rows deleted/archived/moved per transaction (myapp/bulk.py, move_archived)
+
+# -----------------------------
+# SALE PARTITIONS
+# -----------------------------
+SALE_PARTITION_KEEP_MONTHS = 2  # months left in myapp_sale by roll_over_sales (myapp/partitions.py)
 
 # -----------------------------
 # PASSWORD VALIDATION
@@ -112,6 +162,47 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# -----------------------------
+# CACHE (dashboard totals and table fragments)
+# -----------------------------
+# Local memory by default. Each process then has its own copy, and a write
+# only invalidates the copy in the process that served it; with several
+# worker processes set DJANGO_CACHE_DIR to share a file-based cache.
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'sales-brookelands',
+            'OPTIONS': {'MAX_ENTRIES': 2000},
+        }
+    }
+DASHBOARD_CACHE_TIMEOUT = 300  # seconds; entries are also invalidated on every write
+DASHBOARD_CACHE_VERSION_TIMEOUT = 86400  # seconds; an expired version restarts above its old value
+
+
+# -----------------------------
+# PERFORMANCE INSTRUMENTATION
+# -----------------------------
+PERF_SLOW_REQUEST_MS = 1000  # log requests slower than this, with their slowest queries
+PERF_WINDOW = 1000  # requests kept per URL name for the histograms
+
+
+# -----------------------------
+# PDF REPORTS
+# -----------------------------
+PDF_REPORT_DIR = os.path.join(MEDIA_ROOT, 'reports')  # rendered files, reused until the data changes
+PDF_REPORT_WORKERS = 2  # xhtml2pdf worker processes
+PDF_REPORTS_EAGER = False  # True renders inside the request (tests/debugging)
+PDF_REPORT_STALE_GRACE_SECONDS = 600  # older renders of a range are deleted this long after a newer one
+
+
 # -----------------------------
 # LOGIN SETTINGS
 # -----------------------------